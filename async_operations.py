@@ -0,0 +1,199 @@
+"""
+Asyncio front end for the Mini Library Management System.
+Provides async versions of the operations in operations.py over the same
+data, with async-aware circulation locks, group-committed persistence
+and coalescing of identical concurrent searches.
+
+Usage:
+    import async_operations as library
+
+    status = await library.borrow_book("M001", "978-1234567890")
+    results = await library.search_books("gatsby")
+"""
+
+import asyncio
+import weakref
+
+import operations
+from locks import DEFAULT_STRIPES
+
+# In-flight searches keyed by query, shared by identical concurrent calls
+_inflight_searches = {}
+
+# LibraryStore whose log is synced before mutations return, or None
+_store = None
+
+# Group commit: the fsync currently running, and the one callers can still join
+_running_sync = None
+_next_sync = None
+
+
+class AsyncStripedLocks:
+    """
+    Lock striping for coroutines, mirroring locks.StripedLocks.
+
+    Member stripes are always acquired before book stripes, so coroutines
+    holding locks for the same member or book cannot deadlock.
+    """
+
+    def __init__(self, stripes=DEFAULT_STRIPES):
+        self.stripes = stripes
+        self._member_locks = [asyncio.Lock() for _ in range(stripes)]
+        self._book_locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def member_lock(self, member_id):
+        """Return the lock guarding a member."""
+        return self._member_locks[hash(member_id) % self.stripes]
+
+    def book_lock(self, isbn):
+        """Return the lock guarding a book."""
+        return self._book_locks[hash(isbn) % self.stripes]
+
+
+# asyncio locks belong to one event loop, so each loop gets its own stripes
+_loop_locks = weakref.WeakKeyDictionary()
+
+
+def _locks():
+    """Return the circulation locks for the running event loop."""
+    loop = asyncio.get_running_loop()
+    locks = _loop_locks.get(loop)
+    if locks is None:
+        locks = _loop_locks[loop] = AsyncStripedLocks()
+    return locks
+
+
+def set_store(store):
+    """
+    Make mutations wait until they are durable in a LibraryStore log.
+
+    Concurrent mutations share one fsync (group commit), which runs in
+    the default executor so the event loop keeps serving other patrons.
+
+    Args:
+        store (LibraryStore): Open store, or None to return without syncing
+    """
+    global _store
+    _store = store
+
+
+async def _sync():
+    """Wait for the store log to be synced, sharing one fsync between callers."""
+    global _next_sync
+    if _store is None:
+        return
+    # Join the next fsync; it only starts after every caller that joined it
+    # has written its record, so one fsync makes all of them durable
+    if _next_sync is None:
+        _next_sync = asyncio.ensure_future(_run_sync())
+    await asyncio.shield(_next_sync)
+
+
+async def _run_sync():
+    global _running_sync, _next_sync
+    if _running_sync is not None:
+        await _running_sync
+    # Callers arriving from now on need a later fsync
+    _next_sync = None
+    _running_sync = asyncio.get_running_loop().run_in_executor(None, _store.sync)
+    try:
+        await _running_sync
+    finally:
+        _running_sync = None
+
+
+async def _mutate(result):
+    """Finish a mutation: make successful changes durable, then return the status."""
+    if result:
+        await _sync()
+    return result
+
+
+async def add_book(isbn, title, author, genre, total_copies):
+    """Async version of operations.add_book."""
+    async with _locks().book_lock(isbn):
+        return await _mutate(operations.add_book(isbn, title, author, genre, total_copies))
+
+
+async def add_member(member_id, name, email):
+    """Async version of operations.add_member."""
+    async with _locks().member_lock(member_id):
+        return await _mutate(operations.add_member(member_id, name, email))
+
+
+async def update_book(isbn, **kwargs):
+    """Async version of operations.update_book."""
+    async with _locks().book_lock(isbn):
+        return await _mutate(operations.update_book(isbn, **kwargs))
+
+
+async def update_member(member_id, **kwargs):
+    """Async version of operations.update_member."""
+    async with _locks().member_lock(member_id):
+        return await _mutate(operations.update_member(member_id, **kwargs))
+
+
+async def delete_book(isbn):
+    """Async version of operations.delete_book."""
+    async with _locks().book_lock(isbn):
+        return await _mutate(operations.delete_book(isbn))
+
+
+async def delete_member(member_id):
+    """Async version of operations.delete_member."""
+    async with _locks().member_lock(member_id):
+        return await _mutate(operations.delete_member(member_id))
+
+
+async def borrow_book(member_id, isbn):
+    """
+    Async version of operations.borrow_book.
+
+    The member and book locks are held until the loan is durable, so a
+    patron's later calls never overtake an earlier one that is still syncing.
+    """
+    locks = _locks()
+    async with locks.member_lock(member_id), locks.book_lock(isbn):
+        return await _mutate(operations.borrow_book(member_id, isbn))
+
+
+async def return_book(member_id, isbn):
+    """Async version of operations.return_book."""
+    locks = _locks()
+    async with locks.member_lock(member_id), locks.book_lock(isbn):
+        return await _mutate(operations.return_book(member_id, isbn))
+
+
+async def place_hold(member_id, isbn):
+    """Async version of operations.place_hold."""
+    locks = _locks()
+    async with locks.member_lock(member_id), locks.book_lock(isbn):
+        return await _mutate(operations.place_hold(member_id, isbn))
+
+
+async def cancel_hold(member_id, isbn):
+    """Async version of operations.cancel_hold."""
+    locks = _locks()
+    async with locks.member_lock(member_id), locks.book_lock(isbn):
+        return await _mutate(operations.cancel_hold(member_id, isbn))
+
+
+async def search_books(search_term, search_by="title", whole_words=False):
+    """
+    Async version of operations.search_books.
+
+    Concurrent calls for the same query share a single search, which
+    runs in the default executor.
+
+    Returns:
+        list: List of matching books
+    """
+    key = (search_term.lower(), search_by, whole_words)
+    future = _inflight_searches.get(key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, operations.search_books, search_term, search_by, whole_words)
+        _inflight_searches[key] = future
+        future.add_done_callback(lambda _: _inflight_searches.pop(key, None))
+    # Each caller gets its own list, so callers cannot affect each other
+    return list(await asyncio.shield(future))
@@ -0,0 +1,82 @@
+"""
+Storage backend interface for the Mini Library Management System.
+By default the library lives in memory, in operations.books and
+operations.members. A backend installed with operations.set_backend()
+answers the catalog, member and circulation operations instead, e.g. to
+keep a library larger than memory on disk (see sqlite_backend.py).
+"""
+
+from bulk_import import DEFAULT_BATCH_SIZE
+
+
+class StorageBackend:
+    """
+    Base class for storage backends.
+
+    Every method takes the same arguments and returns the same results as
+    the operations function of the same name, and reports its result
+    through operations._report. Books are returned as (isbn, Book) pairs
+    and members as Member records, built from the stored rows; changing
+    those records does not change the stored library.
+
+    Observers, the in-memory search and catalog indexes, the search cache
+    and the loan ledger only follow the in-memory library.
+    """
+
+    def add_book(self, isbn, title, author, genre, total_copies):
+        raise NotImplementedError
+
+    def add_member(self, member_id, name, email):
+        raise NotImplementedError
+
+    def add_books_bulk(self, source, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+        raise NotImplementedError
+
+    def add_members_bulk(self, source, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+        raise NotImplementedError
+
+    def search_books(self, search_term, search_by="title", whole_words=False):
+        raise NotImplementedError
+
+    def find_books(self, search_term=None, search_by="title", genre=None, available_only=False,
+                   whole_words=False):
+        raise NotImplementedError
+
+    def update_book(self, isbn, **kwargs):
+        raise NotImplementedError
+
+    def update_member(self, member_id, **kwargs):
+        raise NotImplementedError
+
+    def delete_book(self, isbn):
+        raise NotImplementedError
+
+    def delete_member(self, member_id):
+        raise NotImplementedError
+
+    def borrow_book(self, member_id, isbn):
+        raise NotImplementedError
+
+    def return_book(self, member_id, isbn):
+        raise NotImplementedError
+
+    def iter_books(self, offset=0, limit=None):
+        raise NotImplementedError
+
+    def iter_members(self, offset=0, limit=None):
+        raise NotImplementedError
+
+    def get_book(self, isbn):
+        """Return the Book record with this ISBN, or None."""
+        raise NotImplementedError
+
+    def get_member(self, member_id):
+        """Return the Member record with this ID, or None."""
+        raise NotImplementedError
+
+    def counts(self):
+        """Return the number of books, members and loans, keyed by those names."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the backend's resources."""
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Mini Library Management System.
+Run each benchmark from the repository root, e.g. python -m benchmarks.memory
+"""
@@ -0,0 +1,75 @@
+"""
+Asyncio front end benchmark.
+Simulates thousands of concurrent patrons, each searching the catalog
+and borrowing and returning books through async_operations, and reports
+requests per second. Optionally logs every mutation to a LibraryStore so
+group-committed fsyncs are included.
+
+Usage: python -m benchmarks.async_patrons [--patrons N] [--books N] [--persist]
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+import async_operations as library
+import operations
+from records import GENRES
+from storage import LibraryStore
+
+POPULAR_QUERIES = ["title 1", "title 42", "author 7", "title 99"]
+
+
+async def patron(n, rounds, book_count, counter):
+    rng = random.Random(n)
+    member_id = f"M{n:07d}"
+    for _ in range(rounds):
+        await library.search_books(rng.choice(POPULAR_QUERIES))
+        isbn = f"{rng.randrange(book_count):013d}"
+        if await library.borrow_book(member_id, isbn):
+            await asyncio.sleep(0)
+            await library.return_book(member_id, isbn)
+            counter[0] += 1
+        counter[0] += 2
+
+
+async def run(patrons, rounds, book_count):
+    counter = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(patron(n, rounds, book_count, counter) for n in range(patrons)))
+    return counter[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asyncio front end.")
+    parser.add_argument("--patrons", type=int, default=5000, help="concurrent patrons")
+    parser.add_argument("--rounds", type=int, default=5, help="search/borrow/return rounds per patron")
+    parser.add_argument("--books", type=int, default=10000, help="catalog size")
+    parser.add_argument("--persist", action="store_true", help="sync mutations to a write-ahead log")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LibraryStore(tmp, snapshot_every=None) if args.persist else None
+        library.set_store(store)
+        operations.add_books_bulk(
+            {'isbn': f"{i:013d}", 'title': f"Title {i}", 'author': f"Author {i % 100}",
+             'genre': GENRES[i % len(GENRES)], 'total_copies': 2}
+            for i in range(args.books))
+        operations.add_members_bulk(
+            {'member_id': f"M{i:07d}", 'name': f"Member {i}", 'email': f"m{i}@example.com"}
+            for i in range(args.patrons))
+
+        requests, elapsed = asyncio.run(run(args.patrons, args.rounds, args.books))
+        library.set_store(None)
+        if store is not None:
+            store.close()
+
+    mode = "with group-committed fsync" if args.persist else "in memory"
+    print(f"{args.patrons:,} patrons, {requests:,} requests in {elapsed:.2f}s "
+          f"({requests / elapsed:,.0f} requests/sec, {mode})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Storage backend benchmark.
+Loads the same synthetic library into the in-memory dict backend and the
+SQLite backend, then times bulk loading, searches, genre listings and
+circulation on each and reports p50/p99 latency side by side.
+
+Usage: python -m benchmarks.backends [--scales N ...] [--ops N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import operations
+from benchmarks.suite import WORDS, feasible_loans, generate_books, generate_members, measure
+from records import GENRES
+from results import Status
+from sqlite_backend import SqliteBackend
+
+DEFAULT_SCALES = (100_000, 1_000_000)
+
+
+def run_backend(scale, ops, seed=1):
+    """
+    Load a library of the given scale into the current backend and time it.
+
+    Returns:
+        dict: Results keyed by workload name
+    """
+    rng = random.Random(seed)
+    results = {}
+    start = time.perf_counter()
+    operations.add_books_bulk(generate_books(scale))
+    operations.add_members_bulk(generate_members(scale // 10))
+    results['load_seconds'] = time.perf_counter() - start
+    # Index the deferred books of the dict backend before timing searches
+    operations.find_books("warm up")
+
+    member_ids = [f"M{i:08d}" for i in range(scale // 10)]
+    isbns = [f"{i:013d}" for i in range(scale)]
+    results['search_rare'] = measure([
+        (operations.search_books, (f"{rng.choice(WORDS)} {rng.randrange(scale)}",)) for _ in range(ops)])
+    results['search_common'] = measure([
+        (operations.search_books, (rng.choice(WORDS),)) for _ in range(min(ops, 20))])
+    results['find_books'] = measure([
+        (operations.find_books, (None, "title", GENRES[n % len(GENRES)], True)) for n in range(min(ops, 20))])
+    loans = feasible_loans(rng, member_ids, isbns, ops)
+    results['borrow_book'] = measure([(operations.borrow_book, loan) for loan in loans], expect=Status.OK)
+    results['return_book'] = measure([(operations.return_book, loan) for loan in loans], expect=Status.OK)
+    results['add_book'] = measure([
+        (operations.add_book, (f"9{n:012d}", f"New {rng.choice(WORDS)} {n}", "New Author", GENRES[n % len(GENRES)], 2))
+        for n in range(ops)])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the dict and SQLite storage backends.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="catalog sizes")
+    parser.add_argument("--ops", type=int, default=2000, help="calls timed per workload")
+    args = parser.parse_args()
+
+    operations.configure_search_cache(max_entries=0)
+    for scale in args.scales:
+        operations.books.clear()
+        operations.members.clear()
+        memory = run_backend(scale, args.ops)
+        operations.books.clear()
+        operations.members.clear()
+
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SqliteBackend(os.path.join(directory, "library.db"))
+            operations.set_backend(backend)
+            try:
+                sqlite = run_backend(scale, args.ops)
+            finally:
+                operations.set_backend(None)
+                backend.close()
+
+        print(f"{scale:,} books, {scale // 10:,} members")
+        print(f"  {'load':<14} dict {memory['load_seconds']:9.2f} s   sqlite {sqlite['load_seconds']:9.2f} s")
+        for name in memory:
+            if name != 'load_seconds':
+                print(f"  {name:<14} dict p50 {memory[name]['p50_us']:9.1f} us  p99 {memory[name]['p99_us']:9.1f} us"
+                      f"   sqlite p50 {sqlite[name]['p50_us']:9.1f} us  p99 {sqlite[name]['p99_us']:9.1f} us")
+    operations.configure_search_cache()
+
+
+if __name__ == "__main__":
+    main()
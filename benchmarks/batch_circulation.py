@@ -0,0 +1,79 @@
+"""
+Batched circulation benchmark.
+Checks out and returns MAX_BORROWED books per member, once with single
+borrow_book/return_book calls and once with borrow_many/return_many,
+and reports the throughput of each.
+
+Usage: python -m benchmarks.batch_circulation [--members N] [--rounds N]
+"""
+
+import argparse
+import time
+
+import operations
+from records import GENRES, MAX_BORROWED
+
+
+def setup(member_count):
+    """Load one book per member loan, so every checkout succeeds."""
+    operations.books.clear()
+    operations.members.clear()
+    operations.add_books_bulk(
+        {'isbn': f"{i:013d}", 'title': f"Title {i}", 'author': f"Author {i}",
+         'genre': GENRES[i % len(GENRES)], 'total_copies': 1}
+        for i in range(member_count * MAX_BORROWED))
+    operations.add_members_bulk(
+        {'member_id': f"M{i:07d}", 'name': f"Member {i}", 'email': f"m{i}@example.com"}
+        for i in range(member_count))
+
+
+def baskets(member_count):
+    """Return (member_id, isbns) for every member's checkout."""
+    return [(f"M{i:07d}", [f"{i * MAX_BORROWED + n:013d}" for n in range(MAX_BORROWED)])
+            for i in range(member_count)]
+
+
+def run_single(work, rounds):
+    borrow_book = operations.borrow_book
+    return_book = operations.return_book
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for member_id, isbns in work:
+            for isbn in isbns:
+                borrow_book(member_id, isbn)
+        for member_id, isbns in work:
+            for isbn in isbns:
+                return_book(member_id, isbn)
+    return time.perf_counter() - start
+
+
+def run_batched(work, rounds):
+    borrow_many = operations.borrow_many
+    return_many = operations.return_many
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for member_id, isbns in work:
+            borrow_many(member_id, isbns)
+        for member_id, isbns in work:
+            return_many(member_id, isbns)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched and single circulation calls.")
+    parser.add_argument("--members", type=int, default=10000, help="number of members checking out")
+    parser.add_argument("--rounds", type=int, default=5, help="checkout/return rounds per mode")
+    args = parser.parse_args()
+
+    setup(args.members)
+    work = baskets(args.members)
+    items = 2 * args.members * MAX_BORROWED * args.rounds
+
+    single = run_single(work, args.rounds)
+    batched = run_batched(work, args.rounds)
+    print(f"single calls:  {items / single:>10,.0f} items/sec")
+    print(f"batched calls: {items / batched:>10,.0f} items/sec  ({single / batched:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
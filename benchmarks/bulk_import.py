@@ -0,0 +1,51 @@
+"""
+Bulk import benchmark.
+Writes a synthetic catalog feed to a temporary CSV file and times
+add_books_bulk loading it.
+
+Usage: python -m benchmarks.bulk_import [--count N] [--batch-size N]
+"""
+
+import argparse
+import csv
+import os
+import resource
+import tempfile
+import time
+
+import operations
+from records import GENRES
+
+
+def write_feed(path, count):
+    """Write a CSV catalog feed with count rows."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["isbn", "title", "author", "genre", "total_copies"])
+        for i in range(count):
+            writer.writerow([f"{i:013d}", f"Title {i}", f"Author {i % 5000}",
+                             GENRES[i % len(GENRES)], 1 + i % 5])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time bulk catalog imports.")
+    parser.add_argument("--count", type=int, default=1_000_000, help="number of rows")
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows per batch")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feed.csv")
+        write_feed(path, args.count)
+
+        operations.books.clear()
+        start = time.perf_counter()
+        report = operations.add_books_bulk(path, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Imported {report.added:,} books ({len(report.errors)} rejected) in {elapsed:.2f}s")
+    print(f"  {report.added / elapsed:,.0f} rows/sec, peak RSS {peak:,.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Columnar catalog benchmark.
+Runs the catalog reports (copies by genre, books with no copies left)
+with Python loops over the books dictionary and with the NumPy-backed
+ColumnarCatalog, and checks both give the same answers.
+
+Requires NumPy.
+
+Usage: python -m benchmarks.columnar [--books N] [--repeat N]
+"""
+
+import argparse
+import random
+import time
+
+import columnar
+import operations
+from benchmarks.suite import generate_books
+
+
+def best_time(function, repeat):
+    """Return the fastest of repeat calls in seconds, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dict and columnar catalog reports.")
+    parser.add_argument("--books", type=int, default=1_000_000, help="catalog size")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per report, best one kept")
+    args = parser.parse_args()
+
+    operations.books.clear()
+    operations.add_books_bulk(generate_books(args.books))
+    # Take every copy of some books so the availability report finds them
+    rng = random.Random(0)
+    for isbn in rng.sample(list(operations.books), args.books // 100):
+        operations.books[isbn]['available_copies'] = 0
+
+    start = time.perf_counter()
+    store = columnar.ColumnarCatalog()
+    print(f"{args.books:,} books, columnar store built in {time.perf_counter() - start:.2f} s")
+
+    reports = [
+        ("copies by genre", columnar.copies_by_genre, store.copies_by_genre),
+        ("no copies left", columnar.unavailable_books, lambda: store.filter(max_available=0)),
+    ]
+    for name, dict_path, columnar_path in reports:
+        dict_time, expected = best_time(dict_path, args.repeat)
+        columnar_time, result = best_time(columnar_path, args.repeat)
+        assert result == expected, f"{name}: columnar result differs from the dict path"
+        print(f"  {name:<16} dict {dict_time * 1000:9.2f} ms  columnar {columnar_time * 1000:9.2f} ms  "
+              f"({dict_time / columnar_time:.1f}x)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Concurrent circulation stress benchmark.
+Runs random borrow/return calls from several threads against a shared
+library, checks that the circulation invariants still hold afterwards,
+and reports throughput for each thread count.
+
+Note that CPython's global interpreter lock means pure-Python operations
+do not run in parallel; the benchmark shows that striped locking adds
+little contention, not that throughput grows linearly with threads.
+
+Usage: python -m benchmarks.concurrency [--books N] [--members N] [--ops N]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+import operations
+from records import GENRES, MAX_BORROWED
+
+
+def setup(book_count, member_count):
+    """Load a fresh catalog with few copies per book, so borrows contend."""
+    operations.books.clear()
+    operations.members.clear()
+    operations.add_books_bulk(
+        {'isbn': f"{i:013d}", 'title': f"Title {i}", 'author': f"Author {i}",
+         'genre': GENRES[i % len(GENRES)], 'total_copies': 1 + i % 2}
+        for i in range(book_count))
+    operations.add_members_bulk(
+        {'member_id': f"M{i:07d}", 'name': f"Member {i}", 'email': f"m{i}@example.com"}
+        for i in range(member_count))
+
+
+def check_invariants():
+    """
+    Verify that books and members agree about every loan.
+
+    Raises:
+        AssertionError: If any invariant is violated
+    """
+    loans = {}
+    for member in operations.members:
+        borrowed = member['borrowed_books']
+        assert len(borrowed) <= MAX_BORROWED, f"{member['member_id']} is over the borrow limit"
+        assert len(set(borrowed)) == len(borrowed), f"{member['member_id']} borrowed a book twice"
+        for isbn in borrowed:
+            loans[isbn] = loans.get(isbn, 0) + 1
+    for isbn, book in operations.books.items():
+        assert 0 <= book['available_copies'] <= book['total_copies'], f"{isbn} has invalid availability"
+        assert book['total_copies'] - book['available_copies'] == loans.get(isbn, 0), \
+            f"{isbn} availability does not match its loans"
+
+
+def worker(seed, ops, book_count, member_count, barrier):
+    rng = random.Random(seed)
+    borrow_book = operations.borrow_book
+    return_book = operations.return_book
+    barrier.wait()
+    for _ in range(ops):
+        member_id = f"M{rng.randrange(member_count):07d}"
+        isbn = f"{rng.randrange(book_count):013d}"
+        if rng.random() < 0.5:
+            borrow_book(member_id, isbn)
+        else:
+            return_book(member_id, isbn)
+
+
+def run(threads, ops, book_count, member_count):
+    """Run ops operations in total split across threads and return ops/sec."""
+    setup(book_count, member_count)
+    barrier = threading.Barrier(threads + 1)
+    pool = [threading.Thread(target=worker, args=(n, ops // threads, book_count, member_count, barrier))
+            for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    check_invariants()
+    return ops / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress concurrent circulation.")
+    parser.add_argument("--books", type=int, default=200, help="catalog size (small means more contention)")
+    parser.add_argument("--members", type=int, default=500, help="number of members")
+    parser.add_argument("--ops", type=int, default=200000, help="total operations per run")
+    args = parser.parse_args()
+
+    for threads in (1, 2, 4, 8, 16):
+        rate = run(threads, args.ops, args.books, args.members)
+        print(f"{threads:>2} threads: {rate:>10,.0f} ops/sec  (invariants hold)")
+
+
+if __name__ == "__main__":
+    main()
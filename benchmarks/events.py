@@ -0,0 +1,74 @@
+"""
+Change feed benchmark.
+Times borrow_book call by call without a feed, with a feed nobody reads,
+with a subscriber thread draining the feed and with a file sink, and
+reports the overhead the feed adds to every borrow.
+
+Usage: python -m benchmarks.events [--members N] [--rounds N]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+
+import operations
+from benchmarks.batch_circulation import baskets, setup
+from benchmarks.suite import measure
+from events import EventFeed
+
+
+def time_borrows(work, rounds):
+    """Time every borrow_book call, returning the books untimed after each round."""
+    results = []
+    for _ in range(rounds):
+        results.append(measure([(operations.borrow_book, (member_id, isbn))
+                                for member_id, isbns in work for isbn in isbns]))
+        for member_id, isbns in work:
+            operations.return_many(member_id, isbns)
+    return min(results, key=lambda result: result['p50_us'])
+
+
+def drain(subscription, stopped):
+    while not stopped.is_set():
+        subscription.poll(timeout=0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the change feed overhead on borrow_book.")
+    parser.add_argument("--members", type=int, default=20000, help="number of members checking out")
+    parser.add_argument("--rounds", type=int, default=3, help="timed rounds per configuration")
+    args = parser.parse_args()
+
+    setup(args.members)
+    work = baskets(args.members)
+    results = {'no feed': time_borrows(work, args.rounds)}
+
+    feed = EventFeed()
+    results['feed, unread'] = time_borrows(work, args.rounds)
+
+    subscription = feed.subscribe()
+    stopped = threading.Event()
+    reader = threading.Thread(target=drain, args=(subscription, stopped))
+    reader.start()
+    results['feed, subscriber'] = time_borrows(work, args.rounds)
+    stopped.set()
+    reader.join()
+    subscription.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sink = feed.add_file_sink(os.path.join(directory, "events.bin"))
+        first = feed.published
+        results['feed, file sink'] = time_borrows(work, args.rounds)
+        feed.close()
+        written = feed.published - first
+        print(f"{written:,} events written, {os.path.getsize(sink.path) / written:.1f} bytes each")
+
+    baseline = results['no feed']['p50_us']
+    for name, result in results.items():
+        print(f"  {name:<17} p50 {result['p50_us']:6.2f} us  p99 {result['p99_us']:7.2f} us  "
+              f"{result['ops_per_sec']:>9,.0f} borrows/sec  ({result['p50_us'] - baseline:+.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Hold queue benchmark.
+Queues members for a single-copy book at several queue depths, then
+times placing holds, looking up queue positions and returning the book
+while every return hands the copy to the next holder. The timings
+should not grow with the depth of the queue.
+
+Usage: python -m benchmarks.holds [--depths N ...] [--ops N]
+"""
+
+import argparse
+import random
+
+import operations
+from benchmarks.suite import measure
+
+DEFAULT_DEPTHS = (100, 10_000, 100_000)
+
+ISBN = "9780000000001"
+
+
+def setup(depth):
+    """Lend the only copy of a book to M0 and queue depth members behind it."""
+    operations.books.clear()
+    operations.members.clear()
+    operations.add_book(ISBN, "Popular Title", "Popular Author", "Fiction", 1)
+    operations.add_members_bulk(
+        {'member_id': f"M{i}", 'name': f"Member {i}", 'email': f"m{i}@example.com"}
+        for i in range(depth + 1))
+    operations.borrow_book("M0", ISBN)
+    for i in range(1, depth + 1):
+        operations.place_hold(f"M{i}", ISBN)
+
+
+def run(depth, ops, seed=1):
+    """
+    Time the hold operations against a queue of the given depth.
+
+    Returns:
+        dict: Results keyed by workload name
+    """
+    rng = random.Random(seed)
+    setup(depth)
+    results = {}
+    results['hold_position'] = measure([
+        (operations.hold_position, (f"M{rng.randrange(1, depth + 1)}", ISBN)) for _ in range(ops)])
+    # Each return lends the copy to the next holder, who returns it in turn
+    handovers = min(ops, depth)
+    results['return_book'] = measure([
+        (operations.return_book, (f"M{i}", ISBN)) for i in range(handovers)])
+    operations.add_members_bulk(
+        {'member_id': f"N{i}", 'name': f"New Member {i}", 'email': f"n{i}@example.com"}
+        for i in range(ops))
+    results['place_hold'] = measure([(operations.place_hold, (f"N{i}", ISBN)) for i in range(ops)])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time hold queue operations at several queue depths.")
+    parser.add_argument("--depths", type=int, nargs="+", default=DEFAULT_DEPTHS, help="members queued")
+    parser.add_argument("--ops", type=int, default=2000, help="calls timed per workload")
+    args = parser.parse_args()
+
+    for depth in args.depths:
+        results = run(depth, args.ops)
+        print(f"{depth:,} members queued")
+        for name, result in results.items():
+            print(f"  {name:<14} p50 {result['p50_us']:7.2f} us  p99 {result['p99_us']:7.2f} us  "
+                  f"{result['ops_per_sec']:>11,.0f} ops/sec")
+
+
+if __name__ == "__main__":
+    main()
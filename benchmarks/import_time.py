@@ -0,0 +1,88 @@
+"""
+Import time benchmark.
+Imports a module in fresh interpreters with -X importtime, reports the
+median cumulative import time and the slowest imports it pulls in, and
+checks the median against a budget. Short-lived CLI and serverless
+invocations pay this cost on every start.
+
+Usage: python -m benchmarks.import_time [--module NAME] [--runs N] [--budget-ms MS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold-start budget for "import operations", with bytecode already cached
+DEFAULT_BUDGET_MS = 40.0
+
+# Modules operations must not import until a feature needs them
+DEFERRED_MODULES = ("multiprocessing", "concurrent.futures", "sqlite3", "csv", "json",
+                    "ranked_search", "storage", "sqlite_backend", "sharding", "events", "numpy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(module="operations"):
+    """
+    Import a module in a fresh interpreter and read its -X importtime report.
+
+    Bytecode caching is enabled for the child, so after the first run the
+    timings leave out compiling the sources.
+
+    Args:
+        module (str): Module to import
+
+    Returns:
+        dict: Cumulative import time in microseconds of the module and of
+            every module it imported
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level lines other than the module itself are interpreter start-up
+        if name.startswith("  ") or name.strip() == module:
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def median_import_ms(module="operations", runs=5):
+    """
+    Median cumulative import time of a module over several fresh interpreters.
+
+    Returns:
+        tuple: (median milliseconds, profile of the last run)
+    """
+    import_profile(module)  # writes the bytecode cache
+    profiles = [import_profile(module) for _ in range(runs)]
+    return statistics.median(profile[module] for profile in profiles) / 1000, profiles[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time how long a module takes to import.")
+    parser.add_argument("--module", default="operations", help="module to import")
+    parser.add_argument("--runs", type=int, default=9, help="fresh interpreters to time")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="median import time budget")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    median, profile = median_import_ms(args.module, args.runs)
+    print(f"import {args.module}: median {median:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    for name, micros in sorted(profile.items(), key=lambda item: -item[1])[1:args.top + 1]:
+        print(f"  {name:<32} {micros / 1000:7.2f} ms")
+    loaded = [name for name in DEFERRED_MODULES if name in profile]
+    if loaded:
+        print(f"deferred modules imported eagerly: {', '.join(loaded)}")
+    if median > args.budget_ms or loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
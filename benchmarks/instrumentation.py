@@ -0,0 +1,68 @@
+"""
+Instrumentation overhead benchmark.
+Times borrow/return cycles through the raw, uninstrumented functions,
+through the instrumented functions with metrics disabled, and with
+metrics enabled, and reports the overhead of each against the raw calls.
+
+Usage: python -m benchmarks.instrumentation [--members N] [--rounds N]
+"""
+
+import argparse
+import time
+
+import operations
+from records import GENRES
+
+
+def setup(member_count):
+    """Load one single-copy book per member."""
+    operations.books.clear()
+    operations.members.clear()
+    operations.add_books_bulk(
+        {'isbn': f"{i:013d}", 'title': f"Title {i}", 'author': f"Author {i}",
+         'genre': GENRES[i % len(GENRES)], 'total_copies': 1}
+        for i in range(member_count))
+    operations.add_members_bulk(
+        {'member_id': f"M{i:07d}", 'name': f"Member {i}", 'email': f"m{i}@example.com"}
+        for i in range(member_count))
+
+
+def run(borrow_book, return_book, loans, rounds):
+    """Borrow and return every loan rounds times and return calls/sec."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for member_id, isbn in loans:
+            borrow_book(member_id, isbn)
+        for member_id, isbn in loans:
+            return_book(member_id, isbn)
+    return 2 * len(loans) * rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the overhead of operation metrics.")
+    parser.add_argument("--members", type=int, default=10000, help="number of members borrowing")
+    parser.add_argument("--rounds", type=int, default=10, help="borrow/return rounds per mode")
+    args = parser.parse_args()
+
+    setup(args.members)
+    loans = [(f"M{i:07d}", f"{i:013d}") for i in range(args.members)]
+    raw = (operations.borrow_book.__wrapped__, operations.return_book.__wrapped__)
+    wrapped = (operations.borrow_book, operations.return_book)
+
+    # Interleave the modes and keep each one's best run to reduce noise
+    best = {"raw": 0.0, "disabled": 0.0, "enabled": 0.0}
+    for _ in range(3):
+        operations.disable_metrics()
+        best["raw"] = max(best["raw"], run(*raw, loans, args.rounds))
+        best["disabled"] = max(best["disabled"], run(*wrapped, loans, args.rounds))
+        operations.enable_metrics()
+        best["enabled"] = max(best["enabled"], run(*wrapped, loans, args.rounds))
+    operations.disable_metrics()
+
+    for mode, rate in best.items():
+        overhead = best["raw"] / rate - 1
+        print(f"{mode:<9} {rate:>12,.0f} calls/sec  overhead {overhead:+7.1%}")
+
+
+if __name__ == "__main__":
+    main()
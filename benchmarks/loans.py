@@ -0,0 +1,63 @@
+"""
+Loan ledger benchmark.
+Spreads checkouts of a large library over 60 days, then times overdue
+and due-soon queries on the ledger's due-date heap against scanning
+every member's loans and sorting them.
+
+Usage: python -m benchmarks.loans [--members N] [--queries N]
+"""
+
+import argparse
+import random
+import time
+
+import operations
+from benchmarks.batch_circulation import baskets, setup
+from loans import SECONDS_PER_DAY
+
+
+def scan_overdue(as_of, limit):
+    """Overdue loans found by visiting every member, most overdue first."""
+    loans = [loan for member in operations.members
+             for loan in operations.member_loans(member['member_id']) if loan.due < as_of]
+    loans.sort(key=lambda loan: loan.due)
+    return loans[:limit]
+
+
+def time_calls(function, queries):
+    start = time.perf_counter()
+    for _ in range(queries):
+        result = function()
+    return (time.perf_counter() - start) / queries, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time overdue queries on the loan ledger.")
+    parser.add_argument("--members", type=int, default=100_000, help="members, each borrowing the maximum")
+    parser.add_argument("--queries", type=int, default=20, help="queries per method")
+    args = parser.parse_args()
+
+    setup(args.members)
+    rng = random.Random(0)
+    start_time = 1_700_000_000.0
+    now = [start_time]
+    operations.configure_loans(clock=lambda: now[0])
+    for member_id, isbns in baskets(args.members):
+        now[0] = start_time + rng.random() * 60 * SECONDS_PER_DAY
+        operations.borrow_many(member_id, isbns)
+    as_of = start_time + 30 * SECONDS_PER_DAY
+
+    print(f"{len(operations._loans):,} loans")
+    for limit in (10, 1000):
+        heap_time, heap_result = time_calls(lambda: operations.overdue_loans(as_of, limit), args.queries)
+        scan_time, scan_result = time_calls(lambda: scan_overdue(as_of, limit), max(1, args.queries // 10))
+        assert [loan.due for loan in heap_result] == [loan.due for loan in scan_result], "Results differ"
+        print(f"  {limit:>5} overdue  heap {heap_time * 1000:8.3f} ms  scan {scan_time * 1000:8.1f} ms  "
+              f"({scan_time / heap_time:,.0f}x)")
+    heap_time, _ = time_calls(lambda: operations.next_due_loans(10), args.queries)
+    print(f"     10 due next heap {heap_time * 1000:8.3f} ms")
+    operations.configure_loans(clock=time.time)
+
+
+if __name__ == "__main__":
+    main()
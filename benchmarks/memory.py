@@ -0,0 +1,70 @@
+"""
+Memory benchmark comparing book record layouts.
+Builds the same catalog once with the old five-key dictionaries and once
+with Book records, and reports the memory each layout allocates.
+
+Usage: python -m benchmarks.memory [--count N]
+"""
+
+import argparse
+import tracemalloc
+
+from records import GENRES, Book
+
+
+def make_dict_book(title, author, genre, copies):
+    """Build a book in the original dictionary layout."""
+    return {
+        'title': title,
+        'author': author,
+        'genre': genre,
+        'total_copies': copies,
+        'available_copies': copies
+    }
+
+
+def measure(factory, rows):
+    """
+    Measure the memory allocated while building a catalog.
+
+    Args:
+        factory (callable): Builds one book from (title, author, genre, copies)
+        rows (list): Prebuilt row tuples, shared by every layout
+
+    Returns:
+        int: Bytes allocated for the catalog dictionary and its records
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    catalog = {isbn: factory(*row) for isbn, row in rows}
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del catalog
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare book record memory layouts.")
+    parser.add_argument("--count", type=int, default=1_000_000, help="number of books")
+    args = parser.parse_args()
+
+    # Strings are built up front so both layouts share them and only the
+    # record overhead is measured
+    rows = [
+        (f"{i:013d}", (f"Title {i}", f"Author {i % 5000}", GENRES[i % len(GENRES)], 1 + i % 5))
+        for i in range(args.count)
+    ]
+
+    results = {
+        "dict": measure(make_dict_book, rows),
+        "Book": measure(Book, rows),
+    }
+
+    print(f"Memory for {args.count:,} books")
+    for layout, size in results.items():
+        print(f"  {layout:<5} {size / 2**20:9.1f} MiB  ({size / args.count:6.1f} bytes/book)")
+    print(f"  Book records use {results['Book'] / results['dict']:.0%} of the dict layout")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Parallel search benchmark.
+Times short-term searches (which scan the whole catalog) sequentially
+and on a process pool, and checks both return the same results.
+
+Usage: python -m benchmarks.parallel_search [--books N] [--workers N] [--queries N]
+"""
+
+import argparse
+import os
+import time
+
+import operations
+from benchmarks.suite import generate_books
+
+
+def time_queries(terms):
+    start = time.perf_counter()
+    results = [operations.search_books(term) for term in terms]
+    return (time.perf_counter() - start) / len(terms), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and parallel catalog scans.")
+    parser.add_argument("--books", type=int, default=1_000_000, help="catalog size")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--queries", type=int, default=20, help="queries per mode")
+    args = parser.parse_args()
+
+    operations.books.clear()
+    operations.add_books_bulk(generate_books(args.books))
+    operations.configure_search_cache(max_entries=0)
+    terms = [f"{n % 10}{(n * 7) % 10}" for n in range(args.queries)]
+
+    sequential, expected = time_queries(terms)
+    operations.configure_parallel_search(threshold=0, workers=args.workers)
+    operations.search_books("~")  # starts building the snapshot and the workers
+    operations._parallel_search.wait()
+    parallel, results = time_queries(terms)
+    operations.configure_parallel_search(threshold=None)
+    assert results == expected, "Parallel results differ from the sequential scan"
+
+    print(f"{args.books:,} books, {args.workers} workers ({os.cpu_count()} CPUs)")
+    print(f"  sequential {sequential * 1000:9.1f} ms/query")
+    print(f"  parallel   {parallel * 1000:9.1f} ms/query  ({sequential / parallel:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Ranked search benchmark.
+Builds a catalog whose titles and authors draw on a realistic vocabulary
+(a few frequent words and a long tail of rare ones), then times ranked
+searches for exact and misspelled queries and checks the p99 latency
+against a target.
+
+Usage: python -m benchmarks.ranked_search [--books N] [--queries N] [--target-ms MS]
+"""
+
+import argparse
+import random
+import sys
+import time
+from itertools import accumulate
+
+import operations
+from records import GENRES
+
+SYLLABLES = ("ka", "lo", "mi", "ren", "sta", "vor", "el", "dun", "ish", "ter",
+             "ba", "qui", "zel", "mon", "ar", "tho", "ne", "gra", "fi", "sor")
+
+
+def make_words(count, rng):
+    """Return count distinct pronounceable words of two to four syllables."""
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def generate_catalog(count, seed=0):
+    """
+    Yield book rows whose title words follow a Zipf-like distribution.
+
+    Args:
+        count (int): Number of books
+        seed (int): Random seed, so every run builds the same catalog
+    """
+    rng = random.Random(seed)
+    vocabulary = make_words(20_000, rng)
+    surnames = make_words(5_000, rng)
+    cumulative = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    for i in range(count):
+        title = rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(2, 5))
+        yield {'isbn': f"{i:013d}",
+               'title': " ".join(title).capitalize(),
+               'author': f"{rng.choice(surnames).title()} {rng.choice(surnames).title()}",
+               'genre': GENRES[i % len(GENRES)],
+               'total_copies': 1 + rng.randrange(5)}
+
+
+def misspell(word, rng):
+    """Delete, swap or replace one letter of a word."""
+    position = rng.randrange(len(word) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return word[:position] + word[position + 1:]
+    if kind == 1:
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return word[:position] + rng.choice("aeiourst") + word[position + 1:]
+
+
+def make_queries(count, seed=1):
+    """Return (label, query) pairs: title and author words, exact and misspelled."""
+    rng = random.Random(seed)
+    catalog = list(operations.books.values())
+    queries = []
+    for n in range(count):
+        book = rng.choice(catalog)
+        words = [rng.choice(book['title'].lower().split()), book['author'].split()[-1].lower()]
+        if n % 2:
+            words = [misspell(word, rng) if len(word) > 3 else word for word in words]
+            queries.append(("misspelled", " ".join(words)))
+        else:
+            queries.append(("exact", " ".join(words)))
+    return queries
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time fuzzy ranked searches on a large catalog.")
+    parser.add_argument("--books", type=int, default=1_000_000, help="catalog size")
+    parser.add_argument("--queries", type=int, default=200, help="queries to time")
+    parser.add_argument("--limit", type=int, default=10, help="results per query")
+    parser.add_argument("--target-ms", type=float, default=100.0, help="p99 latency target per query")
+    args = parser.parse_args()
+
+    operations.books.clear()
+    operations.add_books_bulk(generate_catalog(args.books))
+    queries = make_queries(args.queries)
+
+    start = time.perf_counter()
+    operations.search_ranked("")  # builds the index
+    print(f"{args.books:,} books, ranked index built in {time.perf_counter() - start:.2f} s")
+
+    latencies = {}
+    for label, query in queries:
+        start = time.perf_counter()
+        operations.search_ranked(query, args.limit)
+        latencies.setdefault(label, []).append(time.perf_counter() - start)
+
+    every = [seconds for samples in latencies.values() for seconds in samples]
+    for label, samples in sorted(latencies.items()) + [("all", every)]:
+        print(f"  {label:<11} p50 {percentile(samples, 0.5) * 1000:7.2f} ms  "
+              f"p99 {percentile(samples, 0.99) * 1000:7.2f} ms")
+
+    p99 = percentile(every, 0.99) * 1000
+    if p99 > args.target_ms:
+        print(f"p99 {p99:.2f} ms exceeds the {args.target_ms:.0f} ms target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
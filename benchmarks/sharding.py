@@ -0,0 +1,83 @@
+"""
+Sharded engine scaling benchmark.
+Runs random borrow/return calls from several client threads against a
+ShardedLibrary with 1, 2, 4, ... worker processes and reports throughput
+for each worker count, along with the share of cross-shard loans.
+
+Each worker is a separate process, so throughput can only grow with the
+worker count on a machine with that many free cores.
+
+Usage: python -m benchmarks.sharding [--books N] [--members N] [--ops N] [--clients N]
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+
+from records import GENRES
+from sharding import ShardedLibrary, shard_for
+
+
+def load(library, book_count, member_count):
+    library.add_books_bulk(
+        {'isbn': f"{i:013d}", 'title': f"Title {i}", 'author': f"Author {i}",
+         'genre': GENRES[i % len(GENRES)], 'total_copies': 2}
+        for i in range(book_count))
+    library.add_members_bulk(
+        {'member_id': f"M{i:07d}", 'name': f"Member {i}", 'email': f"m{i}@example.com"}
+        for i in range(member_count))
+
+
+def client(library, seed, ops, book_count, member_count, barrier):
+    rng = random.Random(seed)
+    barrier.wait()
+    for _ in range(ops):
+        member_id = f"M{rng.randrange(member_count):07d}"
+        isbn = f"{rng.randrange(book_count):013d}"
+        if rng.random() < 0.5:
+            library.borrow_book(member_id, isbn)
+        else:
+            library.return_book(member_id, isbn)
+
+
+def run(workers, clients, ops, book_count, member_count):
+    """Return ops/sec for ops calls split across client threads."""
+    with ShardedLibrary(workers) as library:
+        load(library, book_count, member_count)
+        barrier = threading.Barrier(clients + 1)
+        threads = [threading.Thread(target=client,
+                                    args=(library, n, ops // clients, book_count, member_count, barrier))
+                   for n in range(clients)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure sharded throughput by worker count.")
+    parser.add_argument("--books", type=int, default=100000, help="catalog size")
+    parser.add_argument("--members", type=int, default=10000, help="number of members")
+    parser.add_argument("--ops", type=int, default=40000, help="total operations per run")
+    parser.add_argument("--clients", type=int, default=16, help="client threads calling the router")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs available")
+    counts = [1]
+    while counts[-1] * 2 <= max(os.cpu_count() or 1, 4):
+        counts.append(counts[-1] * 2)
+    for workers in counts:
+        rng = random.Random(0)
+        cross = sum(shard_for(f"M{rng.randrange(args.members):07d}", workers)
+                    != shard_for(f"{rng.randrange(args.books):013d}", workers) for _ in range(10000)) / 10000
+        rate = run(workers, args.clients, args.ops, args.books, args.members)
+        print(f"{workers:>2} workers: {rate:>10,.0f} ops/sec  ({cross:.0%} of loans cross shards)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Benchmark suite covering the hot paths of operations.py.
+Loads synthetic catalogs and member lists at one or more scales, times
+every operation call by call, and writes p50/p99 latency and throughput
+as JSON. Two result files can then be compared to flag regressions.
+
+Usage:
+    python -m benchmarks.suite run [--scales N ...] [--ops N] [--output FILE]
+    python -m benchmarks.suite compare BASELINE CURRENT [--threshold F]
+"""
+
+import argparse
+import io
+import json
+import platform
+import random
+import sys
+import time
+
+import operations
+from records import GENRES, MAX_BORROWED
+from results import Status
+
+# Words used to build titles, so searches match a realistic share of books
+WORDS = ("river", "night", "stone", "garden", "shadow", "empire", "winter", "glass",
+         "secret", "ocean", "silver", "storm", "forest", "queen", "letter", "harbor")
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+
+
+def generate_books(count, seed=0):
+    """
+    Yield synthetic book rows for add_books_bulk.
+
+    Args:
+        count (int): Number of books
+        seed (int): Random seed, so every run builds the same catalog
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {'isbn': f"{i:013d}",
+               'title': f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+               'author': f"Author {rng.randrange(count // 10 + 1)}",
+               'genre': GENRES[i % len(GENRES)],
+               'total_copies': 1 + rng.randrange(5)}
+
+
+def generate_members(count):
+    """
+    Yield synthetic member rows for add_members_bulk.
+
+    Args:
+        count (int): Number of members
+    """
+    for i in range(count):
+        yield {'member_id': f"M{i:08d}", 'name': f"Member {i}", 'email': f"member{i}@example.com"}
+
+
+def setup(scale):
+    """Load a fresh library with scale books and scale // 10 members."""
+    operations.books.clear()
+    operations.members.clear()
+    operations.add_books_bulk(generate_books(scale))
+    operations.add_members_bulk(generate_members(scale // 10))
+    # Index the deferred books now, so the first timed call does not pay for it
+    operations.find_books("warm up")
+
+
+def measure(calls, expect=None):
+    """
+    Time a list of calls one by one.
+
+    Args:
+        calls (list): (function, args) pairs
+        expect: Value every call must return, e.g. Status.OK, so that a
+            benchmark cannot end up timing the failure path
+
+    Returns:
+        dict: count, p50_us, p99_us and ops_per_sec
+
+    Raises:
+        AssertionError: If any call did not return expect
+    """
+    clock = time.perf_counter_ns
+    latencies = []
+    failures = 0
+    for function, args in calls:
+        start = clock()
+        result = function(*args)
+        latencies.append(clock() - start)
+        if expect is not None and result != expect:
+            failures += 1
+    count = len(latencies)
+    if failures:
+        raise AssertionError(f"{failures} of {count} calls did not return {expect!r}")
+    latencies.sort()
+    return {
+        'count': count,
+        'p50_us': latencies[count // 2] / 1000,
+        'p99_us': latencies[min(count - 1, count * 99 // 100)] / 1000,
+        'ops_per_sec': count / (sum(latencies) / 1e9),
+    }
+
+
+def feasible_loans(rng, member_ids, isbns, count):
+    """
+    Pick loans that all succeed on a library with no books on loan.
+
+    Every book has at least one copy, so each book is lent at most once,
+    and no member is given more than MAX_BORROWED books.
+
+    Args:
+        rng (random.Random): Source of randomness
+        member_ids (list): IDs of the members who may borrow
+        isbns (list): ISBNs of the books that may be borrowed
+        count (int): Number of loans wanted
+
+    Returns:
+        list: (member_id, isbn) pairs, fewer than count if the library is too small
+    """
+    count = min(count, len(isbns), len(member_ids) * MAX_BORROWED)
+    slots = [member_id for member_id in member_ids for _ in range(MAX_BORROWED)]
+    return list(zip(rng.sample(slots, count), rng.sample(isbns, count)))
+
+
+def run_scale(scale, ops, seed=1):
+    """
+    Benchmark every operation against a library of the given scale.
+
+    Args:
+        scale (int): Number of books in the catalog
+        ops (int): Calls timed per operation
+        seed (int): Random seed for the call arguments
+
+    Returns:
+        dict: Results keyed by operation name
+    """
+    rng = random.Random(seed)
+    setup(scale)
+    member_ids = [f"M{i:08d}" for i in range(scale // 10)]
+    isbns = [f"{i:013d}" for i in range(scale)]
+    new_isbns = [f"9{i:012d}" for i in range(ops)]
+    new_member_ids = [f"N{i:08d}" for i in range(ops)]
+    sink = io.StringIO()
+    results = {}
+
+    results['add_book'] = measure([
+        (operations.add_book, (isbn, f"New {rng.choice(WORDS)} {n}", "New Author", GENRES[n % len(GENRES)], 2))
+        for n, isbn in enumerate(new_isbns)])
+    results['add_member'] = measure([
+        (operations.add_member, (member_id, f"New {n}", f"new{n}@example.com"))
+        for n, member_id in enumerate(new_member_ids)])
+
+    # Searches bypass the result cache, then hit it with repeated queries
+    queries = [(rng.choice(WORDS)[:rng.randint(3, 6)], "title") for _ in range(ops)]
+    operations.configure_search_cache(max_entries=0)
+    results['search_books'] = measure([(operations.search_books, query) for query in queries])
+    operations.configure_search_cache()
+    results['search_books_cached'] = measure([(operations.search_books, query) for query in queries])
+    results['find_books'] = measure([
+        (operations.find_books, (None, "title", GENRES[n % len(GENRES)], True)) for n in range(min(ops, 200))])
+
+    # Random members borrow random books, then return them; every call succeeds
+    loans = feasible_loans(rng, member_ids, isbns, ops)
+    results['borrow_book'] = measure([(operations.borrow_book, loan) for loan in loans], expect=Status.OK)
+    results['return_book'] = measure([(operations.return_book, loan) for loan in loans], expect=Status.OK)
+
+    results['update_book'] = measure([
+        (_update_book, (isbn, n)) for n, isbn in enumerate(rng.sample(isbns, ops))])
+    results['update_member'] = measure([
+        (_update_member, (member_id, n)) for n, member_id in enumerate(rng.choices(member_ids, k=ops))])
+    results['delete_book'] = measure([(operations.delete_book, (isbn,)) for isbn in new_isbns])
+    results['delete_member'] = measure([(operations.delete_member, (member_id,)) for member_id in new_member_ids])
+
+    # Display a 100-record page at a random position
+    results['display_books'] = measure([
+        (_display, (operations.display_books, rng.randrange(scale), sink)) for _ in range(min(ops, 200))])
+    results['display_members'] = measure([
+        (_display, (operations.display_members, rng.randrange(scale // 10), sink)) for _ in range(min(ops, 200))])
+    return results
+
+
+def _update_book(isbn, n):
+    operations.update_book(isbn, title=f"Renamed {WORDS[n % len(WORDS)]} {n}")
+
+
+def _update_member(member_id, n):
+    operations.update_member(member_id, name=f"Renamed {n}")
+
+
+def _display(display, offset, sink):
+    sink.seek(0)
+    sink.truncate()
+    display(offset=offset, limit=100, file=sink)
+
+
+def run(args):
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'ops': args.ops,
+        'scales': {},
+    }
+    for scale in args.scales:
+        results = run_scale(scale, args.ops)
+        report['scales'][str(scale)] = results
+        print(f"{scale:,} books", file=sys.stderr)
+        for name, result in results.items():
+            print(f"  {name:<20} p50 {result['p50_us']:9.1f} us  p99 {result['p99_us']:9.1f} us  "
+                  f"{result['ops_per_sec']:>12,.0f} ops/sec", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare two result files.
+
+    Args:
+        baseline (dict): Results of the reference run
+        current (dict): Results of the run being checked
+        threshold (float): Allowed fractional drop in ops/sec, e.g. 0.1
+
+    Returns:
+        list: (scale, operation, baseline ops/sec, current ops/sec) for
+            every regression past the threshold
+    """
+    regressions = []
+    for scale, results in current['scales'].items():
+        for name, result in results.items():
+            base = baseline['scales'].get(scale, {}).get(name)
+            if base is None:
+                continue
+            if result['ops_per_sec'] < base['ops_per_sec'] * (1 - threshold):
+                regressions.append((scale, name, base['ops_per_sec'], result['ops_per_sec']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every library operation.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write JSON results")
+    run_parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="catalog sizes")
+    run_parser.add_argument("--ops", type=int, default=2000, help="calls timed per operation")
+    run_parser.add_argument("--output", help="file to write the JSON results to (default: stdout)")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline", help="results of the reference run")
+    compare_parser.add_argument("current", help="results of the run being checked")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="allowed fractional drop in ops/sec (default: 0.10)")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    for scale, name, before, after in regressions:
+        print(f"REGRESSION {name} at {int(scale):,} books: {before:,.0f} -> {after:,.0f} ops/sec "
+              f"({after / before - 1:+.0%})")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions past {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Streaming row readers for bulk imports into the Mini Library Management System.
+Rows are read lazily from CSV or JSONL files and grouped into batches,
+so large catalog feeds can be imported with flat memory use.
+"""
+
+from itertools import islice
+
+# Number of rows validated and inserted together
+DEFAULT_BATCH_SIZE = 10000
+
+
+def read_rows(source, file_format=None):
+    """
+    Read rows from a CSV or JSONL file, or pass through an iterable of rows.
+
+    Args:
+        source (str or iterable): File path, or an iterable of row dictionaries
+        file_format (str): "csv" or "jsonl"; detected from the file extension
+            when not given
+
+    Yields:
+        tuple: (row_number, row) where row is a dictionary
+    """
+    if not isinstance(source, str):
+        yield from enumerate(source, start=1)
+        return
+
+    if file_format is None:
+        file_format = "jsonl" if source.endswith((".jsonl", ".json")) else "csv"
+
+    # Imported here so that importing operations does not load them
+    import csv
+    import json
+
+    with open(source, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            # Row 1 is the header line
+            yield from enumerate(csv.DictReader(f), start=2)
+        elif file_format == "jsonl":
+            for row_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield row_number, json.loads(line)
+                    except ValueError:
+                        yield row_number, None
+        else:
+            raise ValueError(f"Unsupported file format '{file_format}'. Use 'csv' or 'jsonl'.")
+
+
+def batched(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Group an iterable of rows into lists of at most batch_size rows.
+
+    Args:
+        rows (iterable): Rows to group
+        batch_size (int): Maximum rows per batch
+
+    Yields:
+        list: The next batch of rows
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class BulkReport:
+    """
+    Outcome of a bulk import.
+
+    Attributes:
+        added (int): Number of records added
+        errors (list): (row_number, key, reason) for every rejected row
+    """
+
+    def __init__(self):
+        self.added = 0
+        self.errors = []
+
+    @property
+    def ok(self):
+        """True if every row was imported."""
+        return not self.errors
+
+    def reject(self, row_number, key, reason):
+        """Record a rejected row."""
+        self.errors.append((row_number, key, reason))
+
+    def __repr__(self):
+        return f"BulkReport(added={self.added}, errors={len(self.errors)})"
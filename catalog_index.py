@@ -0,0 +1,159 @@
+"""
+Secondary indexes for the Mini Library Management System.
+Keeps the set of ISBNs in every genre and the set of ISBNs with copies
+available, so queries such as "all available Sci-Fi books" only touch
+the matching books instead of scanning the whole catalog.
+"""
+
+from records import GENRES
+
+
+class CatalogIndex:
+    """
+    Genre and availability indexes over the book catalog.
+
+    The index keeps:
+        - a set of ISBNs for every genre
+        - the set of ISBNs with at least one available copy
+        - the position of every book, so results come back in catalog order
+
+    operations.py updates the index whenever a book is added, changed,
+    deleted, borrowed or returned. An index can also be marked stale, in
+    which case updates are ignored until it is rebuilt from the catalog.
+    """
+
+    def __init__(self):
+        self._by_genre = {genre: set() for genre in GENRES}
+        self._available = set()
+        self._order = {}
+        self._next_order = 0
+        self.stale = False
+
+    def clear(self):
+        """Remove every book from the index."""
+        for isbns in self._by_genre.values():
+            isbns.clear()
+        self._available.clear()
+        self._order.clear()
+        self._next_order = 0
+        self.stale = False
+
+    def invalidate(self):
+        """Mark the index stale, e.g. after switching to a different catalog."""
+        self.stale = True
+
+    def rebuild(self, catalog):
+        """
+        Rebuild the index from every book in a catalog.
+
+        Args:
+            catalog (dict): Catalog of Book records keyed by ISBN
+        """
+        self.clear()
+        for isbn, book in catalog.items():
+            self.add(isbn, book)
+
+    def add(self, isbn, book):
+        """
+        Index a newly added book.
+
+        Args:
+            isbn (str): ISBN of the book
+            book (Book): The book record
+        """
+        if self.stale:
+            return
+        self._order[isbn] = self._next_order
+        self._next_order += 1
+        self._by_genre[book['genre']].add(isbn)
+        if book['available_copies'] > 0:
+            self._available.add(isbn)
+
+    def update(self, isbn, book, old_genre):
+        """
+        Re-index a book whose genre or copy counts changed.
+
+        Args:
+            isbn (str): ISBN of the book
+            book (Book): The updated book record
+            old_genre (str): Genre of the book before the change
+        """
+        if self.stale:
+            return
+        genre = book['genre']
+        if genre != old_genre:
+            self._by_genre[old_genre].discard(isbn)
+            self._by_genre[genre].add(isbn)
+        self.update_availability(isbn, book)
+
+    def update_availability(self, isbn, book):
+        """
+        Re-index a book whose available copies changed.
+
+        Args:
+            isbn (str): ISBN of the book
+            book (Book): The updated book record
+        """
+        if self.stale:
+            return
+        if book['available_copies'] > 0:
+            self._available.add(isbn)
+        else:
+            self._available.discard(isbn)
+
+    def remove(self, isbn, book):
+        """
+        Remove a book from the index.
+
+        Args:
+            isbn (str): ISBN of the book
+            book (Book): The book record being removed
+        """
+        if self.stale:
+            return
+        self._by_genre[book['genre']].discard(isbn)
+        self._available.discard(isbn)
+        del self._order[isbn]
+
+    def select(self, genre=None, available_only=False):
+        """
+        Find the books in a genre and/or with copies available.
+
+        Args:
+            genre (str): Genre to match, or None for every genre
+            available_only (bool): Only match books with copies available
+
+        Returns:
+            list: Matching ISBNs in catalog order
+        """
+        # Set operations run without releasing the GIL, so they see a
+        # consistent index even while other threads borrow and return
+        if genre is None:
+            if not available_only:
+                return list(self._order)
+            isbns = self._available.copy()
+        elif available_only:
+            isbns = self._by_genre[genre] & self._available
+        else:
+            isbns = self._by_genre[genre].copy()
+        return sorted(isbns, key=self._order.__getitem__)
+
+    def filter(self, isbns, genre=None, available_only=False):
+        """
+        Keep only the books in a genre and/or with copies available.
+
+        Args:
+            isbns (list): Candidate ISBNs, e.g. search results
+            genre (str): Genre to match, or None for every genre
+            available_only (bool): Only match books with copies available
+
+        Returns:
+            list: The matching ISBNs, in the order given
+        """
+        if genre is not None:
+            in_genre = self._by_genre[genre]
+            isbns = [isbn for isbn in isbns if isbn in in_genre]
+        if available_only:
+            available = self._available
+            isbns = [isbn for isbn in isbns if isbn in available]
+        return list(isbns)
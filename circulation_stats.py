@@ -0,0 +1,264 @@
+"""
+Circulation statistics for the Mini Library Management System.
+Running totals of titles, copies and loans, per-ISBN borrow counts, a
+Space-Saving sketch of the most borrowed titles and the set of members
+at the borrowing limit. operations.py updates them on every change, so
+library-wide figures no longer need a walk over every book and member.
+"""
+
+import threading
+
+from records import MAX_BORROWED
+
+# Counters kept by the popular titles sketch
+DEFAULT_TOP_CAPACITY = 100
+
+
+class SpaceSaving:
+    """
+    Space-Saving sketch of the most frequent items in a stream.
+
+    At most capacity items are counted. An item not counted yet takes over
+    the counter of an item with the lowest count, so every item seen more
+    than total / capacity times is guaranteed to be counted. Counters are
+    grouped into buckets by count (the "stream summary"), which makes
+    every update O(1).
+
+    Args:
+        capacity (int): Number of counters
+    """
+
+    def __init__(self, capacity=DEFAULT_TOP_CAPACITY):
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        """Forget every item."""
+        self._counts = {}       # item -> estimated count
+        self._buckets = {}      # count -> items with that count, oldest first
+        self._minimum = 0
+
+    def __contains__(self, item):
+        return item in self._counts
+
+    def __len__(self):
+        return len(self._counts)
+
+    def add(self, item):
+        """Count one occurrence of item."""
+        counts = self._counts
+        buckets = self._buckets
+        count = counts.get(item)
+        if count is None:
+            if len(counts) < self.capacity:
+                count = self._minimum = 0
+            else:
+                # Take over the counter of a least counted item
+                count = self._minimum
+                bucket = buckets[count]
+                victim = next(iter(bucket))
+                del counts[victim]
+                del bucket[victim]
+                if not bucket:
+                    del buckets[count]
+        else:
+            bucket = buckets[count]
+            del bucket[item]
+            if not bucket:
+                del buckets[count]
+        count += 1
+        counts[item] = count
+        bucket = buckets.get(count)
+        if bucket is None:
+            buckets[count] = {item: None}
+        else:
+            bucket[item] = None
+        if count - 1 == self._minimum and count - 1 not in buckets:
+            self._minimum = count
+
+    def discard(self, item):
+        """Stop counting item, e.g. once it can no longer occur."""
+        count = self._counts.pop(item, None)
+        if count is None:
+            return
+        self._move(item, count)
+        if count == self._minimum and count not in self._buckets:
+            self._minimum = min(self._buckets, default=0)
+
+    def items(self):
+        """Return (item, estimated count) pairs in no particular order."""
+        return self._counts.items()
+
+    def _move(self, item, count):
+        # Take item out of the bucket for count, dropping the bucket if empty
+        bucket = self._buckets[count]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[count]
+
+
+class CirculationStats:
+    """
+    Library-wide figures kept up to date incrementally.
+
+    Catalog figures (titles, copies and borrow counts) and member figures
+    (members at the borrowing limit) are cleared separately, with books
+    and members. The catalog totals can be marked stale after switching
+    to a different catalog, in which case they are rebuilt when read.
+    Borrow counts only cover borrows made since the process started.
+    Every method is thread-safe and every update is O(1).
+
+    Args:
+        top_capacity (int): Counters kept by the popular titles sketch
+    """
+
+    def __init__(self, top_capacity=DEFAULT_TOP_CAPACITY):
+        self._lock = threading.Lock()
+        self._top = SpaceSaving(top_capacity)
+        self.clear_catalog()
+        self.clear_members()
+
+    def clear_catalog(self):
+        """Reset the catalog figures."""
+        self.titles = 0
+        self.total_copies = 0
+        self.available_copies = 0
+        self.total_borrows = 0
+        self._borrow_counts = {}    # ISBN -> times borrowed
+        self._top.clear()
+        self.stale = False
+
+    def clear_members(self):
+        """Reset the member figures."""
+        self._at_limit = set()
+
+    def invalidate(self):
+        """Mark the catalog totals stale, e.g. after switching to a different catalog."""
+        self.stale = True
+
+    def rebuild(self, catalog):
+        """
+        Recompute the catalog totals from every book in a catalog.
+
+        Args:
+            catalog (dict): Catalog of Book records keyed by ISBN
+        """
+        titles = total_copies = available_copies = 0
+        for book in catalog.values():
+            titles += 1
+            total_copies += book['total_copies']
+            available_copies += book['available_copies']
+        with self._lock:
+            self.titles = titles
+            self.total_copies = total_copies
+            self.available_copies = available_copies
+            self.stale = False
+
+    def book_added(self, book):
+        """Count a newly added book."""
+        with self._lock:
+            self.titles += 1
+            self.total_copies += book['total_copies']
+            self.available_copies += book['available_copies']
+
+    def book_removed(self, isbn, book):
+        """Stop counting a deleted book."""
+        with self._lock:
+            self.titles -= 1
+            self.total_copies -= book['total_copies']
+            self.available_copies -= book['available_copies']
+            self._borrow_counts.pop(isbn, None)
+            self._top.discard(isbn)
+
+    def copies_changed(self, total_change, available_change):
+        """Adjust the copy totals after a book's copies were changed."""
+        with self._lock:
+            self.total_copies += total_change
+            self.available_copies += available_change
+
+    def borrowed(self, isbn, member_id=None, loans=0):
+        """
+        Count a borrowed copy of a book.
+
+        Args:
+            isbn (str): ISBN of the book
+            member_id (str): Borrowing member, if tracked here
+            loans (int): Books the member has borrowed, including this one
+        """
+        with self._lock:
+            self.available_copies -= 1
+            self.total_borrows += 1
+            self._borrow_counts[isbn] = self._borrow_counts.get(isbn, 0) + 1
+            self._top.add(isbn)
+            if loans >= MAX_BORROWED:
+                self._at_limit.add(member_id)
+
+    def returned(self, isbn, member_id=None):
+        """
+        Count a returned copy of a book.
+
+        Args:
+            isbn (str): ISBN of the book
+            member_id (str): Returning member, if tracked here
+        """
+        with self._lock:
+            self.available_copies += 1
+            self._at_limit.discard(member_id)
+
+    def loans_changed(self, member_id, loans):
+        """Record how many books a member now has borrowed."""
+        with self._lock:
+            if loans >= MAX_BORROWED:
+                self._at_limit.add(member_id)
+            else:
+                self._at_limit.discard(member_id)
+
+    def member_removed(self, member_id):
+        """Stop tracking a deleted member."""
+        with self._lock:
+            self._at_limit.discard(member_id)
+
+    def borrow_count(self, isbn):
+        """Return how many times a book was borrowed."""
+        return self._borrow_counts.get(isbn, 0)
+
+    def most_borrowed(self, count=10):
+        """
+        The most borrowed books.
+
+        The sketch picks the candidates and their exact borrow counts
+        rank them, so only the sketch's counters are sorted.
+
+        Args:
+            count (int): Maximum number of books
+
+        Returns:
+            list: (isbn, times borrowed) pairs, most borrowed first
+        """
+        with self._lock:
+            ranked = [(isbn, self._borrow_counts[isbn]) for isbn, _ in self._top.items()]
+        ranked.sort(key=lambda pair: -pair[1])
+        return ranked[:count]
+
+    def members_at_limit(self):
+        """Return the IDs of members who have borrowed MAX_BORROWED books."""
+        with self._lock:
+            return set(self._at_limit)
+
+    def snapshot(self):
+        """
+        Return every total.
+
+        Returns:
+            dict: titles, total_copies, available_copies, copies_out,
+                total_borrows and members_at_limit
+        """
+        with self._lock:
+            return {
+                'titles': self.titles,
+                'total_copies': self.total_copies,
+                'available_copies': self.available_copies,
+                'copies_out': self.total_copies - self.available_copies,
+                'total_borrows': self.total_borrows,
+                'members_at_limit': len(self._at_limit),
+            }
@@ -0,0 +1,284 @@
+"""
+Columnar catalog store for the Mini Library Management System.
+Keeps the genre code and copy counts of every book in NumPy arrays,
+kept in sync with operations.py through an observer, so reports such as
+copies by genre or books with no available copies run as vectorized
+array operations instead of Python loops over the books dictionary.
+
+NumPy is optional; the rest of the system does not need it.
+
+Usage:
+    store = ColumnarCatalog()      # loads operations.books and follows it
+    store.copies_by_genre()
+"""
+
+import threading
+
+import operations
+from records import GENRE_CODES, GENRES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Rows allocated when a store is created
+INITIAL_CAPACITY = 1024
+
+
+class ColumnarCatalog:
+    """
+    Column arrays mirroring operations.books.
+
+    Each book occupies one row: its ISBN, title and author are kept in
+    lists and its genre code, total copies and available copies in NumPy
+    arrays. Deleted books leave a dead row until the arrays are compacted.
+
+    The store registers itself as an operations observer, so every
+    successful add, update, delete, borrow and return is applied to it.
+    Once the catalog is cleared or replaced, e.g. while LibraryStore
+    recovers a snapshot, the columns are rebuilt by the next query.
+    Call close() to stop following the catalog. Changes and queries hold
+    the store's lock, as the arrays are written, grown and compacted in
+    place.
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+
+    def __init__(self):
+        if np is None:
+            raise ImportError("ColumnarCatalog requires NumPy. Install it with: pip install numpy")
+        self._lock = threading.RLock()
+        self._catalog = None
+        self._stale = False
+        self.reload()
+        operations.add_observer(self._apply)
+
+    def close(self):
+        """Stop following changes to the catalog."""
+        operations.remove_observer(self._apply)
+
+    def reload(self):
+        """Rebuild every column from the current operations.books."""
+        with self._lock:
+            self._reload()
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return self._size - self._dead
+
+    def _reload(self):
+        catalog = operations.books
+        if catalog is not self._catalog:
+            catalog.add_clear_hook(self._on_clear)
+            self._catalog = catalog
+        self._stale = False
+        count = len(catalog)
+        capacity = max(INITIAL_CAPACITY, count)
+        self._isbns = list(catalog)
+        self._titles = [book['title'] for book in catalog.values()]
+        self._authors = [book['author'] for book in catalog.values()]
+        self._rows = {isbn: row for row, isbn in enumerate(self._isbns)}
+        self._genre = np.zeros(capacity, dtype=np.int8)
+        self._total = np.zeros(capacity, dtype=np.int32)
+        self._available = np.zeros(capacity, dtype=np.int32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._genre[:count] = [GENRE_CODES[book['genre']] for book in catalog.values()]
+        self._total[:count] = [book['total_copies'] for book in catalog.values()]
+        self._available[:count] = [book['available_copies'] for book in catalog.values()]
+        self._alive[:count] = True
+        self._size = count
+        self._dead = 0
+
+    # Keeping in sync
+
+    def _on_clear(self):
+        self._stale = True
+
+    def _refresh(self):
+        # Reload if the catalog was cleared or replaced
+        if self._stale or operations.books is not self._catalog:
+            self._reload()
+
+    def _apply(self, operation, args, kwargs):
+        # Observer: copy the current state of the changed book into its row
+        if operation in ("borrow_book", "return_book"):
+            isbn = args[1]
+        elif operation in ("add_book", "update_book", "delete_book"):
+            isbn = args[0]
+        else:
+            return
+        with self._lock:
+            # After a clear, e.g. by snapshot recovery, the next query reloads
+            # every column, so changes until then are not applied one by one
+            if not self._stale and operations.books is self._catalog:
+                self._apply_change(operation, isbn)
+
+    def _apply_change(self, operation, isbn):
+        row = self._rows.get(isbn)
+        if operation == "delete_book":
+            self._alive[row] = False
+            del self._rows[isbn]
+            self._dead += 1
+            if self._dead > self._size // 2:
+                self._compact()
+            return
+
+        book = operations.books[isbn]
+        if row is None:
+            row = self._append(isbn)
+        if operation == "update_book":
+            self._titles[row] = book['title']
+            self._authors[row] = book['author']
+            self._genre[row] = GENRE_CODES[book['genre']]
+            self._total[row] = book['total_copies']
+        self._available[row] = book['available_copies']
+
+    def _append(self, isbn):
+        book = operations.books[isbn]
+        if self._size == len(self._alive):
+            self._grow()
+        row = self._size
+        self._size += 1
+        self._rows[isbn] = row
+        self._isbns.append(isbn)
+        self._titles.append(book['title'])
+        self._authors.append(book['author'])
+        self._genre[row] = GENRE_CODES[book['genre']]
+        self._total[row] = book['total_copies']
+        self._alive[row] = True
+        return row
+
+    def _grow(self):
+        # Double the capacity of every array
+        capacity = 2 * len(self._alive)
+        for name in ('_genre', '_total', '_available', '_alive'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _compact(self):
+        # Drop dead rows, keeping the remaining books in catalog order
+        keep = np.flatnonzero(self._alive[:self._size])
+        self._isbns = [self._isbns[row] for row in keep]
+        self._titles = [self._titles[row] for row in keep]
+        self._authors = [self._authors[row] for row in keep]
+        self._rows = {isbn: row for row, isbn in enumerate(self._isbns)}
+        count = len(keep)
+        for name in ('_genre', '_total', '_available', '_alive'):
+            column = getattr(self, name)
+            column[:count] = column[keep]
+            column[count:] = 0
+        self._size = count
+        self._dead = 0
+
+    # Queries
+
+    def _live(self):
+        # Column views over the rows in use, and the mask of live rows;
+        # only valid while the lock is held
+        self._refresh()
+        size = self._size
+        return self._genre[:size], self._total[:size], self._available[:size], self._alive[:size]
+
+    def copies_by_genre(self):
+        """
+        Total and available copies in every genre.
+
+        Returns:
+            dict: genre -> (total copies, available copies)
+        """
+        with self._lock:
+            genre, total, available, alive = self._live()
+            totals = np.bincount(genre[alive], weights=total[alive], minlength=len(GENRES))
+            availables = np.bincount(genre[alive], weights=available[alive], minlength=len(GENRES))
+        return {name: (int(totals[code]), int(availables[code])) for code, name in enumerate(GENRES)}
+
+    def utilization(self):
+        """
+        Share of all copies currently on loan.
+
+        Returns:
+            float: Borrowed copies divided by total copies, 0.0 for an empty catalog
+        """
+        with self._lock:
+            _, total, available, alive = self._live()
+            copies = int(total[alive].sum())
+            on_shelf = int(available[alive].sum())
+        return 0.0 if copies == 0 else 1 - on_shelf / copies
+
+    def utilization_by_genre(self):
+        """
+        Share of copies on loan in every genre.
+
+        Returns:
+            dict: genre -> borrowed copies divided by total copies
+        """
+        return {genre: 0.0 if total == 0 else 1 - available / total
+                for genre, (total, available) in self.copies_by_genre().items()}
+
+    def filter(self, genre=None, max_available=None, min_utilization=None):
+        """
+        Find books matching every given condition.
+
+        Args:
+            genre (str): Genre the book must be in
+            max_available (int): Maximum number of available copies, e.g. 0
+                for books with no copies left
+            min_utilization (float): Minimum share of the book's copies on loan
+
+        Returns:
+            list: Matching ISBNs in catalog order
+        """
+        with self._lock:
+            genre_column, total, available, mask = self._live()
+            mask = mask.copy()
+            if genre is not None:
+                mask &= genre_column == GENRE_CODES[genre]
+            if max_available is not None:
+                mask &= available <= max_available
+            if min_utilization is not None:
+                mask &= (total - available) >= min_utilization * total
+            isbns = self._isbns
+            return [isbns[row] for row in np.flatnonzero(mask)]
+
+
+# Dictionary path: the same reports computed with Python loops over
+# operations.books, for catalogs without a columnar store
+
+def copies_by_genre(books=None):
+    """
+    Total and available copies in every genre, computed from a catalog.
+
+    Args:
+        books (dict): Catalog to report on; defaults to operations.books
+
+    Returns:
+        dict: genre -> (total copies, available copies)
+    """
+    if books is None:
+        books = operations.books
+    totals = {genre: [0, 0] for genre in GENRES}
+    for book in books.values():
+        counts = totals[book['genre']]
+        counts[0] += book['total_copies']
+        counts[1] += book['available_copies']
+    return {genre: tuple(counts) for genre, counts in totals.items()}
+
+
+def unavailable_books(books=None):
+    """
+    ISBNs of the books with no copies available, computed from a catalog.
+
+    Args:
+        books (dict): Catalog to report on; defaults to operations.books
+
+    Returns:
+        list: Matching ISBNs in catalog order
+    """
+    if books is None:
+        books = operations.books
+    return [isbn for isbn, book in books.items() if book['available_copies'] <= 0]
@@ -16,6 +16,9 @@ def demo():
     books.clear()
     members.clear()
     
+    # Print a message for every operation result
+    set_reporter(PrintReporter())
+    
     print("\n1. ADDING BOOKS")
     print("-" * 20)
     add_book("0001", "The Great Gatsby", "F. Scott Fitzgerald", "Fiction", 3)
@@ -0,0 +1,483 @@
+"""
+Change feed for the Mini Library Management System.
+Every successful mutation is published as a typed event to a bounded
+in-memory ring buffer. Subscribers read the events from their own
+cursors instead of polling and diffing books and members, and a file
+sink can append them in batches to a local file for other processes.
+Publishing never waits, as operations publish while holding their locks.
+
+Usage:
+    feed = EventFeed()
+    subscription = feed.subscribe()
+    borrow_book("M001", "978-1234567890")
+    for event in subscription.poll():
+        print(event.type.name, event.args)      # BOOK_BORROWED ('M001', ...)
+    feed.close()
+"""
+
+import struct
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+
+import operations
+from storage import MICROSECONDS, decode_values, encode_values, frame, read_frames
+
+# Events kept in the ring buffer
+DEFAULT_CAPACITY = 65536
+
+# Seconds events queued behind a full ring wait for it to be read before
+# the subscribers that are behind are skipped ahead
+DEFAULT_PUBLISH_TIMEOUT = 5.0
+
+# Events returned by one poll, and written by a file sink at a time
+DEFAULT_BATCH_SIZE = 1024
+
+# Event header: sequence number, timestamp in microseconds, event type
+EVENT_HEADER = struct.Struct("<QqB")
+
+
+class EventType(IntEnum):
+    """Kinds of library mutation."""
+    BOOK_ADDED = 1
+    MEMBER_ADDED = 2
+    BOOK_UPDATED = 3
+    MEMBER_UPDATED = 4
+    BOOK_DELETED = 5
+    MEMBER_DELETED = 6
+    BOOK_BORROWED = 7
+    BOOK_RETURNED = 8
+    HOLD_PLACED = 9
+    HOLD_CANCELLED = 10
+
+
+# Event type published for every mutating operation
+EVENT_TYPES = {
+    'add_book': EventType.BOOK_ADDED,
+    'add_member': EventType.MEMBER_ADDED,
+    'update_book': EventType.BOOK_UPDATED,
+    'update_member': EventType.MEMBER_UPDATED,
+    'delete_book': EventType.BOOK_DELETED,
+    'delete_member': EventType.MEMBER_DELETED,
+    'borrow_book': EventType.BOOK_BORROWED,
+    'return_book': EventType.BOOK_RETURNED,
+    'place_hold': EventType.HOLD_PLACED,
+    'cancel_hold': EventType.HOLD_CANCELLED,
+}
+
+
+class Event:
+    """
+    A published mutation.
+
+    Attributes:
+        sequence (int): Position in the feed, starting at 0
+        timestamp (float): Publication time, in seconds since the epoch
+        type (EventType): Kind of mutation
+        args (tuple): Positional arguments of the operation, e.g. (member_id, isbn)
+        kwargs (dict): Changed fields of an update, otherwise empty
+    """
+
+    __slots__ = ('sequence', 'timestamp', 'type', 'args', 'kwargs')
+
+    def __init__(self, sequence, timestamp, type, args, kwargs):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.type = type
+        self.args = args
+        self.kwargs = kwargs
+
+    def __eq__(self, other):
+        return isinstance(other, Event) and all(getattr(self, field) == getattr(other, field)
+                                                for field in self.__slots__)
+
+    def __repr__(self):
+        return (f"Event(sequence={self.sequence!r}, timestamp={self.timestamp!r}, type={self.type.name}, "
+                f"args={self.args!r}, kwargs={self.kwargs!r})")
+
+
+def encode_event(event):
+    """
+    Encode an event as a fixed header followed by its arguments.
+
+    Timestamps are stored as whole microseconds.
+
+    Returns:
+        bytes: The encoded event
+    """
+    values = [len(event.args), *event.args]
+    for key, value in event.kwargs.items():
+        values.append(key)
+        values.append(value)
+    return (EVENT_HEADER.pack(event.sequence, round(event.timestamp * MICROSECONDS), event.type)
+            + encode_values(values))
+
+
+def decode_event(data):
+    """
+    Decode bytes produced by encode_event.
+
+    Returns:
+        Event: The decoded event
+    """
+    sequence, timestamp, event_type = EVENT_HEADER.unpack_from(data)
+    values = decode_values(data[EVENT_HEADER.size:])
+    arg_count = values[0]
+    rest = values[1 + arg_count:]
+    return Event(sequence, timestamp / MICROSECONDS, EventType(event_type),
+                 tuple(values[1:1 + arg_count]), dict(zip(rest[::2], rest[1::2])))
+
+
+def read_events(path):
+    """
+    Read the events written by a file sink, stopping at a torn batch.
+
+    Args:
+        path (str): File written by FileSink
+
+    Yields:
+        Event: Events in the order they were published
+    """
+    with open(path, "rb") as f:
+        for payload, _ in read_frames(f):
+            yield decode_event(payload)
+
+
+class Subscription:
+    """
+    A reader of the feed with its own cursor.
+
+    Once a subscription is a whole ring behind, newer events are queued
+    until it reads, so it never misses an event. Lossy subscriptions never
+    hold events back; events overwritten before they were read are
+    skipped and counted in lost. A subscription that still has not read
+    after the feed's publish timeout is treated as lossy until its next
+    poll.
+
+    Attributes:
+        cursor (int): Sequence number of the next event to read
+        lost (int): Events overwritten before this subscription read them
+    """
+
+    def __init__(self, feed, cursor, lossy):
+        self.cursor = cursor
+        self.lost = 0
+        self.lossy = lossy
+        self._feed = feed
+        self._stalled = False
+
+    @property
+    def lag(self):
+        """Events published but not read yet."""
+        return self._feed.published - self.cursor
+
+    def poll(self, max_events=DEFAULT_BATCH_SIZE, timeout=0.0):
+        """
+        Read the next events.
+
+        Args:
+            max_events (int): Maximum number of events to return
+            timeout (float): Seconds to wait for an event if none is waiting
+
+        Returns:
+            list: Events in publication order, empty if none arrived in time
+        """
+        return self._feed._read(self, max_events, timeout)
+
+    def close(self):
+        """Stop reading; the subscription no longer holds back events."""
+        self._feed.unsubscribe(self)
+
+
+class EventFeed:
+    """
+    Bounded ring buffer of library events.
+
+    Creating a feed registers it as an operations observer, so every
+    successful mutation is published until the feed is closed. Publishing
+    only stores a tuple in the ring; events are built when subscribers
+    read them and encoded only when a file sink writes them.
+
+    Operations publish while holding their locks, so publishing never
+    waits. When a subscription that is not lossy is a whole ring behind,
+    new events are queued and a writer thread moves them into the ring as
+    the subscription reads, skipping it ahead after publish_timeout.
+
+    Args:
+        capacity (int): Events kept in the ring buffer
+        publish_timeout (float): Seconds queued events wait for subscribers
+            to make room in a full ring
+        clock (callable): Returns the current time in seconds since the epoch
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, publish_timeout=DEFAULT_PUBLISH_TIMEOUT, clock=time.time):
+        self.capacity = capacity
+        self.publish_timeout = publish_timeout
+        self.clock = clock
+        self._ring = [None] * capacity
+        self._next = 0
+        # Events in the ring end at _written; later ones are queued in _pending
+        self._written = 0
+        self._pending = deque()
+        self._writer = None
+        # Oldest cursor of the subscriptions events wait for, as last computed
+        self._floor = 0
+        self._subscriptions = []
+        self._sinks = []
+        self._waiting = 0
+        self._closed = False
+        # Publishing takes the plain lock; waiting uses a condition on it
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        operations.add_observer(self.observe)
+
+    @property
+    def published(self):
+        """Number of events published so far."""
+        return self._next
+
+    def observe(self, operation, args, kwargs):
+        """Observer publishing every successful mutation."""
+        event_type = EVENT_TYPES.get(operation)
+        if event_type is not None:
+            self.publish(event_type, args, kwargs)
+
+    def publish(self, event_type, args, kwargs=None):
+        """
+        Add an event to the feed without waiting.
+
+        If the ring is full for a subscription that is not lossy, the event
+        is queued and written to the ring once there is room.
+
+        Args:
+            event_type (EventType): Kind of mutation
+            args (tuple): Arguments of the mutation
+            kwargs (dict): Changed fields, for updates
+
+        Returns:
+            int: Sequence number of the event
+        """
+        if kwargs is None:
+            kwargs = {}
+        with self._lock:
+            sequence = self._next
+            self._next = sequence + 1
+            record = (sequence, self.clock(), event_type, args, kwargs)
+            if not self._pending and self._has_room(sequence):
+                self._ring[sequence % self.capacity] = record
+                self._written = sequence + 1
+            else:
+                self._pending.append(record)
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_pending, name="event-feed-writer",
+                                                    daemon=True)
+                    self._writer.start()
+            if self._waiting:
+                self._condition.notify_all()
+        return sequence
+
+    def subscribe(self, from_oldest=False, lossy=False):
+        """
+        Start reading the feed.
+
+        Args:
+            from_oldest (bool): Start at the oldest event still in the ring
+                instead of the next event published
+            lossy (bool): Skip overwritten events instead of holding back publishers
+
+        Returns:
+            Subscription: The new subscription
+        """
+        with self._condition:
+            cursor = max(0, self._written - self.capacity) if from_oldest else self._next
+            subscription = Subscription(self, cursor, lossy)
+            self._subscriptions.append(subscription)
+            if not lossy:
+                self._floor = min(self._floor, cursor)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop a subscription, letting publishers waiting on it continue."""
+        with self._condition:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                self._condition.notify_all()
+
+    def add_file_sink(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=0.5):
+        """
+        Append every event published from now on to a file, in batches.
+
+        Args:
+            path (str): File to append to; read it back with read_events
+            batch_size (int): Maximum events written at a time
+            flush_interval (float): Seconds to wait for a batch to fill
+
+        Returns:
+            FileSink: The running sink, closed with the feed
+        """
+        sink = FileSink(self, path, batch_size, flush_interval)
+        self._sinks.append(sink)
+        return sink
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued event has been written to the ring.
+
+        Returns:
+            bool: True if no events are queued
+        """
+        with self._condition:
+            self._waiting += 1
+            self._condition.wait_for(lambda: not self._pending, timeout)
+            self._waiting -= 1
+            return not self._pending
+
+    def close(self):
+        """
+        Stop publishing, write out pending events to the sinks and close them.
+
+        Raises:
+            Exception: The first error that stopped a file sink
+        """
+        if self._closed:
+            return
+        self._closed = True
+        operations.remove_observer(self.observe)
+        self.flush()
+        sinks, self._sinks = self._sinks, []
+        errors = []
+        for sink in sinks:
+            try:
+                sink.close()
+            except Exception as error:
+                errors.append(error)
+        if errors:
+            raise errors[0]
+
+    def _has_room(self, sequence):
+        # True if every subscription that is not lossy is less than a full
+        # ring behind sequence; the floor is only recomputed when it may be
+        if sequence - self._floor < self.capacity:
+            return True
+        self._floor = min((subscription.cursor for subscription in self._subscriptions
+                           if not subscription.lossy and not subscription._stalled), default=sequence)
+        return sequence - self._floor < self.capacity
+
+    def _write_pending(self):
+        # Writer thread: move queued events into the ring as subscriptions
+        # make room, skipping the laggards ahead after the timeout
+        with self._condition:
+            while self._pending:
+                sequence = self._pending[0][0]
+                deadline = time.monotonic() + self.publish_timeout
+                while not self._has_room(sequence):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        for subscription in self._subscriptions:
+                            if not subscription.lossy and sequence - subscription.cursor >= self.capacity:
+                                subscription._stalled = True
+                        continue
+                    self._waiting += 1
+                    self._condition.wait(remaining)
+                    self._waiting -= 1
+                # Write every queued event that fits at once
+                while self._pending and self._has_room(self._pending[0][0]):
+                    record = self._pending.popleft()
+                    self._ring[record[0] % self.capacity] = record
+                    self._written = record[0] + 1
+                self._condition.notify_all()
+            self._writer = None
+
+    def _read(self, subscription, max_events, timeout):
+        with self._condition:
+            if timeout and subscription.cursor >= self._written:
+                self._waiting += 1
+                self._condition.wait_for(lambda: subscription.cursor < self._written, timeout)
+                self._waiting -= 1
+            # Skip events that were overwritten before they were read
+            oldest = max(0, self._written - self.capacity)
+            if subscription.cursor < oldest:
+                subscription.lost += oldest - subscription.cursor
+                subscription.cursor = oldest
+            end = min(self._written, subscription.cursor + max_events)
+            ring = self._ring
+            capacity = self.capacity
+            records = [ring[sequence % capacity] for sequence in range(subscription.cursor, end)]
+            subscription.cursor = end
+            if subscription._stalled:
+                subscription._stalled = False
+                # Events are held back for this subscription again
+                if not subscription.lossy:
+                    self._floor = min(self._floor, end)
+            # Publishers may be waiting for this subscription to catch up
+            if self._waiting:
+                self._condition.notify_all()
+        return [Event(*record) for record in records]
+
+
+class FileSink:
+    """
+    Background writer appending a feed's events to a file.
+
+    A thread reads the sink's own subscription and writes every batch of
+    events as framed records with one write call, so a torn final batch
+    is detected when the file is read back. If encoding or writing fails,
+    the sink stops, keeps the exception in error and closes its
+    subscription so it no longer holds events back.
+
+    Args:
+        feed (EventFeed): Feed to read
+        path (str): File to append to
+        batch_size (int): Maximum events written at a time
+        flush_interval (float): Seconds to wait for a batch to fill
+    """
+
+    def __init__(self, feed, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.error = None
+        self._subscription = feed.subscribe()
+        self._file = open(path, "ab")
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-file-sink", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                self._write(self._subscription.poll(self.batch_size, self.flush_interval))
+        except Exception as error:
+            self._fail(error)
+
+    def _fail(self, error):
+        self.error = error
+        self._subscription.close()
+
+    def _write(self, events):
+        if events:
+            self._file.write(b"".join(frame(encode_event(event)) for event in events))
+            self._file.flush()
+
+    def close(self):
+        """
+        Write the remaining events and close the file.
+
+        Raises:
+            Exception: The error that stopped the sink, if any
+        """
+        self._stopped.set()
+        self._thread.join()
+        try:
+            while self.error is None:
+                events = self._subscription.poll(self.batch_size)
+                if not events:
+                    break
+                self._write(events)
+        except Exception as error:
+            self._fail(error)
+        self._subscription.close()
+        self._file.close()
+        if self.error is not None:
+            raise self.error
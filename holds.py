@@ -0,0 +1,285 @@
+"""
+Hold queues for the Mini Library Management System.
+Members can queue for a book that has no copies available. Each ISBN has
+a first-come, first-served queue of member IDs, and every member's holds
+are indexed, so return_book can hand a returned copy to the next holder
+and a member's place in a queue is found without walking the queue.
+"""
+
+import threading
+from collections import deque
+
+
+class _Counts:
+    """
+    Counts over a growing sequence, with prefix sums in O(log n).
+
+    A Fenwick tree: tree[i] holds the sum of the i & -i values ending
+    with value i - 1.
+    """
+
+    __slots__ = ('tree',)
+
+    def __init__(self, values=()):
+        self.tree = [0]
+        for value in values:
+            self.append(value)
+
+    def append(self, value):
+        """Add a value to the end of the sequence."""
+        tree = self.tree
+        index = len(tree)
+        low = index - (index & -index)
+        index -= 1
+        while index > low:
+            value += tree[index]
+            index -= index & -index
+        tree.append(value)
+
+    def add(self, position, value):
+        """Add value to the value at position."""
+        tree = self.tree
+        index = position + 1
+        while index < len(tree):
+            tree[index] += value
+            index += index & -index
+
+    def prefix(self, count):
+        """Return the sum of the first count values."""
+        tree = self.tree
+        total = 0
+        while count > 0:
+            total += tree[count]
+            count -= count & -count
+        return total
+
+
+class _Queue:
+    """
+    Holds on one book, in the order they were placed.
+
+    Every hold gets the next ticket number, and holders lists the
+    (ticket, member ID) pairs in ticket order. A hold cancelled or filled
+    out of turn stays in holders until it reaches the front, but its
+    ticket is listed in dead and counted in cancelled. The front of the
+    queue is always a live hold, so every cancelled ticket from the front
+    on is in dead. holders is renumbered from 0 once most of it is dead
+    or most of its tickets have left the front.
+    """
+
+    __slots__ = ('holders', 'next_ticket', 'dead', 'cancelled')
+
+    def __init__(self):
+        self.holders = deque()
+        self.next_ticket = 0
+        self.dead = set()
+        self.cancelled = _Counts()
+
+    def renumber(self, isbn, by_member):
+        # Drop dead holds and give the live ones consecutive tickets again
+        holders = deque()
+        for ticket, member_id in self.holders:
+            if ticket not in self.dead:
+                by_member[member_id][isbn] = len(holders)
+                holders.append((len(holders), member_id))
+        self.holders = holders
+        self.next_ticket = len(holders)
+        self.dead = set()
+        self.cancelled = _Counts([0] * len(holders))
+
+
+class HoldQueues:
+    """
+    Members waiting for books, in the order they placed their holds.
+
+    Taking the next holder is O(1) unless members ahead of them have to
+    be passed over. A hold cancelled or filled out of turn is only marked
+    in its queue and dropped once it reaches the front or once most of
+    the queue has been cancelled, so cancelling is O(log n) amortized. A
+    member's position is their ticket minus the ticket at the front, so
+    it is found in O(1) while no hold behind the front is marked. Until
+    the marked holds are dropped, the position is corrected by a prefix
+    count of the cancelled tickets between them, in O(log n); keeping
+    every position exact in O(1) would mean renumbering the queue on each
+    such cancellation.
+    Placing a hold is O(log n). Every method is thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget every hold."""
+        self._queues = {}       # ISBN -> _Queue
+        self._by_member = {}    # member ID -> {ISBN: ticket}, in the order placed
+
+    def __contains__(self, isbn):
+        """True if any member is waiting for the book."""
+        return isbn in self._queues
+
+    def place(self, member_id, isbn):
+        """
+        Add a member to the end of a book's queue.
+
+        Args:
+            member_id (str): Member placing the hold
+            isbn (str): ISBN of the book
+
+        Returns:
+            int: Position in the queue, 1 for the next in line. A member
+                who already holds the book keeps their place.
+        """
+        with self._lock:
+            held = self._by_member.setdefault(member_id, {})
+            if isbn not in held:
+                queue = self._queues.get(isbn)
+                if queue is None:
+                    queue = self._queues[isbn] = _Queue()
+                ticket = held[isbn] = queue.next_ticket
+                queue.next_ticket += 1
+                queue.holders.append((ticket, member_id))
+                queue.cancelled.append(0)
+            return self._position(isbn, held[isbn])
+
+    def cancel(self, member_id, isbn):
+        """
+        Remove a member's hold on a book, e.g. once it is filled.
+
+        Returns:
+            bool: True if the member held the book
+        """
+        with self._lock:
+            held = self._by_member.get(member_id)
+            if held is None or isbn not in held:
+                return False
+            self._remove(member_id, isbn, held)
+            return True
+
+    def position(self, member_id, isbn):
+        """
+        Return a member's position in a book's queue.
+
+        Returns:
+            int: 1 for the next in line, or None if the member has no hold on the book
+        """
+        with self._lock:
+            ticket = self._by_member.get(member_id, {}).get(isbn)
+            return None if ticket is None else self._position(isbn, ticket)
+
+    def waiting(self, isbn):
+        """Return the number of members waiting for a book."""
+        with self._lock:
+            queue = self._queues.get(isbn)
+            return 0 if queue is None else len(queue.holders) - len(queue.dead)
+
+    def holds_of(self, member_id):
+        """
+        Books a member is waiting for.
+
+        Returns:
+            list: ISBNs in the order the holds were placed
+        """
+        with self._lock:
+            return list(self._by_member.get(member_id, ()))
+
+    def next_holder(self, isbn, eligible):
+        """
+        Find the first member in a book's queue who can take a copy.
+
+        Members who cannot take a copy now, e.g. because they are at the
+        borrowing limit, are passed over but keep their place.
+
+        Args:
+            isbn (str): ISBN of the book
+            eligible (callable): Called as eligible(member_id, isbn)
+
+        Returns:
+            str: Member ID of the holder, or None
+        """
+        holders = self.next_holders(isbn, eligible, 1)
+        return holders[0] if holders else None
+
+    def next_holders(self, isbn, eligible, count):
+        """
+        Find the first members in a book's queue who can take a copy.
+
+        Args:
+            isbn (str): ISBN of the book
+            eligible (callable): Called as eligible(member_id, isbn)
+            count (int): Maximum number of holders
+
+        Returns:
+            list: Member IDs of up to count holders, in queue order
+        """
+        found = []
+        with self._lock:
+            queue = self._queues.get(isbn)
+            if queue is not None and count > 0:
+                dead = queue.dead
+                for ticket, member_id in queue.holders:
+                    if ticket not in dead and eligible(member_id, isbn):
+                        found.append(member_id)
+                        if len(found) == count:
+                            break
+        return found
+
+    def remove_member(self, member_id):
+        """Cancel every hold of a member, e.g. when the member is deleted."""
+        with self._lock:
+            held = self._by_member.get(member_id)
+            while held:
+                self._remove(member_id, next(iter(held)), held)
+
+    def remove_book(self, isbn):
+        """Cancel every hold on a book, e.g. when the book is deleted."""
+        with self._lock:
+            queue = self._queues.pop(isbn, None)
+            if queue is None:
+                return
+            for ticket, member_id in queue.holders:
+                if ticket not in queue.dead:
+                    held = self._by_member[member_id]
+                    del held[isbn]
+                    if not held:
+                        del self._by_member[member_id]
+
+    def queues(self):
+        """
+        Every queue, e.g. for a snapshot.
+
+        Returns:
+            list: (isbn, member IDs in queue order) pairs
+        """
+        with self._lock:
+            return [(isbn, [member_id for ticket, member_id in queue.holders if ticket not in queue.dead])
+                    for isbn, queue in self._queues.items()]
+
+    def _position(self, isbn, ticket):
+        queue = self._queues[isbn]
+        front = queue.holders[0][0]
+        if not queue.dead:
+            return ticket - front + 1
+        cancelled = queue.cancelled.prefix(ticket) - queue.cancelled.prefix(front)
+        return ticket - front - cancelled + 1
+
+    def _remove(self, member_id, isbn, held):
+        ticket = held.pop(isbn)
+        if not held:
+            del self._by_member[member_id]
+        queue = self._queues[isbn]
+        holders = queue.holders
+        if ticket != holders[0][0]:
+            queue.dead.add(ticket)
+            queue.cancelled.add(ticket, 1)
+            if len(queue.dead) > len(holders) // 2:
+                queue.renumber(isbn, self._by_member)
+            return
+        # Drop the front hold and the cancelled holds queued right behind it
+        holders.popleft()
+        while holders and holders[0][0] in queue.dead:
+            queue.dead.discard(holders.popleft()[0])
+        if not holders:
+            del self._queues[isbn]
+        elif holders[0][0] > len(holders):
+            queue.renumber(isbn, self._by_member)
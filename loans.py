@@ -0,0 +1,228 @@
+"""
+Loan ledger for the Mini Library Management System.
+Records when every outstanding loan was checked out and when it is due.
+Loans are indexed by member and by ISBN, and a min-heap keyed on the due
+date answers "which loans are due next" and "which loans are overdue"
+by visiting only the loans returned instead of scanning every member.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+# Default loan period
+DEFAULT_LOAN_DAYS = 14
+
+SECONDS_PER_DAY = 86400
+
+
+def _discard(index, key, item):
+    """Remove item from the tuple stored under key, dropping empty tuples."""
+    items = index[key]
+    if len(items) == 1:
+        del index[key]
+    else:
+        index[key] = tuple([other for other in items if other != item])
+
+
+class Loan:
+    """
+    An outstanding loan.
+
+    Attributes:
+        member_id (str): Member who borrowed the book
+        isbn (str): ISBN of the borrowed book
+        checked_out (float): Checkout time, in seconds since the epoch
+        due (float): Due time, in seconds since the epoch
+    """
+
+    __slots__ = ('member_id', 'isbn', 'checked_out', 'due')
+
+    def __init__(self, member_id, isbn, checked_out, due):
+        self.member_id = member_id
+        self.isbn = isbn
+        self.checked_out = checked_out
+        self.due = due
+
+    def is_overdue(self, as_of):
+        """True if the loan was due before as_of."""
+        return self.due < as_of
+
+    def __repr__(self):
+        return (f"Loan(member_id={self.member_id!r}, isbn={self.isbn!r}, "
+                f"checked_out={self.checked_out!r}, due={self.due!r})")
+
+
+class LoanLedger:
+    """
+    Outstanding loans indexed by member, by ISBN and by due date.
+
+    Loans are kept as tuples of strings and numbers rather than objects,
+    so a ledger with millions of loans adds little garbage collector work
+    to every checkout. Loan records are built when loans are read.
+
+    Returned loans are not removed from the due-date heap right away;
+    they are skipped when the heap is read and dropped once they make up
+    half of it. Every method is thread-safe.
+
+    Args:
+        loan_days (float): Days from checkout until a loan is due
+        clock (callable): Returns the current time in seconds since the epoch
+    """
+
+    def __init__(self, loan_days=DEFAULT_LOAN_DAYS, clock=time.time):
+        self.loan_days = loan_days
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget every loan."""
+        self._open = {}         # (member ID, ISBN) -> (checked out, due, sequence)
+        self._by_member = {}    # member ID -> ISBNs, in checkout order
+        self._by_isbn = {}      # ISBN -> member IDs, in checkout order
+        self._due = []          # heap of (due, sequence, member ID, ISBN)
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._open)
+
+    def checkout(self, member_id, isbn, checked_out=None, due=None):
+        """
+        Record a new loan.
+
+        Args:
+            member_id (str): Member borrowing the book
+            isbn (str): ISBN of the book
+            checked_out (float): Checkout time; defaults to now
+            due (float): Due time; defaults to loan_days after checkout
+        """
+        if checked_out is None:
+            checked_out = self.clock()
+        if due is None:
+            due = checked_out + self.loan_days * SECONDS_PER_DAY
+        with self._lock:
+            self._add(member_id, isbn, checked_out, due)
+
+    def checkout_many(self, member_id, isbns):
+        """
+        Record loans of several books to one member, all checked out now.
+
+        Args:
+            member_id (str): Member borrowing the books
+            isbns (list): ISBNs of the books
+        """
+        checked_out = self.clock()
+        due = checked_out + self.loan_days * SECONDS_PER_DAY
+        with self._lock:
+            for isbn in isbns:
+                self._add(member_id, isbn, checked_out, due)
+
+    def checkin(self, member_id, isbn):
+        """
+        Close a loan.
+
+        Args:
+            member_id (str): Member returning the book
+            isbn (str): ISBN of the book
+
+        Returns:
+            bool: True if the loan was open
+        """
+        with self._lock:
+            if self._open.pop((member_id, isbn), None) is None:
+                return False
+            _discard(self._by_member, member_id, isbn)
+            _discard(self._by_isbn, isbn, member_id)
+            # Drop returned loans from the heap once they are half of it
+            if len(self._due) > 2 * len(self._open) + 64:
+                self._due = [entry for entry in self._due if self._is_open(entry)]
+                heapq.heapify(self._due)
+            return True
+
+    def get(self, member_id, isbn):
+        """Return the open loan of a book to a member, or None."""
+        times = self._open.get((member_id, isbn))
+        return None if times is None else Loan(member_id, isbn, times[0], times[1])
+
+    def loans_of(self, member_id):
+        """
+        Open loans of a member.
+
+        Returns:
+            list: Loans in checkout order
+        """
+        with self._lock:
+            return [self.get(member_id, isbn) for isbn in self._by_member.get(member_id, ())]
+
+    def borrowers_of(self, isbn):
+        """
+        Members who currently have a copy of a book.
+
+        Returns:
+            list: Member IDs in checkout order
+        """
+        return list(self._by_isbn.get(isbn, ()))
+
+    def next_due(self, count):
+        """
+        The open loans with the earliest due dates.
+
+        Args:
+            count (int): Maximum number of loans
+
+        Returns:
+            list: Loans, earliest due first
+        """
+        with self._lock:
+            return list(itertools.islice(self._in_due_order(), count))
+
+    def overdue(self, as_of=None, limit=None):
+        """
+        Open loans that were due before a given time.
+
+        Args:
+            as_of (float): Time to compare due dates with; defaults to now
+            limit (int): Maximum number of loans, or None for all of them
+
+        Returns:
+            list: Loans, most overdue first
+        """
+        if as_of is None:
+            as_of = self.clock()
+        with self._lock:
+            loans = itertools.takewhile(lambda loan: loan.due < as_of, self._in_due_order())
+            return list(itertools.islice(loans, limit))
+
+    def _add(self, member_id, isbn, checked_out, due):
+        key = (member_id, isbn)
+        sequence = self._sequence = self._sequence + 1
+        if key not in self._open:
+            by_member = self._by_member
+            by_isbn = self._by_isbn
+            by_member[member_id] = by_member[member_id] + (isbn,) if member_id in by_member else (isbn,)
+            by_isbn[isbn] = by_isbn[isbn] + (member_id,) if isbn in by_isbn else (member_id,)
+        self._open[key] = (checked_out, due, sequence)
+        heapq.heappush(self._due, (due, sequence, member_id, isbn))
+
+    def _is_open(self, entry):
+        # A heap entry is current if its loan is open and was not replaced
+        times = self._open.get((entry[2], entry[3]))
+        return times is not None and times[2] == entry[1]
+
+    def _in_due_order(self):
+        # Walk the heap in due order without popping it: a second heap
+        # holds the frontier of heap positions still to visit, so reading
+        # k loans costs O(k log k) whatever the size of the ledger
+        heap = self._due
+        if not heap:
+            return
+        frontier = [(heap[0], 0)]
+        while frontier:
+            entry, position = heapq.heappop(frontier)
+            if self._is_open(entry):
+                yield self.get(entry[2], entry[3])
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
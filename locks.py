@@ -0,0 +1,69 @@
+"""
+Fine-grained locking for the Mini Library Management System.
+Members and books are each guarded by a fixed array of striped locks,
+so operations on different members and books run concurrently while
+operations on the same member or book are serialized.
+"""
+
+import threading
+from contextlib import contextmanager
+
+# Number of locks in each stripe array
+DEFAULT_STRIPES = 64
+
+
+class StripedLocks:
+    """
+    Lock striping for members and books.
+
+    Every member ID and ISBN maps to one lock in its stripe array. Locks
+    are always acquired in one global order - member stripes before book
+    stripes, each in ascending stripe number - so two operations can
+    never wait on each other in a cycle.
+    """
+
+    def __init__(self, stripes=DEFAULT_STRIPES):
+        self.stripes = stripes
+        self._member_locks = [threading.Lock() for _ in range(stripes)]
+        self._book_locks = [threading.Lock() for _ in range(stripes)]
+
+    def member_lock(self, member_id):
+        """Return the lock guarding a member."""
+        return self._member_locks[hash(member_id) % self.stripes]
+
+    def book_lock(self, isbn):
+        """Return the lock guarding a book."""
+        return self._book_locks[hash(isbn) % self.stripes]
+
+    @contextmanager
+    def hold(self, member_ids=(), isbns=()):
+        """
+        Hold the locks for some members and books for the duration of a block.
+
+        Args:
+            member_ids (iterable): Member IDs to lock
+            isbns (iterable): ISBNs to lock
+        """
+        stripes = self.stripes
+        # Several keys can share a stripe, so each lock is taken only once
+        locks = [self._member_locks[n] for n in sorted({hash(m) % stripes for m in member_ids})]
+        locks += [self._book_locks[n] for n in sorted({hash(i) % stripes for i in isbns})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    @contextmanager
+    def hold_all(self):
+        """Hold every member and book lock, in order, for the duration of a block."""
+        locks = self._member_locks + self._book_locks
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
@@ -0,0 +1,182 @@
+"""
+Opt-in instrumentation for the Mini Library Management System.
+Operations wrapped with @instrumented count their calls, time them into
+latency histograms and count failures by Status once metrics are
+enabled. While metrics are disabled the wrapper only checks one global.
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+from results import Status
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001,
+                   0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.1, 1.0, float("inf"))
+
+# Metrics being recorded, or None while instrumentation is disabled
+_active = None
+
+
+class Metrics:
+    """
+    Call counters, latency histograms and error counts per operation.
+
+    Error counts are keyed by the Status value an operation returned,
+    e.g. "borrow_limit" or "book_not_found"; exceptions are counted
+    under "exception".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._errors = {}
+        self._latency_sum = {}
+        self._buckets = {}
+
+    def record(self, operation, result, seconds):
+        """
+        Record one call of an operation.
+
+        Args:
+            operation (str): Operation name
+            result: Value the operation returned, or the exception it raised
+            seconds (float): How long the call took
+        """
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self._calls[operation] = self._calls.get(operation, 0) + 1
+            self._latency_sum[operation] = self._latency_sum.get(operation, 0.0) + seconds
+            buckets = self._buckets.get(operation)
+            if buckets is None:
+                buckets = self._buckets[operation] = [0] * len(LATENCY_BUCKETS)
+            buckets[bucket] += 1
+            if isinstance(result, Status) and result is not Status.OK:
+                key = (operation, result.value)
+            elif isinstance(result, Exception):
+                key = (operation, "exception")
+            else:
+                return
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def snapshot(self, gauges=None):
+        """
+        Return every metric as plain data.
+
+        Args:
+            gauges (dict): Current gauge values to include, by name
+
+        Returns:
+            dict: operations (calls, errors by reason, latency sum and
+                cumulative histogram per operation) and gauges
+        """
+        with self._lock:
+            operations = {}
+            for operation, calls in self._calls.items():
+                cumulative = []
+                total = 0
+                for count in self._buckets[operation]:
+                    total += count
+                    cumulative.append(total)
+                operations[operation] = {
+                    'calls': calls,
+                    'errors': {reason: count for (name, reason), count in self._errors.items()
+                               if name == operation},
+                    'latency_seconds_sum': self._latency_sum[operation],
+                    'latency_buckets': dict(zip(LATENCY_BUCKETS, cumulative)),
+                }
+        return {'operations': operations, 'gauges': dict(gauges or {})}
+
+    def to_prometheus(self, gauges=None):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Args:
+            gauges (dict): Current gauge values to include, by name
+
+        Returns:
+            str: The metrics text
+        """
+        snapshot = self.snapshot(gauges)
+        lines = [
+            "# HELP library_operation_calls_total Calls of each library operation.",
+            "# TYPE library_operation_calls_total counter",
+        ]
+        for operation, data in snapshot['operations'].items():
+            lines.append(f'library_operation_calls_total{{operation="{operation}"}} {data["calls"]}')
+
+        lines.append("# HELP library_operation_errors_total Failed calls by reason.")
+        lines.append("# TYPE library_operation_errors_total counter")
+        for operation, data in snapshot['operations'].items():
+            for reason, count in data['errors'].items():
+                lines.append(f'library_operation_errors_total{{operation="{operation}",reason="{reason}"}} {count}')
+
+        lines.append("# HELP library_operation_latency_seconds Latency of each library operation.")
+        lines.append("# TYPE library_operation_latency_seconds histogram")
+        for operation, data in snapshot['operations'].items():
+            for bound, count in data['latency_buckets'].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'library_operation_latency_seconds_bucket{{operation="{operation}",le="{le}"}} {count}')
+            lines.append(f'library_operation_latency_seconds_sum{{operation="{operation}"}} '
+                         f'{data["latency_seconds_sum"]!r}')
+            lines.append(f'library_operation_latency_seconds_count{{operation="{operation}"}} {data["calls"]}')
+
+        for name, value in snapshot['gauges'].items():
+            lines.append(f"# TYPE library_{name} gauge")
+            lines.append(f"library_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def instrumented(func):
+    """
+    Decorator that records calls of an operation while metrics are enabled.
+
+    Args:
+        func (callable): Operation to wrap; its name labels the metrics
+
+    Returns:
+        callable: The wrapped operation
+    """
+    operation = func.__name__
+    clock = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics = _active
+        if metrics is None:
+            return func(*args, **kwargs)
+        start = clock()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            metrics.record(operation, error, clock() - start)
+            raise
+        metrics.record(operation, result, clock() - start)
+        return result
+
+    return wrapper
+
+
+def enable():
+    """
+    Start recording metrics into a fresh Metrics object.
+
+    Returns:
+        Metrics: The metrics being recorded
+    """
+    global _active
+    _active = Metrics()
+    return _active
+
+
+def disable():
+    """Stop recording metrics."""
+    global _active
+    _active = None
+
+
+def active():
+    """Return the metrics being recorded, or None while disabled."""
+    return _active
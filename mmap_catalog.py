@@ -0,0 +1,404 @@
+"""
+Memory-mapped read-only catalog snapshots for the Mini Library Management System.
+The catalog is exported to a fixed-layout binary file that worker
+processes open with mmap, so every worker shares the same pages of the
+operating system's page cache instead of building its own books dictionary.
+Changes made in a process are kept in a small in-memory overlay on top.
+
+Usage:
+    export_catalog("catalog.bin")           # once, from the loaded library
+    open_catalog("catalog.bin")             # in every worker
+"""
+
+import mmap
+import struct
+from bisect import bisect_right
+from collections.abc import MutableMapping
+
+import operations
+from records import GENRES, Book
+from search_index import SEARCH_FIELDS, tokenize
+
+MAGIC = b"MLCAT001"
+
+# Header: magic, record count, then the offsets of each section
+HEADER = struct.Struct("<8sIIIIIIII")
+
+# Record: isbn, title and author as (offset, length) into the string heap,
+# genre code, total copies, available copies
+RECORD = struct.Struct("<IIIIIIB3xII")
+
+# Separates lowercased texts in the search blocks. Titles and authors are
+# not expected to contain NUL characters, so a match never spans two books.
+SEPARATOR = b"\x00"
+
+# Marks an ISBN that has no overlay entry
+_MISSING = object()
+
+
+def export_catalog(path, books=None):
+    """
+    Write a catalog to a fixed-layout binary file.
+
+    The file holds a fixed-size record per book in catalog order, an
+    ISBN index sorted for binary search, a heap of the original strings,
+    and blocks of lowercased titles and authors that searches scan directly.
+
+    Args:
+        path (str): File to write
+        books (dict): Catalog to export; defaults to operations.books
+
+    Returns:
+        int: Number of books written
+    """
+    if books is None:
+        books = operations.books
+
+    heap = bytearray()
+    records = bytearray()
+    isbns = []
+    blocks = {field: [] for field in SEARCH_FIELDS}
+
+    def store(text):
+        data = text.encode("utf-8")
+        offset = len(heap)
+        heap.extend(data)
+        return offset, len(data)
+
+    for isbn, book in books.items():
+        isbn_ref = store(isbn)
+        title_ref = store(book['title'])
+        author_ref = store(book['author'])
+        records.extend(RECORD.pack(*isbn_ref, *title_ref, *author_ref,
+                                   GENRES.index(book['genre']),
+                                   book['total_copies'], book['available_copies']))
+        isbns.append(isbn.encode("utf-8"))
+        for field in SEARCH_FIELDS:
+            blocks[field].append(book[field].lower().encode("utf-8"))
+
+    count = len(isbns)
+    isbn_index = struct.pack(f"<{count}I", *sorted(range(count), key=isbns.__getitem__))
+
+    sections = [bytes(records), isbn_index]
+    for field in SEARCH_FIELDS:
+        starts = []
+        position = 0
+        for text in blocks[field]:
+            starts.append(position)
+            position += len(text) + 1
+        sections.append(struct.pack(f"<{count}I", *starts))
+        sections.append(SEPARATOR.join(blocks[field]) + SEPARATOR)
+    sections.append(bytes(heap))
+
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, count, *offsets))
+        for section in sections:
+            f.write(section)
+    return count
+
+
+class MappedBook(Book):
+    """
+    A book decoded from a mapped catalog.
+
+    The first change to the book copies it into the catalog's overlay, so
+    operations that update a book in place (such as borrow_book) keep working.
+    """
+
+    __slots__ = ('_catalog', '_isbn')
+
+    def __init__(self, catalog, isbn, *fields):
+        object.__setattr__(self, '_catalog', None)
+        object.__setattr__(self, '_isbn', isbn)
+        super().__init__(*fields)
+        object.__setattr__(self, '_catalog', catalog)
+
+    def __setattr__(self, name, value):
+        catalog = self._catalog
+        if catalog is not None:
+            # Only the first change needs to copy the book into the overlay
+            object.__setattr__(self, '_catalog', None)
+            catalog._promote(self._isbn, self)
+        object.__setattr__(self, name, value)
+
+
+class MappedCatalog(MutableMapping):
+    """
+    Book catalog backed by a memory-mapped snapshot file plus an overlay.
+
+    Reads come straight from the mapped file; books added, changed or
+    deleted in this process are kept in the overlay. Iteration follows
+    the snapshot order, with books added since the snapshot at the end.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self._count, records_off, index_off, title_starts_off, title_off,
+         author_starts_off, author_off, self._heap_off) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot.")
+
+        view = self._view = memoryview(self._map)
+        count = self._count
+        self._records = view[records_off:records_off + count * RECORD.size]
+        self._isbn_index = view[index_off:index_off + 4 * count].cast("I")
+        self._starts = {
+            "title": view[title_starts_off:title_starts_off + 4 * count].cast("I"),
+            "author": view[author_starts_off:author_starts_off + 4 * count].cast("I"),
+        }
+        self._blocks = {"title": (title_off, author_starts_off), "author": (author_off, self._heap_off)}
+
+        # ISBN -> Book for changed or added books, None for deleted ones
+        self._overlay = {}
+        self._added = 0
+        self._deleted = 0
+        self._clear_hooks = []
+
+    def add_clear_hook(self, hook):
+        """
+        Register a function to call whenever the catalog is cleared.
+
+        Args:
+            hook (callable): Function taking no arguments
+        """
+        self._clear_hooks.append(hook)
+
+    def clear(self):
+        """Remove all books, including every book in the snapshot."""
+        self._count = 0
+        self._overlay.clear()
+        self._added = 0
+        self._deleted = 0
+        for hook in self._clear_hooks:
+            hook()
+
+    def close(self):
+        """Unmap the snapshot file."""
+        self._records.release()
+        self._isbn_index.release()
+        for starts in self._starts.values():
+            starts.release()
+        self._view.release()
+        self._map.close()
+
+    # Mapping interface
+
+    def __getitem__(self, isbn):
+        if isbn in self._overlay:
+            book = self._overlay[isbn]
+            if book is None:
+                raise KeyError(isbn)
+            return book
+        record = self._find(isbn)
+        if record is None:
+            raise KeyError(isbn)
+        return self._decode(record, isbn)
+
+    def __setitem__(self, isbn, book):
+        self._promote(isbn, book)
+
+    def __delitem__(self, isbn):
+        if isbn not in self:
+            raise KeyError(isbn)
+        if self._find(isbn) is None:
+            del self._overlay[isbn]
+            self._added -= 1
+        else:
+            self._promote(isbn, None)
+
+    def __contains__(self, isbn):
+        if isbn in self._overlay:
+            return self._overlay[isbn] is not None
+        return self._find(isbn) is not None
+
+    def __iter__(self):
+        for isbn, _ in self.items():
+            yield isbn
+
+    def __len__(self):
+        return self._count - self._deleted + self._added
+
+    def items(self):
+        """Yield (isbn, book) pairs in catalog order."""
+        overlay = self._overlay
+        for record in range(self._count):
+            isbn = self._isbn_at(record)
+            if isbn in overlay:
+                if overlay[isbn] is not None:
+                    yield isbn, overlay[isbn]
+            else:
+                yield isbn, self._decode(record, isbn)
+        for isbn, book in overlay.items():
+            if book is not None and self._find(isbn) is None:
+                yield isbn, book
+
+    def values(self):
+        """Yield books in catalog order."""
+        for _, book in self.items():
+            yield book
+
+    # Searching
+
+    def search(self, search_term, search_by="title"):
+        """
+        Find books whose field contains search_term, ignoring case.
+
+        Snapshot books are found by scanning the mapped block of lowercased
+        text, so no per-book objects are created for non-matching books.
+
+        Args:
+            search_term (str): Substring to search for
+            search_by (str): Field to search - "title" or "author"
+
+        Returns:
+            list: Matching ISBNs in catalog order
+        """
+        term = search_term.lower()
+        needle = term.encode("utf-8")
+        overlay = self._overlay
+        matches = []
+
+        if self._count and SEPARATOR not in needle:
+            start, end = self._blocks[search_by]
+            starts = self._starts[search_by]
+            find = self._map.find
+            position = find(needle, start, end)
+            while position != -1:
+                record = bisect_right(starts, position - start) - 1
+                isbn = self._isbn_at(record)
+                if isbn not in overlay:
+                    matches.append((record, isbn))
+                # Continue from the next book so each book is reported once
+                if record + 1 >= self._count:
+                    break
+                position = find(needle, start + starts[record + 1], end)
+
+        # Books in the overlay keep their snapshot position
+        added = self._count
+        for isbn, book in overlay.items():
+            if book is not None and term in book[search_by].lower():
+                record = self._find(isbn)
+                if record is None:
+                    record = added
+                    added += 1
+                matches.append((record, isbn))
+
+        matches.sort()
+        return [isbn for _, isbn in matches]
+
+    def search_words(self, search_term, search_by="title"):
+        """
+        Find books whose field contains every word of search_term.
+
+        Args:
+            search_term (str): One or more words to search for
+            search_by (str): Field to search - "title" or "author"
+
+        Returns:
+            list: Matching ISBNs in catalog order
+        """
+        words = set(tokenize(search_term.lower()))
+        if not words:
+            return []
+        # Every whole-word match is also a substring match of its longest word
+        candidates = self.search(max(words, key=len), search_by)
+        return [isbn for isbn in candidates
+                if words <= set(tokenize(self[isbn][search_by].lower()))]
+
+    # Internal helpers
+
+    def _promote(self, isbn, book):
+        # Store a book in the overlay, keeping the counts len() relies on
+        overlay = self._overlay
+        previous = overlay.get(isbn, _MISSING)
+        if self._find(isbn) is not None:
+            self._deleted += (book is None) - (previous is None)
+        elif previous is _MISSING:
+            self._added += 1
+        overlay[isbn] = book
+
+    def _field(self, offset, length):
+        start = self._heap_off + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def _isbn_at(self, record):
+        isbn_off, isbn_len = RECORD.unpack_from(self._records, record * RECORD.size)[:2]
+        return self._field(isbn_off, isbn_len)
+
+    def _decode(self, record, isbn):
+        (_, _, title_off, title_len, author_off, author_len,
+         genre_code, total_copies, available_copies) = RECORD.unpack_from(self._records, record * RECORD.size)
+        return MappedBook(self, isbn, self._field(title_off, title_len), self._field(author_off, author_len),
+                          GENRES[genre_code], total_copies, available_copies)
+
+    def _find(self, isbn):
+        # Binary search the sorted ISBN index; returns the record number
+        target = isbn.encode("utf-8")
+        index = self._isbn_index
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            record = index[middle]
+            isbn_off, isbn_len = RECORD.unpack_from(self._records, record * RECORD.size)[:2]
+            start = self._heap_off + isbn_off
+            current = self._map[start:start + isbn_len]
+            if current < target:
+                low = middle + 1
+            elif current > target:
+                high = middle
+            else:
+                return record
+        return None
+
+
+class MappedSearchIndex:
+    """
+    Search index adapter for a MappedCatalog.
+
+    The catalog answers searches itself, so the maintenance calls that
+    operations.py makes on its search index have nothing to do.
+    """
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def add(self, isbn, book):
+        pass
+
+    add_deferred = add
+    update = add
+
+    def remove(self, isbn):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, search_term, search_by="title"):
+        return self._catalog.search(search_term, search_by)
+
+    def search_words(self, search_term, search_by="title"):
+        return self._catalog.search_words(search_term, search_by)
+
+
+def open_catalog(path):
+    """
+    Open a catalog snapshot and make it the catalog used by operations.py.
+
+    Args:
+        path (str): File written by export_catalog
+
+    Returns:
+        MappedCatalog: The mapped catalog, also available as operations.books
+    """
+    catalog = MappedCatalog(path)
+    operations.use_catalog(catalog, MappedSearchIndex(catalog))
+    return catalog
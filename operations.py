@@ -3,16 +3,372 @@ Mini Library Management System
 A simple library management system using Python data structures.
 """
 
+import functools
+import importlib
+import sys
+import threading
+from contextlib import contextmanager
+from itertools import islice
+
+import metrics
+from bulk_import import DEFAULT_BATCH_SIZE, BulkReport, batched, read_rows
+from catalog_index import CatalogIndex
+from circulation_stats import CirculationStats
+from holds import HoldQueues
+from loans import DEFAULT_LOAN_DAYS, LoanLedger
+from locks import StripedLocks
+from metrics import instrumented
+from parallel_search import DEFAULT_THRESHOLD
+from records import GENRES, MAX_BORROWED, Book, Member
+from registry import BookCatalog, MemberRegistry
+from renderers import get_renderer
+from results import PrintReporter, Status
+from search_cache import DEFAULT_MAX_ENTRIES, SearchCache
+from search_index import SearchIndex
+
+# Optional components, imported from their modules on first access
+# (e.g. operations.LibraryStore) so that importing operations stays fast
+_LAZY_ATTRIBUTES = {
+    'LibraryStore': 'storage',
+    'SqliteBackend': 'sqlite_backend',
+    'ShardedLibrary': 'sharding',
+    'ColumnarCatalog': 'columnar',
+    'EventFeed': 'events',
+    'export_catalog': 'mmap_catalog',
+    'open_catalog': 'mmap_catalog',
+    'ParallelSearcher': 'parallel_search',
+    'RankedIndex': 'ranked_search',
+}
+
+def __getattr__(name):
+    """Import an optional component on first access (PEP 562)."""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(globals().keys() | _LAZY_ATTRIBUTES.keys())
+
 # Data Structures
-# Books: Dictionary where key is ISBN, value is book details
-books = {}
+# Books: Dictionary where key is ISBN, value is a Book record
+books = BookCatalog()
+
+# Members: Registry of Member records indexed by member ID
+members = MemberRegistry()
+
+# Genres: Tuple of valid genres (defined in records.py)
+
+# Number of records display_books and display_members write at a time
+DEFAULT_PAGE_SIZE = 100
+
+# Search index over book titles and authors, reset whenever books is cleared
+_search_index = SearchIndex()
+books.add_clear_hook(_search_index.clear)
+
+# Genre and availability indexes over the books, also reset with books
+_catalog_index = CatalogIndex()
+books.add_clear_hook(_catalog_index.clear)
+
+# Recent search_books results, reset with books
+_search_cache = SearchCache()
+books.add_clear_hook(_search_cache.clear)
+
+# Checkout and due times of every outstanding loan, reset with members
+_loans = LoanLedger()
+members.add_clear_hook(_loans.clear)
+
+# Running circulation totals, borrow counts and members at the borrowing
+# limit, reset with books and members
+_stats = CirculationStats()
+books.add_clear_hook(_stats.clear_catalog)
+members.add_clear_hook(_stats.clear_members)
+
+# Members waiting for books with no copies available, reset with books
+# and with members
+_holds = HoldQueues()
+books.add_clear_hook(_holds.clear)
+members.add_clear_hook(_holds.clear)
+
+def use_catalog(catalog, search_index=None):
+    """
+    Replace the book catalog, e.g. with a memory-mapped snapshot.
+    
+    Code that imported books with "from operations import *" keeps the old
+    catalog; refer to operations.books after switching. The genre and
+    availability indexes are rebuilt from the new catalog when first queried.
+    
+    Args:
+        catalog (dict): New catalog of Book records keyed by ISBN. It must
+            provide add_clear_hook like BookCatalog does.
+        search_index: Index answering searches over the catalog; a new
+            SearchIndex is built from the catalog if not given
+    
+    Returns:
+        dict: The previous catalog
+    """
+    global books, _search_index, _catalog_index, _ranked_index
+    previous = books
+    if search_index is None:
+        search_index = SearchIndex()
+        for isbn, book in catalog.items():
+            search_index.add_deferred(isbn, book)
+    books = catalog
+    _search_index = search_index
+    _catalog_index = CatalogIndex()
+    _catalog_index.invalidate()
+    _search_cache.clear()
+    books.add_clear_hook(search_index.clear)
+    books.add_clear_hook(_catalog_index.clear)
+    books.add_clear_hook(_search_cache.clear)
+    # The copy totals are recounted from the new catalog when first read
+    _stats.invalidate()
+    books.add_clear_hook(_stats.clear_catalog)
+    # The ranked index is rebuilt from the new catalog when first queried
+    if _ranked_index is not None:
+        remove_observer(_follow_ranked_index)
+        _ranked_index = None
+    return previous
+
+def configure_search_cache(max_entries=DEFAULT_MAX_ENTRIES, ttl=None):
+    """
+    Replace the search_books result cache.
+    
+    Args:
+        max_entries (int): Maximum number of cached queries; 0 disables caching
+        ttl (float): Seconds a cached result stays valid, or None for no limit
+    """
+    global _search_cache
+    with _catalog_lock:
+        _search_cache = SearchCache(max_entries, ttl)
+        books.add_clear_hook(_search_cache.clear)
+
+def search_cache_stats():
+    """
+    Return the search_books cache counters.
+    
+    Returns:
+        dict: hits, misses, evictions, invalidations and current size
+    """
+    return _search_cache.stats()
+
+def enable_metrics():
+    """
+    Start recording call counts, latencies and errors for every operation.
+    
+    Returns:
+        Metrics: The metrics being recorded
+    """
+    return metrics.enable()
+
+def disable_metrics():
+    """Stop recording metrics; operations then run without instrumentation."""
+    metrics.disable()
+
+def _gauges():
+    """Current catalog size, member count and outstanding loans."""
+    if _backend is not None:
+        return _backend.counts()
+    return {
+        'books': len(books),
+        'members': len(members),
+        'loans': _circulation_totals()['copies_out'],
+    }
+
+def metrics_snapshot():
+    """
+    Return the recorded metrics and current gauges as a dictionary.
+    
+    Returns:
+        dict: Metrics per operation and gauges, or None if metrics are disabled
+    """
+    recorded = metrics.active()
+    return None if recorded is None else recorded.snapshot(_gauges())
+
+def metrics_prometheus():
+    """
+    Return the recorded metrics and current gauges in Prometheus text format.
+    
+    Returns:
+        str: The metrics text, empty if metrics are disabled
+    """
+    recorded = metrics.active()
+    return "" if recorded is None else recorded.to_prometheus(_gauges())
+
+# Process pool for scans of large catalogs, or None while disabled
+_parallel_search = None
+_parallel_threshold = DEFAULT_THRESHOLD
+
+def configure_parallel_search(threshold=DEFAULT_THRESHOLD, workers=None):
+    """
+    Scan large catalogs on a process pool.
+    
+    Searches that cannot use the search index (terms shorter than three
+    characters) are split across worker processes once the catalog has
+    at least threshold books. Results are in the same order either way.
+    The workers' catalog snapshot is built in the background; searches
+    scan in-process until it is ready.
+    
+    Args:
+        threshold (int): Catalog size from which searches run in parallel,
+            or None to disable parallel search
+        workers (int): Worker processes; defaults to the number of CPUs
+    """
+    global _parallel_search, _parallel_threshold
+    if _parallel_search is not None:
+        remove_observer(_parallel_search.observe)
+        _parallel_search.close()
+        _parallel_search = None
+    _parallel_threshold = threshold
+    if threshold is not None:
+        from parallel_search import ParallelSearcher
+        _parallel_search = ParallelSearcher(workers, lock=_catalog_lock)
+        add_observer(_parallel_search.observe)
+        books.add_clear_hook(_parallel_search.invalidate)
+
+# Fuzzy ranked search index over titles and authors, built on first use
+_ranked_index = None
+
+def _follow_ranked_index(operation, args, kwargs):
+    """Observer applying catalog changes to the ranked search index."""
+    if operation == "add_book" or (operation == "update_book" and ('title' in kwargs or 'author' in kwargs)):
+        _ranked_index.add(args[0], books[args[0]])
+    elif operation == "delete_book":
+        _ranked_index.remove(args[0])
+
+# Locking: circulation on different members and books runs concurrently
+# under striped locks. Changes to the catalog or member registry as a whole
+# (and to the search index) also take a collection lock. Locks are always
+# acquired as member stripes, then book stripes, then collection locks.
+_locks = StripedLocks()
+_catalog_lock = threading.Lock()
+_members_lock = threading.Lock()
+
+@contextmanager
+def exclusive():
+    """
+    Block every operation for the duration of a with block.
+    
+    Used to read a consistent view of the whole library, e.g. for a snapshot.
+    Must not be entered by a thread that is inside an operation.
+    """
+    with _locks.hold_all(), _catalog_lock, _members_lock:
+        yield
+
+# Reporter called with every operation result; None keeps operations silent
+_reporter = None
+
+def set_reporter(reporter):
+    """
+    Set the reporter that receives every operation result.
+    
+    Operations do not print their results. Pass PrintReporter() to print
+    the familiar success and error messages, or None to stay silent.
+    
+    Args:
+        reporter (callable): Called as reporter(operation, status, details), or None
+    
+    Returns:
+        callable: The previous reporter
+    """
+    global _reporter
+    previous = _reporter
+    _reporter = reporter
+    return previous
+
+# Backend answering the catalog, member and circulation operations instead
+# of the in-memory books and members; None keeps the library in memory
+_backend = None
 
-# Members: List of dictionaries containing member information
-members = []
+def set_backend(backend):
+    """
+    Keep the library in a storage backend instead of in memory.
+    
+    While a backend is set, the operations it implements (see
+    backends.StorageBackend) are answered by the backend and leave books
+    and members untouched. Operations that only follow the in-memory
+    library (batch borrows and returns, the loan ledger, circulation
+    statistics, hold queues and ranked search) raise NotImplementedError.
+    Pass None to go back to the in-memory library.
+    
+    Args:
+        backend (StorageBackend): Backend to use, e.g. SqliteBackend, or None
+    
+    Returns:
+        StorageBackend: The previous backend
+    """
+    global _backend
+    previous = _backend
+    _backend = backend
+    return previous
 
-# Genres: Tuple of valid genres
-GENRES = ("Fiction", "Non-Fiction", "Sci-Fi", "Mystery", "Romance", "Biography", "History", "Science")
+def _backed(function):
+    """Answer calls of an operation from the backend, if one is set."""
+    name = function.__name__
+    
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        backend = _backend
+        if backend is not None:
+            return getattr(backend, name)(*args, **kwargs)
+        return function(*args, **kwargs)
+    
+    return wrapper
+
+def _in_memory(function):
+    """Refuse calls of an operation that only follows the in-memory library while a backend is set."""
+    name = function.__name__
+    
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _backend is not None:
+            raise NotImplementedError(f"{name} only works on the in-memory library, not while a storage backend is set")
+        return function(*args, **kwargs)
+    
+    return wrapper
+
+# Observers called after every successful mutation, e.g. the write-ahead log
+_observers = []
+
+def add_observer(observer):
+    """
+    Register a function to call after every successful mutation.
+    
+    Args:
+        observer (callable): Called as observer(operation, args, kwargs) with
+            the name and arguments of the mutating call, e.g.
+            ("borrow_book", ("M001", "978-1"), {})
+    """
+    _observers.append(observer)
 
+def remove_observer(observer):
+    """
+    Stop calling a previously registered observer.
+    
+    Args:
+        observer (callable): The observer to remove
+    """
+    _observers.remove(observer)
+
+def _notify(operation, *args, **kwargs):
+    """Pass a successful mutation to every observer."""
+    for observer in _observers:
+        observer(operation, args, kwargs)
+
+def _report(operation, status, **details):
+    """Pass a result to the reporter, if one is set, and return its status."""
+    if _reporter is not None:
+        _reporter(operation, status, details)
+    return status
+
+def _is_valid_email(email):
+    """Basic email format validation."""
+    return '@' in email and '.' in email.split('@')[1]
+
+@instrumented
+@_backed
 def add_book(isbn, title, author, genre, total_copies):
     """
     Add a book to the system.
@@ -25,35 +381,40 @@ def add_book(isbn, title, author, genre, total_copies):
         total_copies (int): Number of copies available
     
     Returns:
-        bool: True if book added successfully, False otherwise
-    """
-    # Validate ISBN uniqueness
-    if isbn in books:
-        print(f"Error: Book with ISBN {isbn} already exists.")
-        return False
+        Status: Status.OK if book added successfully, otherwise the reason it was not
     
-    # Validate genre
-    if genre not in GENRES:
-        print(f"Error: Invalid genre '{genre}'. Valid genres are: {', '.join(GENRES)}")
-        return False
-    
-    # Validate total_copies
-    if total_copies <= 0:
-        print("Error: Total copies must be greater than 0.")
-        return False
-    
-    # Add book to dictionary
-    books[isbn] = {
-        'title': title,
-        'author': author,
-        'genre': genre,
-        'total_copies': total_copies,
-        'available_copies': total_copies
-    }
-    
-    print(f"Book '{title}' by {author} added successfully.")
-    return True
+    Raises:
+        TypeError: If isbn is not a string or int, or title or author is not a string
+    """
+    _check_types((str, int), isbn=isbn)
+    _check_types(str, title=title, author=author)
+    copies = _whole_copies(total_copies)
+    with _locks.book_lock(isbn), _catalog_lock:
+        # Validate ISBN uniqueness
+        if isbn in books:
+            return _report("add_book", Status.DUPLICATE_ISBN, isbn=isbn)
+        
+        # Validate genre
+        if genre not in GENRES:
+            return _report("add_book", Status.INVALID_GENRE, genre=genre)
+        
+        # Validate total_copies
+        if copies is None or copies <= 0:
+            return _report("add_book", Status.INVALID_COPIES)
+        
+        # Add book to dictionary
+        total_copies = copies
+        books[isbn] = Book(title, author, genre, total_copies)
+        _search_index.add(isbn, books[isbn])
+        _catalog_index.add(isbn, books[isbn])
+        _search_cache.invalidate(books[isbn])
+        _stats.book_added(books[isbn])
+        
+        _notify("add_book", isbn, title, author, genre, total_copies)
+        return _report("add_book", Status.OK, isbn=isbn, title=title, author=author)
 
+@instrumented
+@_backed
 def add_member(member_id, name, email):
     """
     Add a member to the system.
@@ -64,130 +425,419 @@ def add_member(member_id, name, email):
         email (str): Member's email address
     
     Returns:
-        bool: True if member added successfully, False otherwise
+        Status: Status.OK if member added successfully, otherwise the reason it was not
+    
+    Raises:
+        TypeError: If member_id is not a string or int, or name or email is not a string
     """
-    # Validate member ID uniqueness
-    for member in members:
-        if member['member_id'] == member_id:
-            print(f"Error: Member with ID {member_id} already exists.")
-            return False
+    _check_types((str, int), member_id=member_id)
+    _check_types(str, name=name, email=email)
+    with _locks.member_lock(member_id), _members_lock:
+        # Validate member ID uniqueness
+        if member_id in members:
+            return _report("add_member", Status.DUPLICATE_MEMBER, member_id=member_id)
+        
+        # Validate email format (basic validation)
+        if not _is_valid_email(email):
+            return _report("add_member", Status.INVALID_EMAIL, email=email)
+        
+        # Add member to registry
+        members.add(Member(member_id, name, email))
+        
+        _notify("add_member", member_id, name, email)
+        return _report("add_member", Status.OK, member_id=member_id, name=name)
+
+def _check_types(types, **fields):
+    """
+    Raise TypeError before anything changes if a field has another type.
     
-    # Validate email format (basic validation)
-    if '@' not in email or '.' not in email.split('@')[1]:
-        print("Error: Invalid email format.")
-        return False
+    Every logged argument must be one the storage codec can write, so a
+    change is never applied without being logged.
+    """
+    for field, value in fields.items():
+        if not isinstance(value, types):
+            raise TypeError(f"{field} must not be a {type(value).__name__}")
+
+def _whole_copies(value):
+    """Return a total_copies argument as an int, or None if it is not a whole number."""
+    try:
+        return _parse_copies(value)
+    except (TypeError, ValueError):
+        return None
+
+def _parse_copies(value):
+    """Parse a total_copies field, rejecting values that are not whole numbers."""
+    if isinstance(value, bool):
+        raise TypeError("total_copies must be a number")
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"total_copies must be a whole number, not {value}")
+        return int(value)
+    # int("2.5") raises ValueError, so strings must hold a whole number too
+    return int(value)
+
+def _parse_book_rows(batch, report):
+    """
+    Parse a batch of bulk book rows, rejecting any with missing or malformed fields.
     
-    # Add member to list
-    new_member = {
-        'member_id': member_id,
-        'name': name,
-        'email': email,
-        'borrowed_books': []
-    }
-    members.append(new_member)
+    Returns:
+        list: (row_number, isbn, title, author, genre, total_copies) tuples
+    """
+    rows = []
+    for row_number, row in batch:
+        try:
+            title, author = row['title'], row['author']
+            # Short CSV rows and JSON nulls leave fields set to None
+            if not isinstance(title, str) or not isinstance(author, str):
+                raise TypeError("title and author must be strings")
+            rows.append((row_number, row['isbn'], title, author,
+                         row['genre'], _parse_copies(row['total_copies'])))
+        except (TypeError, KeyError, ValueError):
+            isbn = row.get('isbn') if isinstance(row, dict) else None
+            report.reject(row_number, isbn, Status.MALFORMED_ROW)
+    return rows
+
+def _parse_member_rows(batch, report):
+    """
+    Parse a batch of bulk member rows, rejecting any with missing fields.
     
-    print(f"Member '{name}' added successfully.")
-    return True
+    Returns:
+        list: (row_number, member_id, name, email) tuples
+    """
+    rows = []
+    for row_number, row in batch:
+        try:
+            name, email = row['name'], row['email']
+            if not isinstance(name, str) or not isinstance(email, str):
+                raise TypeError("name and email must be strings")
+            rows.append((row_number, row['member_id'], name, email))
+        except (TypeError, KeyError):
+            member_id = row.get('member_id') if isinstance(row, dict) else None
+            report.reject(row_number, member_id, Status.MALFORMED_ROW)
+    return rows
 
-def search_books(search_term, search_by="title"):
+@instrumented
+@_backed
+def add_books_bulk(source, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Add many books from a CSV or JSONL file, or from an iterable of rows.
+    
+    Each row needs isbn, title, author, genre and total_copies. Rows are
+    streamed and validated a batch at a time; rejected rows are collected
+    in the returned report instead of being printed.
+    
+    Args:
+        source (str or iterable): File path, or an iterable of row dictionaries
+        file_format (str): "csv" or "jsonl"; detected from the extension if not given
+        batch_size (int): Number of rows validated together
+    
+    Returns:
+        BulkReport: Number of books added and the rejected rows
+    """
+    report = BulkReport()
+    valid_genres = set(GENRES)
+    
+    # Loading into an empty catalog, e.g. recovering from a snapshot at
+    # start-up, leaves the genre and availability indexes to be built by
+    # the first filtered query instead of updating them book by book
+    with _catalog_lock:
+        if not books:
+            _catalog_index.invalidate()
+    
+    for batch in batched(read_rows(source, file_format), batch_size):
+        rows = _parse_book_rows(batch, report)
+        
+        # Validate genres and ISBN uniqueness for the whole batch with set operations
+        invalid_genres = {row[4] for row in rows} - valid_genres
+        with _catalog_lock:
+            existing = {row[1] for row in rows} & books.keys()
+            
+            for row_number, isbn, title, author, genre, total_copies in rows:
+                if isbn in existing:
+                    report.reject(row_number, isbn, Status.DUPLICATE_ISBN)
+                elif genre in invalid_genres:
+                    report.reject(row_number, isbn, Status.INVALID_GENRE)
+                elif total_copies <= 0:
+                    report.reject(row_number, isbn, Status.INVALID_COPIES)
+                else:
+                    books[isbn] = Book(title, author, genre, total_copies)
+                    _search_index.add_deferred(isbn, books[isbn])
+                    _catalog_index.add(isbn, books[isbn])
+                    _stats.book_added(books[isbn])
+                    # Later rows in the same batch with this ISBN are duplicates
+                    existing.add(isbn)
+                    report.added += 1
+                    _notify("add_book", isbn, title, author, genre, total_copies)
+            
+            # Too many new books to invalidate cached searches one at a time
+            if report.added:
+                _search_cache.clear()
+    
+    return report
+
+@instrumented
+@_backed
+def add_members_bulk(source, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Add many members from a CSV or JSONL file, or from an iterable of rows.
+    
+    Each row needs member_id, name and email. Rows are streamed and
+    validated a batch at a time; rejected rows are collected in the
+    returned report instead of being printed.
+    
+    Args:
+        source (str or iterable): File path, or an iterable of row dictionaries
+        file_format (str): "csv" or "jsonl"; detected from the extension if not given
+        batch_size (int): Number of rows validated together
+    
+    Returns:
+        BulkReport: Number of members added and the rejected rows
+    """
+    report = BulkReport()
+    
+    for batch in batched(read_rows(source, file_format), batch_size):
+        rows = _parse_member_rows(batch, report)
+        
+        # Validate member ID uniqueness for the whole batch with one set operation
+        with _members_lock:
+            existing = {row[1] for row in rows} & members.ids()
+            
+            for row_number, member_id, name, email in rows:
+                if member_id in existing:
+                    report.reject(row_number, member_id, Status.DUPLICATE_MEMBER)
+                elif not _is_valid_email(email):
+                    report.reject(row_number, member_id, Status.INVALID_EMAIL)
+                else:
+                    members.add(Member(member_id, name, email))
+                    existing.add(member_id)
+                    report.added += 1
+                    _notify("add_member", member_id, name, email)
+    
+    return report
+
+@instrumented
+@_backed
+def search_books(search_term, search_by="title", whole_words=False):
     """
     Search for books by title or author.
     
     Args:
         search_term (str): Term to search for
         search_by (str): Search criteria - "title" or "author"
+        whole_words (bool): Match every word of the term as a whole word
+            instead of matching the term as a substring
     
     Returns:
         list: List of matching books
     """
     if search_by not in ["title", "author"]:
-        print("Error: search_by must be 'title' or 'author'.")
+        _report("search_books", Status.INVALID_SEARCH_FIELD, search_by=search_by)
         return []
     
-    matching_books = []
-    search_term_lower = search_term.lower()
+    # Answer popular queries from the cache, otherwise look up candidates
+    # in the search index instead of scanning all books
+    key = (search_term.lower(), search_by, whole_words)
+    with _catalog_lock:
+        isbns = _search_cache.get(key)
+        if isbns is None:
+            if whole_words:
+                isbns = _search_index.search_words(search_term, search_by)
+            else:
+                isbns = None
+                if _parallel_search is not None and len(key[0]) < 3 and len(books) >= _parallel_threshold:
+                    isbns = _parallel_search.search(books, search_term, search_by)
+                if isbns is None:
+                    isbns = _search_index.search(search_term, search_by)
+            _search_cache.put(key, isbns)
+        
+        return [(isbn, books[isbn]) for isbn in isbns]
+
+@instrumented
+@_in_memory
+def search_ranked(query, limit=10):
+    """
+    Search titles and authors together, best matches first.
+    
+    Query words are matched as whole words, tolerating typos (one in
+    words of 4 to 7 letters, two in longer words), and books are ranked
+    by BM25 relevance. The index is built from the catalog on the first
+    ranked search and kept up to date from then on.
     
-    for isbn, book in books.items():
-        if search_by == "title" and search_term_lower in book['title'].lower():
-            matching_books.append((isbn, book))
-        elif search_by == "author" and search_term_lower in book['author'].lower():
-            matching_books.append((isbn, book))
+    Args:
+        query (str): Words to search for, e.g. "fitzgerlad gatsby"
+        limit (int): Maximum number of results
     
-    return matching_books
+    Returns:
+        list: List of matching books as (isbn, book) pairs, most relevant first
+    """
+    global _ranked_index
+    with _catalog_lock:
+        if _ranked_index is None:
+            from ranked_search import RankedIndex
+            index = RankedIndex()
+            for isbn, book in books.items():
+                index.add(isbn, book)
+            _ranked_index = index
+            add_observer(_follow_ranked_index)
+            books.add_clear_hook(index.clear)
+        
+        return [(isbn, books[isbn]) for isbn, score in _ranked_index.search(query, limit)]
 
-def update_book(isbn, **kwargs):
+@instrumented
+@_backed
+def find_books(search_term=None, search_by="title", genre=None, available_only=False, whole_words=False):
     """
-    Update book details.
+    Find books matching a search term, a genre and/or availability.
+    
+    The genre and availability indexes are combined with the search
+    index, so the cost depends on the number of matching books rather
+    than on the size of the catalog.
     
     Args:
-        isbn (str): ISBN of the book to update
-        **kwargs: Fields to update (title, author, genre, total_copies)
+        search_term (str): Term to search for, or None to match every book
+        search_by (str): Search criteria - "title" or "author"
+        genre (str): Only match books in this genre (must be in GENRES tuple)
+        available_only (bool): Only match books with copies available
+        whole_words (bool): Match every word of the term as a whole word
     
     Returns:
-        bool: True if updated successfully, False otherwise
+        list: List of matching books as (isbn, book) pairs in catalog order
     """
-    if isbn not in books:
-        print(f"Error: Book with ISBN {isbn} not found.")
-        return False
+    if search_by not in ["title", "author"]:
+        _report("find_books", Status.INVALID_SEARCH_FIELD, search_by=search_by)
+        return []
     
-    # Validate genre if provided
-    if 'genre' in kwargs and kwargs['genre'] not in GENRES:
-        print(f"Error: Invalid genre '{kwargs['genre']}'. Valid genres are: {', '.join(GENRES)}")
-        return False
+    if genre is not None and genre not in GENRES:
+        _report("find_books", Status.INVALID_GENRE, genre=genre)
+        return []
     
-    # Validate total_copies if provided
-    if 'total_copies' in kwargs and kwargs['total_copies'] <= 0:
-        print("Error: Total copies must be greater than 0.")
-        return False
+    # Build the indexes for a catalog installed with use_catalog
+    if _catalog_index.stale:
+        with exclusive():
+            if _catalog_index.stale:
+                _catalog_index.rebuild(books)
     
-    # Update fields
-    for field, value in kwargs.items():
-        if field in ['title', 'author', 'genre']:
-            books[isbn][field] = value
-        elif field == 'total_copies':
-            books[isbn]['total_copies'] = value
-            # Adjust available copies if needed
-            borrowed_count = books[isbn]['total_copies'] - books[isbn]['available_copies']
-            books[isbn]['available_copies'] = max(0, value - borrowed_count)
+    with _catalog_lock:
+        if search_term is None:
+            isbns = _catalog_index.select(genre, available_only)
+        else:
+            if whole_words:
+                isbns = _search_index.search_words(search_term, search_by)
+            else:
+                isbns = _search_index.search(search_term, search_by)
+            isbns = _catalog_index.filter(isbns, genre, available_only)
+        
+        return [(isbn, books[isbn]) for isbn in isbns]
+
+@instrumented
+@_backed
+def update_book(isbn, **kwargs):
+    """
+    Update book details.
     
-    print(f"Book with ISBN {isbn} updated successfully.")
-    return True
+    Copies added by raising total_copies are lent to the members waiting
+    for the book, as with return_book. Other keyword arguments are ignored.
+    
+    Args:
+        isbn (str): ISBN of the book to update
+        **kwargs: Fields to update (title, author, genre, total_copies)
+    
+    Returns:
+        Status: Status.OK if updated successfully, otherwise the reason it was not
+    
+    Raises:
+        TypeError: If title or author is not a string
+    """
+    kwargs = {field: value for field, value in kwargs.items() if field in ('title', 'author', 'genre', 'total_copies')}
+    _check_types(str, **{field: kwargs[field] for field in ('title', 'author') if field in kwargs})
+    status = _update_book(isbn, **kwargs)
+    if status and 'total_copies' in kwargs:
+        _lend_to_holders(isbn)
+    return status
 
+def _update_book(isbn, **kwargs):
+    """Update a book's fields under its book lock and the catalog lock."""
+    with _locks.book_lock(isbn), _catalog_lock:
+        if isbn not in books:
+            return _report("update_book", Status.BOOK_NOT_FOUND, isbn=isbn)
+        
+        # Validate genre if provided
+        if 'genre' in kwargs and kwargs['genre'] not in GENRES:
+            return _report("update_book", Status.INVALID_GENRE, genre=kwargs['genre'])
+        
+        # Validate total_copies if provided
+        if 'total_copies' in kwargs:
+            copies = _whole_copies(kwargs['total_copies'])
+            if copies is None or copies <= 0:
+                return _report("update_book", Status.INVALID_COPIES)
+            kwargs['total_copies'] = copies
+        
+        # Update fields
+        before = {'title': books[isbn]['title'], 'author': books[isbn]['author']}
+        old_genre = books[isbn]['genre']
+        old_copies = (books[isbn]['total_copies'], books[isbn]['available_copies'])
+        for field, value in kwargs.items():
+            if field in ['title', 'author', 'genre']:
+                books[isbn][field] = value
+            elif field == 'total_copies':
+                # Adjust available copies, keeping borrowed copies on loan
+                borrowed_count = books[isbn]['total_copies'] - books[isbn]['available_copies']
+                books[isbn]['total_copies'] = value
+                books[isbn]['available_copies'] = max(0, value - borrowed_count)
+        
+        # Re-index title and author changes
+        if 'title' in kwargs or 'author' in kwargs:
+            _search_index.update(isbn, books[isbn])
+            _search_cache.invalidate(before)
+            _search_cache.invalidate(books[isbn])
+        if 'genre' in kwargs or 'total_copies' in kwargs:
+            _catalog_index.update(isbn, books[isbn], old_genre)
+        if 'total_copies' in kwargs:
+            _stats.copies_changed(books[isbn]['total_copies'] - old_copies[0],
+                                  books[isbn]['available_copies'] - old_copies[1])
+        
+        _notify("update_book", isbn, **kwargs)
+        return _report("update_book", Status.OK, isbn=isbn)
+
+@instrumented
+@_backed
 def update_member(member_id, **kwargs):
     """
     Update member details.
     
     Args:
         member_id (str): Member ID to update
-        **kwargs: Fields to update (name, email)
+        **kwargs: Fields to update (name, email); others are ignored
     
     Returns:
-        bool: True if updated successfully, False otherwise
-    """
-    member_found = False
-    
-    for member in members:
-        if member['member_id'] == member_id:
-            member_found = True
-            
-            # Validate email if provided
-            if 'email' in kwargs:
-                if '@' not in kwargs['email'] or '.' not in kwargs['email'].split('@')[1]:
-                    print("Error: Invalid email format.")
-                    return False
-            
-            # Update fields
-            for field, value in kwargs.items():
-                if field in ['name', 'email']:
-                    member[field] = value
-            
-            print(f"Member with ID {member_id} updated successfully.")
-            return True
+        Status: Status.OK if updated successfully, otherwise the reason it was not
     
-    if not member_found:
-        print(f"Error: Member with ID {member_id} not found.")
-        return False
+    Raises:
+        TypeError: If name or email is not a string
+    """
+    kwargs = {field: value for field, value in kwargs.items() if field in ('name', 'email')}
+    _check_types(str, **kwargs)
+    with _locks.member_lock(member_id):
+        member = members.get(member_id)
+        
+        if not member:
+            return _report("update_member", Status.MEMBER_NOT_FOUND, member_id=member_id)
+        
+        # Validate email if provided
+        if 'email' in kwargs:
+            if not _is_valid_email(kwargs['email']):
+                return _report("update_member", Status.INVALID_EMAIL, email=kwargs['email'])
+        
+        # Update fields
+        for field, value in kwargs.items():
+            if field in ['name', 'email']:
+                member[field] = value
+        
+        _notify("update_member", member_id, **kwargs)
+        return _report("update_member", Status.OK, member_id=member_id)
 
+@instrumented
+@_backed
 def delete_book(isbn):
     """
     Delete a book from the system.
@@ -196,23 +846,29 @@ def delete_book(isbn):
         isbn (str): ISBN of the book to delete
     
     Returns:
-        bool: True if deleted successfully, False otherwise
+        Status: Status.OK if deleted successfully, otherwise the reason it was not
     """
-    if isbn not in books:
-        print(f"Error: Book with ISBN {isbn} not found.")
-        return False
-    
-    # Check if book is currently borrowed
-    if books[isbn]['available_copies'] < books[isbn]['total_copies']:
-        print(f"Error: Cannot delete book '{books[isbn]['title']}' - it has borrowed copies.")
-        return False
-    
-    # Remove book
-    book_title = books[isbn]['title']
-    del books[isbn]
-    print(f"Book '{book_title}' deleted successfully.")
-    return True
+    with _locks.book_lock(isbn), _catalog_lock:
+        if isbn not in books:
+            return _report("delete_book", Status.BOOK_NOT_FOUND, isbn=isbn)
+        
+        # Check if book is currently borrowed
+        book = books[isbn]
+        if book['available_copies'] < book['total_copies']:
+            return _report("delete_book", Status.BOOK_HAS_LOANS, isbn=isbn, title=book['title'])
+        
+        # Remove book
+        del books[isbn]
+        _search_index.remove(isbn)
+        _catalog_index.remove(isbn, book)
+        _search_cache.invalidate(book)
+        _stats.book_removed(isbn, book)
+        _holds.remove_book(isbn)
+        _notify("delete_book", isbn)
+        return _report("delete_book", Status.OK, isbn=isbn, title=book['title'])
 
+@instrumented
+@_backed
 def delete_member(member_id):
     """
     Delete a member from the system.
@@ -221,29 +877,27 @@ def delete_member(member_id):
         member_id (str): Member ID to delete
     
     Returns:
-        bool: True if deleted successfully, False otherwise
+        Status: Status.OK if deleted successfully, otherwise the reason it was not
     """
-    member_found = False
-    
-    for i, member in enumerate(members):
-        if member['member_id'] == member_id:
-            member_found = True
-            
-            # Check if member has borrowed books
-            if member['borrowed_books']:
-                print(f"Error: Cannot delete member '{member['name']}' - they have borrowed books.")
-                return False
-            
-            # Remove member
-            member_name = member['name']
-            del members[i]
-            print(f"Member '{member_name}' deleted successfully.")
-            return True
-    
-    if not member_found:
-        print(f"Error: Member with ID {member_id} not found.")
-        return False
+    with _locks.member_lock(member_id), _members_lock:
+        member = members.get(member_id)
+        
+        if not member:
+            return _report("delete_member", Status.MEMBER_NOT_FOUND, member_id=member_id)
+        
+        # Check if member has borrowed books
+        if member['borrowed_books']:
+            return _report("delete_member", Status.MEMBER_HAS_LOANS, member_id=member_id, name=member['name'])
+        
+        # Remove member
+        members.remove(member_id)
+        _stats.member_removed(member_id)
+        _holds.remove_member(member_id)
+        _notify("delete_member", member_id)
+        return _report("delete_member", Status.OK, member_id=member_id, name=member['name'])
 
+@instrumented
+@_backed
 def borrow_book(member_id, isbn):
     """
     Allow a member to borrow a book.
@@ -253,118 +907,720 @@ def borrow_book(member_id, isbn):
         isbn (str): ISBN of the book to borrow
     
     Returns:
-        bool: True if borrowed successfully, False otherwise
+        Status: Status.OK if borrowed successfully, otherwise the reason it was not
+    """
+    with _locks.member_lock(member_id), _locks.book_lock(isbn):
+        # Find member
+        member = members.get(member_id)
+        
+        if not member:
+            return _report("borrow_book", Status.MEMBER_NOT_FOUND, member_id=member_id, isbn=isbn)
+        
+        # Check if book exists
+        book = books.get(isbn)
+        if book is None:
+            return _report("borrow_book", Status.BOOK_NOT_FOUND, member_id=member_id, isbn=isbn)
+        
+        # Check if member already has 3 books borrowed
+        if len(member['borrowed_books']) >= MAX_BORROWED:
+            return _report("borrow_book", Status.BORROW_LIMIT, member_id=member_id, isbn=isbn,
+                           name=member['name'], title=book['title'])
+        
+        # Check if book is available
+        if book['available_copies'] <= 0:
+            return _report("borrow_book", Status.NO_COPIES, member_id=member_id, isbn=isbn,
+                           name=member['name'], title=book['title'])
+        
+        # Copies on the shelf go to members in the queue first
+        if _copies_for(member_id, isbn, book) <= 0:
+            return _report("borrow_book", Status.RESERVED, member_id=member_id, isbn=isbn,
+                           name=member['name'], title=book['title'])
+        
+        # Check if member already borrowed this book
+        if isbn in member['borrowed_books']:
+            return _report("borrow_book", Status.ALREADY_BORROWED, member_id=member_id, isbn=isbn,
+                           name=member['name'], title=book['title'])
+        
+        # Borrow the book
+        member.add_borrowed(isbn)
+        book['available_copies'] -= 1
+        _catalog_index.update_availability(isbn, book)
+        _loans.checkout(member_id, isbn)
+        _stats.borrowed(isbn, member_id, len(member['borrowed_books']))
+        # A hold the member placed on the book is no longer needed
+        if isbn in _holds:
+            _holds.cancel(member_id, isbn)
+        
+        _notify("borrow_book", member_id, isbn)
+        return _report("borrow_book", Status.OK, member_id=member_id, isbn=isbn,
+                       name=member['name'], title=book['title'])
+
+@instrumented
+@_backed
+def return_book(member_id, isbn):
     """
+    Allow a member to return a borrowed book.
+    
+    If members are waiting for the book, the copy is lent straight to the
+    first holder who can borrow it instead of going back on the shelf.
+    
+    Args:
+        member_id (str): Member ID
+        isbn (str): ISBN of the book to return
+    
+    Returns:
+        Status: Status.OK if returned successfully, otherwise the reason it was not
+    """
+    while True:
+        # The holder's member lock has to be taken before the book lock,
+        # so the holder is picked first and checked again once locked
+        holders = _next_holders((isbn,)) if isbn in _holds else {}
+        if not holders:
+            with _locks.member_lock(member_id), _locks.book_lock(isbn):
+                status = _return_book(member_id, isbn, holders)
+        else:
+            with _locks.hold((member_id, holders[isbn]), (isbn,)):
+                status = _return_book(member_id, isbn, holders)
+        if status is not None:
+            return status
+
+def _return_book(member_id, isbn, holders):
+    """Return a book with its locks held, or return None if holders is out of date."""
     # Find member
-    member = None
-    for m in members:
-        if m['member_id'] == member_id:
-            member = m
-            break
+    member = members.get(member_id)
     
     if not member:
-        print(f"Error: Member with ID {member_id} not found.")
-        return False
+        return _report("return_book", Status.MEMBER_NOT_FOUND, member_id=member_id, isbn=isbn)
     
     # Check if book exists
-    if isbn not in books:
-        print(f"Error: Book with ISBN {isbn} not found.")
-        return False
+    book = books.get(isbn)
+    if book is None:
+        return _report("return_book", Status.BOOK_NOT_FOUND, member_id=member_id, isbn=isbn)
     
-    # Check if member already has 3 books borrowed
-    if len(member['borrowed_books']) >= 3:
-        print(f"Error: Member '{member['name']}' has already borrowed the maximum of 3 books.")
-        return False
+    # Check if member has borrowed this book
+    if isbn not in member['borrowed_books']:
+        return _report("return_book", Status.NOT_BORROWED, member_id=member_id, isbn=isbn,
+                       name=member['name'], title=book['title'])
+    
+    if isbn in _holds and _next_holders((isbn,)) != holders:
+        return None
+    
+    # Return the book
+    member.remove_borrowed(isbn)
+    _loans.checkin(member_id, isbn)
+    _stats.returned(isbn, member_id)
+    if holders:
+        _fill_hold(holders[isbn], isbn)
+    else:
+        book['available_copies'] += 1
+        _catalog_index.update_availability(isbn, book)
+    
+    _notify("return_book", member_id, isbn)
+    status = _report("return_book", Status.OK, member_id=member_id, isbn=isbn,
+                     name=member['name'], title=book['title'])
+    if holders:
+        _report_hold_filled(holders[isbn], isbn, book)
+    return status
+
+def _can_receive(member_id, isbn):
+    """True if a member could be lent a copy of a book now."""
+    member = members.get(member_id)
+    return (member is not None and len(member.borrowed_books) < MAX_BORROWED
+            and isbn not in member.borrowed_books)
+
+def _copies_for(member_id, isbn, book):
+    """
+    Count the available copies of a book a member may borrow.
     
-    # Check if book is available
-    if books[isbn]['available_copies'] <= 0:
-        print(f"Error: No copies of '{books[isbn]['title']}' are available.")
-        return False
+    Copies are kept for the members queued for the book who can borrow
+    them now, so a member who is not one of the first of those holders
+    may only take the copies left over.
+    """
+    available = book.available_copies
+    if available <= 0 or isbn not in _holds:
+        return available
+    holders = _holds.next_holders(isbn, _can_receive, available)
+    return available if member_id in holders else available - len(holders)
+
+def _lend_to_holders(isbn):
+    """Lend the available copies of a book to the members waiting for it."""
+    while isbn in _holds:
+        book = books.get(isbn)
+        if book is None or book.available_copies <= 0:
+            return
+        holders = _holds.next_holders(isbn, _can_receive, book.available_copies)
+        if not holders:
+            return
+        # The holders' member locks have to be taken before the book lock,
+        # so the holders are picked first and checked again once locked
+        with _locks.hold(holders, (isbn,)):
+            if (books.get(isbn) is not book
+                    or _holds.next_holders(isbn, _can_receive, book.available_copies) != holders):
+                continue
+            for holder in holders:
+                book.available_copies -= 1
+                _fill_hold(holder, isbn)
+            _catalog_index.update_availability(isbn, book)
+            for holder in holders:
+                _report_hold_filled(holder, isbn, book)
+        return
+
+def _next_holders(isbns):
+    """
+    Pick the holder each returned book is lent to.
     
-    # Check if member already borrowed this book
-    if isbn in member['borrowed_books']:
-        print(f"Error: Member '{member['name']}' has already borrowed '{books[isbn]['title']}'.")
-        return False
+    Returns:
+        dict: Member ID of the holder keyed by ISBN, for the books someone
+            can receive. No holder is given more books than the borrowing
+            limit allows.
+    """
+    holders = {}
+    planned = {}
     
-    # Borrow the book
-    member['borrowed_books'].append(isbn)
-    books[isbn]['available_copies'] -= 1
+    def eligible(member_id, isbn):
+        return (_can_receive(member_id, isbn)
+                and len(members.get(member_id).borrowed_books) + planned.get(member_id, 0) < MAX_BORROWED)
     
-    print(f"Member '{member['name']}' successfully borrowed '{books[isbn]['title']}'.")
-    return True
+    for isbn in isbns:
+        if isbn in _holds:
+            holder = _holds.next_holder(isbn, eligible)
+            if holder is not None:
+                holders[isbn] = holder
+                planned[holder] = planned.get(holder, 0) + 1
+    return holders
 
-def return_book(member_id, isbn):
+def _fill_hold(holder, isbn):
+    """Lend a returned copy to a holder; the holder and book must be locked."""
+    receiver = members.get(holder)
+    _holds.cancel(holder, isbn)
+    receiver.add_borrowed(isbn)
+    _loans.checkout(holder, isbn)
+    _stats.borrowed(isbn, holder, len(receiver.borrowed_books))
+
+def _report_hold_filled(holder, isbn, book):
+    """Notify and report the loan of a returned copy to a holder."""
+    # Replaying a log hands the copy over again with the return_book
+    # record, so this borrow_book record then changes nothing
+    _notify("borrow_book", holder, isbn)
+    _report("borrow_book", Status.OK, member_id=holder, isbn=isbn,
+            name=members.get(holder)['name'], title=book['title'])
+
+def _report_batch(operation, member_id, member, isbns, statuses):
+    """Report every item of a batch and return its (isbn, Status) pairs."""
+    if _reporter is not None:
+        for isbn, status in zip(isbns, statuses):
+            book = books.get(isbn)
+            _report(operation, status, member_id=member_id, isbn=isbn,
+                    name=member['name'] if member else None,
+                    title=book['title'] if book is not None else isbn)
+    return list(zip(isbns, statuses))
+
+@instrumented
+@_in_memory
+def borrow_many(member_id, isbns):
     """
-    Allow a member to return a borrowed book.
+    Borrow several books for one member as a single transaction.
+    
+    The member is looked up once and the whole batch is checked against
+    the borrow limit and availability before anything changes. Either
+    every book is borrowed or none is.
     
     Args:
         member_id (str): Member ID
-        isbn (str): ISBN of the book to return
+        isbns (list): ISBNs of the books to borrow
     
     Returns:
-        bool: True if returned successfully, False otherwise
+        list: (isbn, Status) for every ISBN. If any book cannot be borrowed,
+            the others get Status.BATCH_ABORTED.
     """
-    # Find member
-    member = None
-    for m in members:
-        if m['member_id'] == member_id:
-            member = m
-            break
+    with _locks.hold((member_id,), isbns):
+        member = members.get(member_id)
+        if not member:
+            return _report_batch("borrow_book", member_id, None, isbns,
+                                 [Status.MEMBER_NOT_FOUND] * len(isbns))
+        
+        # Validate the whole batch before changing anything
+        borrowed = member.borrowed_books
+        room = MAX_BORROWED - len(borrowed)
+        accepted = []
+        requested = set()
+        statuses = []
+        failed = False
+        for isbn in isbns:
+            book = books.get(isbn)
+            if book is None:
+                status = Status.BOOK_NOT_FOUND
+            elif isbn in borrowed or isbn in requested:
+                status = Status.ALREADY_BORROWED
+            elif book.available_copies <= 0:
+                status = Status.NO_COPIES
+            elif _copies_for(member_id, isbn, book) <= 0:
+                status = Status.RESERVED
+            elif len(accepted) >= room:
+                status = Status.BORROW_LIMIT
+            else:
+                accepted.append(book)
+                requested.add(isbn)
+                statuses.append(Status.OK)
+                continue
+            failed = True
+            statuses.append(status)
+        
+        if failed:
+            statuses = [Status.BATCH_ABORTED if status is Status.OK else status for status in statuses]
+            return _report_batch("borrow_book", member_id, member, isbns, statuses)
+        
+        # Apply every loan, undoing them all if anything goes wrong
+        applied = []
+        try:
+            for book in accepted:
+                book.available_copies -= 1
+                applied.append(book)
+            member.borrowed_books = borrowed + tuple(isbns)
+        except Exception:
+            for book in applied:
+                book.available_copies += 1
+            member.borrowed_books = borrowed
+            raise
+        
+        for isbn, book in zip(isbns, accepted):
+            _catalog_index.update_availability(isbn, book)
+            _stats.borrowed(isbn, member_id, len(member.borrowed_books))
+            if isbn in _holds:
+                _holds.cancel(member_id, isbn)
+        _loans.checkout_many(member_id, isbns)
+        for isbn in isbns:
+            _notify("borrow_book", member_id, isbn)
+        return _report_batch("borrow_book", member_id, member, isbns, statuses)
+
+@instrumented
+@_in_memory
+def return_many(member_id, isbns):
+    """
+    Return several books for one member as a single transaction.
+    
+    The member is looked up once and every book is checked before
+    anything changes. Either every book is returned or none is. Books
+    that members are waiting for are lent to the holders, as with
+    return_book.
+    
+    Args:
+        member_id (str): Member ID
+        isbns (list): ISBNs of the books to return
     
+    Returns:
+        list: (isbn, Status) for every ISBN. If any book cannot be returned,
+            the others get Status.BATCH_ABORTED.
+    """
+    while True:
+        holders = _next_holders(isbns)
+        with _locks.hold((member_id, *holders.values()), isbns):
+            results = _return_many(member_id, isbns, holders)
+        if results is not None:
+            return results
+
+def _return_many(member_id, isbns, holders):
+    """Return a batch with its locks held, or return None if holders is out of date."""
+    member = members.get(member_id)
     if not member:
-        print(f"Error: Member with ID {member_id} not found.")
-        return False
+        return _report_batch("return_book", member_id, None, isbns,
+                             [Status.MEMBER_NOT_FOUND] * len(isbns))
     
-    # Check if book exists
-    if isbn not in books:
-        print(f"Error: Book with ISBN {isbn} not found.")
-        return False
+    # Validate the whole batch before changing anything
+    borrowed = member.borrowed_books
+    accepted = []
+    returned = set()
+    statuses = []
+    failed = False
+    for isbn in isbns:
+        book = books.get(isbn)
+        if book is None:
+            status = Status.BOOK_NOT_FOUND
+        elif isbn not in borrowed or isbn in returned:
+            status = Status.NOT_BORROWED
+        else:
+            accepted.append(book)
+            returned.add(isbn)
+            statuses.append(Status.OK)
+            continue
+        failed = True
+        statuses.append(status)
     
-    # Check if member has borrowed this book
-    if isbn not in member['borrowed_books']:
-        print(f"Error: Member '{member['name']}' has not borrowed '{books[isbn]['title']}'.")
-        return False
+    if failed:
+        statuses = [Status.BATCH_ABORTED if status is Status.OK else status for status in statuses]
+        return _report_batch("return_book", member_id, member, isbns, statuses)
     
-    # Return the book
-    member['borrowed_books'].remove(isbn)
-    books[isbn]['available_copies'] += 1
+    if _next_holders(isbns) != holders:
+        return None
+    
+    # Apply every return, undoing them all if anything goes wrong. Copies
+    # lent to holders do not go back on the shelf.
+    applied = []
+    try:
+        for isbn, book in zip(isbns, accepted):
+            if isbn not in holders:
+                book.available_copies += 1
+                applied.append(book)
+        member.borrowed_books = tuple(isbn for isbn in borrowed if isbn not in returned)
+    except Exception:
+        for book in applied:
+            book.available_copies -= 1
+        member.borrowed_books = borrowed
+        raise
     
-    print(f"Member '{member['name']}' successfully returned '{books[isbn]['title']}'.")
-    return True
+    for isbn, book in zip(isbns, accepted):
+        _loans.checkin(member_id, isbn)
+        _stats.returned(isbn, member_id)
+        if isbn in holders:
+            _fill_hold(holders[isbn], isbn)
+        else:
+            _catalog_index.update_availability(isbn, book)
+    for isbn in isbns:
+        _notify("return_book", member_id, isbn)
+    results = _report_batch("return_book", member_id, member, isbns, statuses)
+    for isbn, book in zip(isbns, accepted):
+        if isbn in holders:
+            _report_hold_filled(holders[isbn], isbn, book)
+    return results
 
-def display_books():
-    """Display all books in the system."""
-    if not books:
-        print("No books in the system.")
-        return
+def configure_loans(loan_days=DEFAULT_LOAN_DAYS, clock=None):
+    """
+    Set the loan period, and optionally the clock, used for new loans.
     
-    print("\n=== ALL BOOKS ===")
-    for isbn, book in books.items():
-        print(f"ISBN: {isbn}")
-        print(f"  Title: {book['title']}")
-        print(f"  Author: {book['author']}")
-        print(f"  Genre: {book['genre']}")
-        print(f"  Available: {book['available_copies']}/{book['total_copies']}")
-        print()
-
-def display_members():
-    """Display all members in the system."""
-    if not members:
-        print("No members in the system.")
-        return
+    Args:
+        loan_days (float): Days from checkout until a loan is due
+        clock (callable): Returns the current time in seconds since the epoch;
+            the current clock is kept if not given
+    """
+    _loans.loan_days = loan_days
+    if clock is not None:
+        _loans.clock = clock
+
+@_in_memory
+def member_loans(member_id):
+    """
+    Return the outstanding loans of a member.
     
-    print("\n=== ALL MEMBERS ===")
-    for member in members:
-        print(f"ID: {member['member_id']}")
-        print(f"  Name: {member['name']}")
-        print(f"  Email: {member['email']}")
-        print(f"  Borrowed Books: {len(member['borrowed_books'])}")
-        if member['borrowed_books']:
-            print("    Books:")
+    Args:
+        member_id (str): Member ID
+    
+    Returns:
+        list: Loan records (member_id, isbn, checked_out, due) in checkout order
+    """
+    return _loans.loans_of(member_id)
+
+@_in_memory
+def book_borrowers(isbn):
+    """
+    Return the members who currently have a copy of a book.
+    
+    Args:
+        isbn (str): ISBN of the book
+    
+    Returns:
+        list: Member IDs in checkout order
+    """
+    return _loans.borrowers_of(isbn)
+
+@_in_memory
+def next_due_loans(count=10):
+    """
+    Return the outstanding loans that are due first.
+    
+    Args:
+        count (int): Maximum number of loans
+    
+    Returns:
+        list: Loan records, earliest due date first
+    """
+    return _loans.next_due(count)
+
+@_in_memory
+def overdue_loans(as_of=None, limit=None):
+    """
+    Return the loans that were due before a given time.
+    
+    Only the overdue loans are visited, not every member, so the cost
+    grows with the number of loans returned.
+    
+    Args:
+        as_of (float): Time in seconds since the epoch; defaults to now
+        limit (int): Maximum number of loans, or None for all of them
+    
+    Returns:
+        list: Loan records, most overdue first
+    """
+    return _loans.overdue(as_of, limit)
+
+@_in_memory
+def circulation_stats():
+    """
+    Return library-wide circulation totals without walking the library.
+    
+    Returns:
+        dict: titles, total_copies, available_copies, copies_out,
+            total_borrows and members_at_limit (the number of members
+            who have borrowed the maximum number of books)
+    """
+    return _circulation_totals()
+
+def _circulation_totals():
+    """Return the circulation totals of the in-memory library."""
+    # Recount the copy totals of a catalog installed with use_catalog
+    if _stats.stale:
+        with exclusive():
+            if _stats.stale:
+                _stats.rebuild(books)
+    return _stats.snapshot()
+
+@_in_memory
+def most_borrowed(count=10):
+    """
+    Return the most borrowed books.
+    
+    Popular books are tracked by a fixed-size Space-Saving sketch, so the
+    cost does not depend on the size of the catalog. Every book borrowed
+    more often than one in every 100 borrows is guaranteed to be listed.
+    
+    Args:
+        count (int): Maximum number of books
+    
+    Returns:
+        list: (isbn, times borrowed) pairs, most borrowed first
+    """
+    return _stats.most_borrowed(count)
+
+@_in_memory
+def borrow_count(isbn):
+    """
+    Return how many times a book has been borrowed since the process started.
+    
+    Args:
+        isbn (str): ISBN of the book
+    
+    Returns:
+        int: Number of borrows
+    """
+    return _stats.borrow_count(isbn)
+
+@_in_memory
+def members_at_limit():
+    """
+    Return the members who have borrowed the maximum number of books.
+    
+    Returns:
+        set: Member IDs
+    """
+    return _stats.members_at_limit()
+
+@instrumented
+@_in_memory
+def place_hold(member_id, isbn):
+    """
+    Put a member in the queue for a book with no copies available to them.
+    
+    Instead of retrying borrow_book, the member is lent the next returned
+    copy once everyone ahead of them has been served. Members at the
+    borrowing limit keep their place but are passed over until they
+    return a book.
+    
+    Args:
+        member_id (str): Member ID
+        isbn (str): ISBN of the book
+    
+    Returns:
+        Status: Status.OK if the hold was placed, otherwise the reason it was not
+    """
+    with _locks.member_lock(member_id), _locks.book_lock(isbn):
+        member = members.get(member_id)
+        if not member:
+            return _report("place_hold", Status.MEMBER_NOT_FOUND, member_id=member_id, isbn=isbn)
+        
+        book = books.get(isbn)
+        if book is None:
+            return _report("place_hold", Status.BOOK_NOT_FOUND, member_id=member_id, isbn=isbn)
+        
+        if isbn in member.borrowed_books:
+            return _report("place_hold", Status.ALREADY_BORROWED, member_id=member_id, isbn=isbn,
+                           name=member['name'], title=book['title'])
+        
+        if _copies_for(member_id, isbn, book) > 0:
+            return _report("place_hold", Status.COPIES_AVAILABLE, member_id=member_id, isbn=isbn,
+                           name=member['name'], title=book['title'])
+        
+        if _holds.position(member_id, isbn) is not None:
+            return _report("place_hold", Status.ALREADY_HELD, member_id=member_id, isbn=isbn,
+                           name=member['name'], title=book['title'])
+        
+        position = _holds.place(member_id, isbn)
+        _notify("place_hold", member_id, isbn)
+        return _report("place_hold", Status.OK, member_id=member_id, isbn=isbn,
+                       name=member['name'], title=book['title'], position=position)
+
+@instrumented
+@_in_memory
+def cancel_hold(member_id, isbn):
+    """
+    Take a member out of the queue for a book.
+    
+    Args:
+        member_id (str): Member ID
+        isbn (str): ISBN of the book
+    
+    Returns:
+        Status: Status.OK if the hold was cancelled, otherwise the reason it was not
+    """
+    with _locks.member_lock(member_id), _locks.book_lock(isbn):
+        member = members.get(member_id)
+        if not member:
+            return _report("cancel_hold", Status.MEMBER_NOT_FOUND, member_id=member_id, isbn=isbn)
+        
+        book = books.get(isbn)
+        if book is None:
+            return _report("cancel_hold", Status.BOOK_NOT_FOUND, member_id=member_id, isbn=isbn)
+        
+        if not _holds.cancel(member_id, isbn):
+            return _report("cancel_hold", Status.NOT_HELD, member_id=member_id, isbn=isbn,
+                           name=member['name'], title=book['title'])
+        
+        _notify("cancel_hold", member_id, isbn)
+        return _report("cancel_hold", Status.OK, member_id=member_id, isbn=isbn,
+                       name=member['name'], title=book['title'])
+
+@_in_memory
+def hold_position(member_id, isbn):
+    """
+    Return a member's place in the queue for a book, without walking the queue.
+    
+    Args:
+        member_id (str): Member ID
+        isbn (str): ISBN of the book
+    
+    Returns:
+        int: 1 if the member is next in line, or None if they have no hold on the book
+    """
+    return _holds.position(member_id, isbn)
+
+@_in_memory
+def member_holds(member_id):
+    """
+    Return the books a member is waiting for.
+    
+    Args:
+        member_id (str): Member ID
+    
+    Returns:
+        list: ISBNs in the order the holds were placed
+    """
+    return _holds.holds_of(member_id)
+
+@_in_memory
+def holds_waiting(isbn):
+    """
+    Return how many members are waiting for a book.
+    
+    Args:
+        isbn (str): ISBN of the book
+    
+    Returns:
+        int: Number of holds on the book
+    """
+    return _holds.waiting(isbn)
+
+@_backed
+def iter_books(offset=0, limit=None):
+    """
+    Iterate over books in catalog order, one at a time.
+    
+    Args:
+        offset (int): Number of books to skip
+        limit (int): Maximum number of books to yield, or None for all
+    
+    Yields:
+        tuple: (isbn, book) pairs
+    """
+    stop = None if limit is None else offset + limit
+    return islice(books.items(), offset, stop)
+
+@_backed
+def iter_members(offset=0, limit=None):
+    """
+    Iterate over members in the order they were added, one at a time.
+    
+    Args:
+        offset (int): Number of members to skip
+        limit (int): Maximum number of members to yield, or None for all
+    
+    Yields:
+        Member: Member records
+    """
+    stop = None if limit is None else offset + limit
+    return islice(members, offset, stop)
+
+@instrumented
+def display_books(offset=0, limit=None, renderer="text", page_size=DEFAULT_PAGE_SIZE, file=None):
+    """
+    Display books in the system, a page at a time.
+    
+    Args:
+        offset (int): Number of books to skip
+        limit (int): Maximum number of books to display, or None for all
+        renderer (str or object): "text", "csv", "json", or a renderer object
+        page_size (int): Books rendered and written together
+        file: File to write to; defaults to standard output
+    
+    Returns:
+        int: Number of books displayed
+    """
+    renderer = get_renderer(renderer)
+    out = file or sys.stdout
+    if next(iter(iter_books(0, 1)), None) is None:
+        out.write(renderer.empty("books"))
+        return 0
+    
+    out.write(renderer.header("books"))
+    count = 0
+    for page in batched(iter_books(offset, limit), page_size):
+        out.write(renderer.books(page))
+        count += len(page)
+    return count
+
+@instrumented
+def display_members(offset=0, limit=None, renderer="text", page_size=DEFAULT_PAGE_SIZE, file=None):
+    """
+    Display members in the system, a page at a time.
+    
+    Args:
+        offset (int): Number of members to skip
+        limit (int): Maximum number of members to display, or None for all
+        renderer (str or object): "text", "csv", "json", or a renderer object
+        page_size (int): Members rendered and written together
+        file: File to write to; defaults to standard output
+    
+    Returns:
+        int: Number of members displayed
+    """
+    renderer = get_renderer(renderer)
+    out = file or sys.stdout
+    if next(iter(iter_members(0, 1)), None) is None:
+        out.write(renderer.empty("members"))
+        return 0
+    
+    out.write(renderer.header("members"))
+    get_book = books.get if _backend is None else _backend.get_book
+    count = 0
+    for page in batched(iter_members(offset, limit), page_size):
+        # Look up each borrowed book once per page
+        titles = {}
+        for member in page:
             for isbn in member['borrowed_books']:
-                if isbn in books:
-                    print(f"      - {books[isbn]['title']} (ISBN: {isbn})")
-        print()
+                if isbn not in titles:
+                    book = get_book(isbn)
+                    if book is not None:
+                        titles[isbn] = book['title']
+        out.write(renderer.members(page, titles))
+        count += len(page)
+    return count
 
 def get_genres():
     """Return the tuple of valid genres."""
@@ -0,0 +1,263 @@
+"""
+Parallel catalog scans for the Mini Library Management System.
+The lowercased titles and authors are packed into one string per field
+and handed to a pool of worker processes once, when the pool starts, so
+queries do not send the catalog to the workers. A query is split into
+chunks of the catalog that the workers scan at once. Books changed
+since the snapshot was taken are checked in-process, and the snapshot
+is rebuilt in the background once enough of the catalog has changed.
+"""
+
+import os
+import threading
+from array import array
+from bisect import bisect_right
+
+from search_index import SEARCH_FIELDS
+
+# Catalog size from which search_books scans in parallel
+DEFAULT_THRESHOLD = 1_000_000
+
+# Share of the catalog that may change before the snapshot is rebuilt
+DEFAULT_REBUILD_FRACTION = 0.01
+
+# Changed books always allowed before rebuilding, for small catalogs
+MIN_REBUILD_CHANGES = 1000
+
+# Separates the texts of a field, so a match never spans two books
+SEPARATOR = "\x00"
+
+# Operations after which the snapshot no longer matches the catalog
+_CATALOG_CHANGES = ("add_book", "update_book", "delete_book")
+
+# Snapshot installed in every worker: field -> (text, start of each book)
+_snapshot = None
+
+
+def _install(snapshot):
+    """Worker initializer: keep the snapshot for the worker's lifetime."""
+    global _snapshot
+    _snapshot = snapshot
+
+
+def _scan(search_by, term, first, last):
+    """Return the numbers of the books in [first, last) whose field contains term."""
+    text, starts = _snapshot[search_by]
+    end = starts[last] if last < len(starts) else len(text)
+    matches = []
+    position = text.find(term, starts[first], end)
+    while position != -1:
+        book = bisect_right(starts, position, first, last) - 1
+        matches.append(book)
+        # Continue from the next book so each book is reported once
+        if book + 1 >= last:
+            break
+        position = text.find(term, starts[book + 1], end)
+    return matches
+
+
+class _Changes:
+    """
+    Books changed since a snapshot was taken.
+
+    changed holds the ISBNs whose snapshot entry is out of date (updated
+    or deleted books); added holds the books added since, in catalog
+    order. A book updated after being added only needs to stay in added,
+    as added books are always read from the catalog.
+    """
+
+    __slots__ = ('changed', 'added')
+
+    def __init__(self):
+        self.changed = set()
+        self.added = {}
+
+    def __len__(self):
+        return len(self.changed) + len(self.added)
+
+    def record(self, operation, isbn):
+        if operation == "add_book":
+            self.added[isbn] = None
+        elif operation == "delete_book":
+            self.added.pop(isbn, None)
+            self.changed.add(isbn)
+        elif isbn not in self.added:
+            self.changed.add(isbn)
+
+
+class ParallelSearcher:
+    """
+    Substring search over a catalog snapshot on a process pool.
+
+    Register observe with operations.add_observer so the searcher knows
+    which books changed. Changed books are checked in-process on every
+    search, so writes never wait for a rebuild. Once more than
+    rebuild_fraction of the catalog has changed, a new snapshot and pool
+    are built on a background thread and swapped in when ready. Until
+    the first snapshot is ready, search returns None and the caller
+    scans in-process.
+
+    Workers are started from a fork server rather than forked from this
+    process, which may be running other threads (log snapshots, event
+    sinks), and receive the snapshot once, when they start.
+
+    Args:
+        workers (int): Worker processes; defaults to the number of CPUs
+        chunks_per_worker (int): Chunks each query is split into per worker
+        rebuild_fraction (float): Share of the catalog that may change
+            before the snapshot is rebuilt
+        lock (threading.Lock): Lock held while the catalog is searched or
+            changed, e.g. operations._catalog_lock; the searcher takes it
+            to copy the catalog and to swap in a new snapshot
+    """
+
+    def __init__(self, workers=None, chunks_per_worker=4, rebuild_fraction=DEFAULT_REBUILD_FRACTION, lock=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunks_per_worker = chunks_per_worker
+        self.rebuild_fraction = rebuild_fraction
+        self._lock = lock if lock is not None else threading.Lock()
+        self._pool = None
+        self._catalog = None
+        self._isbns = []
+        self._positions = {}        # ISBN -> book number in the snapshot
+        self._changes = _Changes()
+        # Changes since the catalog was copied for the rebuild in progress
+        self._next_changes = None
+        self._generation = 0
+        self._rebuild_thread = None
+
+    def invalidate(self):
+        """Discard the snapshot, e.g. after the catalog was cleared."""
+        self._generation += 1
+        self._catalog = None
+
+    def observe(self, operation, args, kwargs):
+        """Observer for operations.add_observer: record catalog changes."""
+        if operation in _CATALOG_CHANGES:
+            self._changes.record(operation, args[0])
+            next_changes = self._next_changes
+            if next_changes is not None:
+                next_changes.record(operation, args[0])
+
+    def wait(self, timeout=None):
+        """
+        Wait for a snapshot rebuild in progress to finish.
+
+        Returns:
+            bool: True if a snapshot is ready to search
+        """
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self._catalog is not None
+
+    def close(self):
+        """Wait for any rebuild, then shut down the worker processes."""
+        self.wait()
+        self.invalidate()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def search(self, catalog, search_term, search_by="title"):
+        """
+        Find books whose field contains search_term, ignoring case.
+
+        Must be called with the searcher's lock held.
+
+        Args:
+            catalog (dict): Catalog of Book records keyed by ISBN
+            search_term (str): Substring to search for
+            search_by (str): Field to search - "title" or "author"
+
+        Returns:
+            list: Matching ISBNs in catalog order, or None if no snapshot
+                of this catalog is ready yet
+        """
+        if catalog is not self._catalog:
+            self._start_rebuild(catalog)
+            return None
+        changes = self._changes
+        if len(changes) > max(MIN_REBUILD_CHANGES, self.rebuild_fraction * len(self._isbns)):
+            self._start_rebuild(catalog)
+        term = search_term.lower()
+        if SEPARATOR in term:
+            return []
+
+        # Chunks of the snapshot are submitted and collected in catalog order
+        isbns = self._isbns
+        count = len(isbns)
+        chunks = min(count, self.workers * self.chunks_per_worker)
+        bounds = [count * n // chunks for n in range(chunks + 1)] if chunks else []
+        futures = [self._pool.submit(_scan, search_by, term, bounds[n], bounds[n + 1])
+                   for n in range(chunks) if bounds[n] < bounds[n + 1]]
+        numbers = [book for future in futures for book in future.result()]
+
+        # Books changed since the snapshot are checked against the catalog
+        changed = changes.changed
+        added = changes.added
+        if changed:
+            numbers = [book for book in numbers if isbns[book] not in changed]
+            positions = self._positions
+            for isbn in changed:
+                book = catalog.get(isbn)
+                if (book is not None and isbn in positions and isbn not in added
+                        and term in book[search_by].lower()):
+                    numbers.append(positions[isbn])
+            numbers.sort()
+        results = [isbns[book] for book in numbers]
+        results.extend(isbn for isbn in added if term in catalog[isbn][search_by].lower())
+        return results
+
+    def _start_rebuild(self, catalog):
+        if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+            return
+        self._rebuild_thread = threading.Thread(target=self._rebuild, args=(catalog,),
+                                                name="parallel-search-rebuild", daemon=True)
+        self._rebuild_thread.start()
+
+    def _rebuild(self, catalog):
+        # Copy the catalog and start recording changes at the same moment
+        with self._lock:
+            generation = self._generation
+            items = list(catalog.items())
+            self._next_changes = _Changes()
+
+        # Texts are read outside the lock; a book updated meanwhile is
+        # in the new change set, so its snapshot entry is never used
+        isbns = [isbn for isbn, _ in items]
+        snapshot = {}
+        for field in SEARCH_FIELDS:
+            texts = [book[field].lower() for _, book in items]
+            starts = array("q")
+            position = 0
+            for text in texts:
+                starts.append(position)
+                position += len(text) + 1
+            snapshot[field] = (SEPARATOR.join(texts) + SEPARATOR, starts)
+        positions = {isbn: number for number, isbn in enumerate(isbns)}
+        pool = self._start_pool(snapshot)
+
+        with self._lock:
+            if generation == self._generation:
+                pool, self._pool = self._pool, pool
+                self._isbns = isbns
+                self._positions = positions
+                self._changes = self._next_changes
+                self._catalog = catalog
+            self._next_changes = None
+        # Shut down whichever pool is no longer used
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _start_pool(self, snapshot):
+        # multiprocessing is only imported here, as it is slow to import
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method),
+                                   initializer=_install, initargs=(snapshot,))
+        # Start every worker now rather than on the first query
+        for future in [pool.submit(len, "") for _ in range(self.workers)]:
+            future.result()
+        return pool
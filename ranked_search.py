@@ -0,0 +1,344 @@
+"""
+Fuzzy ranked search for the Mini Library Management System.
+Titles and authors are indexed together as word postings. Query words
+are matched against the vocabulary through a trigram index, so
+misspellings such as "fitzgerlad" still find "fitzgerald", and the
+matching books are scored with BM25 and the best ones kept with a heap.
+Postings of common words are skipped (MaxScore) once they can no longer
+change the top results, so frequent words stay cheap on large catalogs.
+"""
+
+import heapq
+import math
+from array import array
+from operator import itemgetter
+
+from search_index import SEARCH_FIELDS, tokenize
+
+# BM25 parameters: term frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# Marks the start and end of a word, so short words still have trigrams
+PAD = "$"
+
+# Removed books are only dropped from the postings in indexes at least this large
+COMPACT_MINIMUM = 1024
+
+
+def word_trigrams(word):
+    """Return the set of trigrams of a word padded with PAD on both sides."""
+    padded = PAD + word + PAD
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def allowed_edits(word):
+    """Typos tolerated in a query word: none up to 3 letters, 1 up to 7, then 2."""
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) <= 7 else 2
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein distance between two words, giving up past limit.
+
+    Only the diagonal band of width limit on each side is computed, since
+    cells outside it already exceed the limit.
+
+    Returns:
+        int: The distance, or limit + 1 if it is larger than limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [over] * len(b)
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char_a != b[j - 1]))
+        if min(current) > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+class RankedIndex:
+    """
+    BM25 index over the words of every book's title and author.
+
+    Books are numbered in the order they are indexed. The index keeps:
+        - the books using every word, as arrays of book numbers grouped
+          by book length, since shorter books score higher for a word
+        - the distinct words and the word count of every book
+        - a trigram index over the vocabulary, for typo-tolerant lookups
+
+    Everything per book is held in flat arrays rather than per-book
+    dictionaries, so a million-title catalog stays affordable. Removed
+    books are marked deleted and skipped until the index is compacted.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Remove every book from the index."""
+        self._words = []            # word number -> word
+        self._word_numbers = {}     # word -> word number
+        self._word_grams = {}       # trigram -> array of word numbers
+        self._gram_counts = array("B")  # word number -> distinct trigrams
+        self._postings = []         # word number -> {book length: array of book numbers}
+        self._document_frequency = []
+        self._repeats = {}          # word number -> {book number: count > 1}
+        self._isbns = []            # book number -> ISBN, None once removed
+        self._book_numbers = {}     # ISBN -> book number
+        self._lengths = array("I")  # book number -> words in title and author
+        self._starts = array("Q", [0])
+        self._book_words = array("I")  # distinct words of each book, from its start
+        self._total_length = 0
+        self._longest = 0
+
+    def __len__(self):
+        return len(self._book_numbers)
+
+    def add(self, isbn, book):
+        """
+        Index a book, replacing any earlier version of it.
+
+        Args:
+            isbn (str): ISBN of the book
+            book (dict): Book details containing 'title' and 'author'
+        """
+        if isbn in self._book_numbers:
+            self.remove(isbn)
+        number = len(self._isbns)
+        self._isbns.append(isbn)
+        self._book_numbers[isbn] = number
+
+        counts = {}
+        for field in SEARCH_FIELDS:
+            for word in tokenize(book[field].lower()):
+                word_number = self._word_number(word)
+                counts[word_number] = counts.get(word_number, 0) + 1
+        length = sum(counts.values())
+        for word_number, count in counts.items():
+            postings = self._postings[word_number].get(length)
+            if postings is None:
+                postings = self._postings[word_number][length] = array("I")
+            postings.append(number)
+            self._document_frequency[word_number] += 1
+            if count > 1:
+                self._repeats.setdefault(word_number, {})[number] = count
+        self._book_words.extend(counts)
+        self._starts.append(len(self._book_words))
+        self._lengths.append(length)
+        self._total_length += length
+        self._longest = max(self._longest, length)
+
+    def remove(self, isbn):
+        """
+        Remove a book from the index.
+
+        Args:
+            isbn (str): ISBN of the book
+        """
+        number = self._book_numbers.pop(isbn)
+        self._isbns[number] = None
+        for word_number in self._book_words[self._starts[number]:self._starts[number + 1]]:
+            self._document_frequency[word_number] -= 1
+        self._total_length -= self._lengths[number]
+        # Renumber once removed books make up most of the postings
+        if len(self._isbns) > COMPACT_MINIMUM and len(self._book_numbers) < len(self._isbns) // 2:
+            self._compact()
+
+    def search(self, query, limit=10):
+        """
+        Find the books that best match a query, tolerating typos.
+
+        Every query word contributes the BM25 score of its best matching
+        vocabulary word, weighted down by the number of typos needed.
+
+        Args:
+            query (str): Words to search for in titles and authors
+            limit (int): Maximum number of results
+
+        Returns:
+            list: (isbn, score) pairs, best match first
+        """
+        count = len(self._book_numbers)
+        if not count:
+            return []
+        # BM25 length normalization for every book length, for this query
+        average_length = self._total_length / count
+        norms = [K1 * (1 - B + B * length / average_length) for length in range(self._longest + 1)]
+        single = [(K1 + 1) / (1 + norm) for norm in norms]
+
+        # One term per vocabulary word matched by a query word, with its idf
+        # weighted by the typos needed and the most it adds to any score:
+        # the score of its shortest book, or of a book repeating the word
+        words = list(set(tokenize(query.lower())))
+        terms = []
+        for position, word in enumerate(words):
+            for word_number, weight in self._expand(word):
+                frequency = self._document_frequency[word_number]
+                if frequency:
+                    idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5)) * weight
+                    bound = idf * single[min(self._postings[word_number])]
+                    for number, tf in self._repeats.get(word_number, {}).items():
+                        bound = max(bound, idf * tf * (K1 + 1) / (tf + norms[self._lengths[number]]))
+                    terms.append((bound, position, word_number, idf))
+        terms.sort(reverse=True)
+
+        # A query word adds the score of its best matching term to a book.
+        # ceiling holds the most each query word can still add to a book not
+        # found yet: the bound of its next unprocessed term.
+        ceiling = [0.0] * len(words)
+        following = []
+        for bound, position, _, _ in reversed(terms):
+            following.append(ceiling[position])
+            ceiling[position] = bound
+        following.reverse()
+
+        isbns = self._isbns
+        best = [{} for _ in words]
+        scores = {}
+        # Score of the limit-th best book when last computed. Scores only
+        # grow, so it stays a lower bound and is recomputed as books are found.
+        threshold = 0.0
+        computed = 0
+        for index, (bound, position, word_number, idf) in enumerate(terms):
+            found = best[position]
+            # Books using the word more than once outscore every other book
+            # of the same length, so they are scored first
+            repeats = self._repeats.get(word_number, {})
+            for number, tf in repeats.items():
+                if isbns[number] is not None:
+                    score = idf * tf * (K1 + 1) / (tf + norms[self._lengths[number]])
+                    previous = found.get(number, 0.0)
+                    if score > previous:
+                        found[number] = score
+                        scores[number] = scores.get(number, 0.0) + score - previous
+
+            # Every other book scores by its length alone, shortest first
+            buckets = self._postings[word_number]
+            for length in sorted(buckets):
+                postings = buckets[length]
+                score = idf * single[length]
+                # MaxScore: once no unseen book can reach the current top
+                # results, skip the remaining postings and only rescore the
+                # books already found
+                if len(scores) >= limit > 0:
+                    if len(scores) >= 2 * computed or len(postings) > len(scores):
+                        threshold = heapq.nlargest(limit, scores.values())[-1]
+                        computed = len(scores)
+                    ceiling[position] = max(score, following[index])
+                    if threshold >= sum(ceiling):
+                        self._rescore(terms[index:], best, scores, norms, ceiling, threshold)
+                        break
+                for number in postings:
+                    if isbns[number] is None or number in repeats:
+                        continue
+                    previous = found.get(number, 0.0)
+                    if score > previous:
+                        found[number] = score
+                        scores[number] = scores.get(number, 0.0) + score - previous
+            else:
+                ceiling[position] = following[index]
+                continue
+            break
+
+        # Keep the best results with a heap instead of sorting every match
+        top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [(isbns[number], score) for number, score in top]
+
+    def _rescore(self, terms, best, scores, norms, ceiling, threshold):
+        # Apply the remaining terms to the books already found, reading each
+        # book's own words instead of the terms' postings. Books that cannot
+        # pass the threshold even with the best remaining scores are skipped.
+        remaining = {}
+        for _, position, word_number, idf in terms:
+            remaining.setdefault(word_number, []).append((position, idf))
+        for number, total in scores.items():
+            gain = 0.0
+            for position, most in enumerate(ceiling):
+                gain += max(0.0, most - best[position].get(number, 0.0))
+            if total + gain <= threshold:
+                continue
+            length = self._lengths[number]
+            for word_number in self._book_words[self._starts[number]:self._starts[number + 1]]:
+                for position, idf in remaining.get(word_number, ()):
+                    tf = self._repeats.get(word_number, {}).get(number, 1)
+                    score = idf * tf * (K1 + 1) / (tf + norms[length])
+                    previous = best[position].get(number, 0.0)
+                    if score > previous:
+                        best[position][number] = score
+                        scores[number] += score - previous
+
+    def _compact(self):
+        # Renumber the remaining books, dropping removed ones from the postings
+        renumbered = {}
+        isbns = []
+        lengths = array("I")
+        starts = array("Q", [0])
+        book_words = array("I")
+        for old, isbn in enumerate(self._isbns):
+            if isbn is None:
+                continue
+            renumbered[old] = len(isbns)
+            isbns.append(isbn)
+            lengths.append(self._lengths[old])
+            book_words.extend(self._book_words[self._starts[old]:self._starts[old + 1]])
+            starts.append(len(book_words))
+        self._postings = [{length: array("I", (renumbered[old] for old in postings if old in renumbered))
+                           for length, postings in buckets.items()}
+                          for buckets in self._postings]
+        self._repeats = {word_number: {renumbered[old]: count for old, count in repeats.items()
+                                       if old in renumbered}
+                         for word_number, repeats in self._repeats.items()}
+        self._isbns = isbns
+        self._book_numbers = {isbn: number for number, isbn in enumerate(isbns)}
+        self._lengths = lengths
+        self._starts = starts
+        self._book_words = book_words
+
+    def _word_number(self, word):
+        number = self._word_numbers.get(word)
+        if number is None:
+            number = self._word_numbers[word] = len(self._words)
+            self._words.append(word)
+            self._postings.append({})
+            self._document_frequency.append(0)
+            grams = word_trigrams(word)
+            self._gram_counts.append(min(len(grams), 255))
+            for gram in grams:
+                numbers = self._word_grams.get(gram)
+                if numbers is None:
+                    numbers = self._word_grams[gram] = array("I")
+                numbers.append(number)
+        return number
+
+    def _expand(self, word):
+        # Vocabulary words within the allowed edits of word, with weights
+        # that fall with every edit. Exact matches weigh 1.
+        limit = allowed_edits(word)
+        exact = self._word_numbers.get(word)
+        if limit == 0:
+            return [] if exact is None else [(exact, 1.0)]
+
+        # Each edit changes at most three padded trigrams, so a match within
+        # limit edits shares all but 3 * limit of the trigrams of either word
+        grams = word_trigrams(word)
+        shared = {}
+        for gram in grams:
+            for number in self._word_grams.get(gram, ()):
+                shared[number] = shared.get(number, 0) + 1
+
+        matches = []
+        for number, common in shared.items():
+            if common < max(len(grams), self._gram_counts[number]) - 3 * limit:
+                continue
+            distance = 0 if number == exact else edit_distance(word, self._words[number], limit)
+            if distance <= limit:
+                matches.append((number, 1 - distance / (len(word) + 1)))
+        return matches
@@ -0,0 +1,135 @@
+"""
+Compact record types for the Mini Library Management System.
+Books and members are stored as small fixed-layout objects instead of
+dictionaries, but still support dictionary-style access such as
+book['title'] and member['borrowed_books'].
+"""
+
+from collections.abc import Mapping
+
+# Genres: Tuple of valid genres
+GENRES = ("Fiction", "Non-Fiction", "Sci-Fi", "Mystery", "Romance", "Biography", "History", "Science")
+
+# Genre name to its index in GENRES, so books can store a small int
+GENRE_CODES = {genre: code for code, genre in enumerate(GENRES)}
+
+# Maximum number of books a member can borrow at once
+MAX_BORROWED = 3
+
+
+class Book(Mapping):
+    """
+    A book record.
+
+    The genre is stored as its index into GENRES. Reading or writing
+    book['genre'] converts to and from the genre name.
+    """
+
+    __slots__ = ('title', 'author', 'genre_code', 'total_copies', 'available_copies')
+
+    FIELDS = ('title', 'author', 'genre', 'total_copies', 'available_copies')
+
+    def __init__(self, title, author, genre, total_copies, available_copies=None):
+        self.title = title
+        self.author = author
+        self.genre_code = GENRE_CODES[genre]
+        self.total_copies = total_copies
+        self.available_copies = total_copies if available_copies is None else available_copies
+
+    @property
+    def genre(self):
+        """Genre name of the book."""
+        return GENRES[self.genre_code]
+
+    @genre.setter
+    def genre(self, value):
+        self.genre_code = GENRE_CODES[value]
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __repr__(self):
+        return f"Book({dict(self)!r})"
+
+
+class Member(Mapping):
+    """
+    A member record.
+
+    Borrowed ISBNs are kept in a tuple, which never holds more than
+    MAX_BORROWED entries. member['borrowed_books'] returns that tuple.
+    """
+
+    __slots__ = ('member_id', 'name', 'email', '_borrowed')
+
+    FIELDS = ('member_id', 'name', 'email', 'borrowed_books')
+
+    def __init__(self, member_id, name, email, borrowed_books=()):
+        self.member_id = member_id
+        self.name = name
+        self.email = email
+        self.borrowed_books = borrowed_books
+
+    @property
+    def borrowed_books(self):
+        """Tuple of ISBNs the member currently has borrowed."""
+        return self._borrowed
+
+    @borrowed_books.setter
+    def borrowed_books(self, isbns):
+        isbns = tuple(isbns)
+        if len(isbns) > MAX_BORROWED:
+            raise ValueError(f"A member can borrow at most {MAX_BORROWED} books.")
+        self._borrowed = isbns
+
+    def add_borrowed(self, isbn):
+        """
+        Record that the member borrowed a book.
+
+        Args:
+            isbn (str): ISBN of the borrowed book
+        """
+        self.borrowed_books = self._borrowed + (isbn,)
+
+    def remove_borrowed(self, isbn):
+        """
+        Record that the member returned a book.
+
+        Args:
+            isbn (str): ISBN of the returned book
+        """
+        borrowed = list(self._borrowed)
+        borrowed.remove(isbn)
+        self._borrowed = tuple(borrowed)
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __repr__(self):
+        return f"Member({dict(self)!r})"
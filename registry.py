@@ -0,0 +1,132 @@
+"""
+Record collections for the Mini Library Management System.
+Keeps members in a hash index keyed by member ID so lookups, inserts
+and deletes take constant time, while still behaving like the old
+members list for code that iterates over it. Both collections tell the
+indexes built on top of them when they are cleared.
+"""
+
+
+class BookCatalog(dict):
+    """
+    Dictionary of books keyed by ISBN.
+
+    Behaves exactly like a dict, but runs registered clear hooks when
+    cleared so that indexes kept alongside the catalog can reset too.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._clear_hooks = []
+
+    def add_clear_hook(self, hook):
+        """
+        Register a function to call whenever the catalog is cleared.
+
+        Args:
+            hook (callable): Function taking no arguments
+        """
+        self._clear_hooks.append(hook)
+
+    def clear(self):
+        """Remove all books and reset any registered indexes."""
+        super().clear()
+        for hook in self._clear_hooks:
+            hook()
+
+
+class MemberRegistry:
+    """
+    Collection of member records indexed by member ID.
+
+    Members are stored in a dictionary (which preserves insertion order),
+    so iterating the registry yields members in the order they were added,
+    exactly like the list it replaces.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._clear_hooks = []
+
+    def add_clear_hook(self, hook):
+        """
+        Register a function to call whenever the registry is cleared.
+
+        Args:
+            hook (callable): Function taking no arguments
+        """
+        self._clear_hooks.append(hook)
+
+    def get(self, member_id, default=None):
+        """
+        Look up a member by ID.
+
+        Args:
+            member_id (str): Member ID to look up
+            default: Value returned when the member does not exist
+
+        Returns:
+            Member: The member record, or default if not found
+        """
+        return self._by_id.get(member_id, default)
+
+    def ids(self):
+        """Return a set-like view of all member IDs."""
+        return self._by_id.keys()
+
+    def add(self, member):
+        """
+        Add a member record to the registry.
+
+        Args:
+            member (Member): Member record
+
+        Returns:
+            bool: True if added, False if the member ID is already taken
+        """
+        member_id = member['member_id']
+        if member_id in self._by_id:
+            return False
+        self._by_id[member_id] = member
+        return True
+
+    def remove(self, member_id):
+        """
+        Remove a member by ID.
+
+        Args:
+            member_id (str): Member ID to remove
+
+        Returns:
+            Member: The removed member record, or None if not found
+        """
+        return self._by_id.pop(member_id, None)
+
+    # List compatibility: existing code appends to and iterates over members
+
+    def append(self, member):
+        """Add a member record, raising ValueError on a duplicate ID."""
+        if not self.add(member):
+            raise ValueError(f"Member with ID {member['member_id']} already exists.")
+
+    def clear(self):
+        """Remove all members and reset any registered indexes."""
+        self._by_id.clear()
+        for hook in self._clear_hooks:
+            hook()
+
+    def __contains__(self, member_id):
+        return member_id in self._by_id
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __getitem__(self, index):
+        # Positional access is O(N) and only kept for old list-style code
+        return list(self._by_id.values())[index]
+
+    def __repr__(self):
+        return f"MemberRegistry({list(self._by_id.values())!r})"
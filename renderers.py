@@ -0,0 +1,152 @@
+"""
+Output renderers for the Mini Library Management System.
+display_books and display_members hand each page of records to a
+renderer, which turns the whole page into one string so it can be
+written with a single call.
+"""
+
+import io
+
+# Columns written by the CSV renderer. The book columns can be read back
+# by add_books_bulk, and the member columns by add_members_bulk.
+BOOK_COLUMNS = ("isbn", "title", "author", "genre", "total_copies", "available_copies")
+MEMBER_COLUMNS = ("member_id", "name", "email", "borrowed_books")
+
+
+class TextRenderer:
+    """Human readable text, the format display_books has always printed."""
+
+    def empty(self, kind):
+        """Text written when there is nothing to display."""
+        return f"No {kind} in the system.\n"
+
+    def header(self, kind):
+        """Text written once, before the first page."""
+        return f"\n=== ALL {kind.upper()} ===\n"
+
+    def books(self, rows):
+        """
+        Render a page of books.
+
+        Args:
+            rows (list): (isbn, book) pairs
+
+        Returns:
+            str: The rendered page
+        """
+        parts = []
+        for isbn, book in rows:
+            parts.append(f"ISBN: {isbn}\n"
+                         f"  Title: {book['title']}\n"
+                         f"  Author: {book['author']}\n"
+                         f"  Genre: {book['genre']}\n"
+                         f"  Available: {book['available_copies']}/{book['total_copies']}\n\n")
+        return "".join(parts)
+
+    def members(self, rows, titles):
+        """
+        Render a page of members.
+
+        Args:
+            rows (list): Member records
+            titles (dict): Title of every borrowed book on the page, by ISBN
+
+        Returns:
+            str: The rendered page
+        """
+        parts = []
+        for member in rows:
+            borrowed = member['borrowed_books']
+            parts.append(f"ID: {member['member_id']}\n"
+                         f"  Name: {member['name']}\n"
+                         f"  Email: {member['email']}\n"
+                         f"  Borrowed Books: {len(borrowed)}\n")
+            if borrowed:
+                parts.append("    Books:\n")
+                for isbn in borrowed:
+                    if isbn in titles:
+                        parts.append(f"      - {titles[isbn]} (ISBN: {isbn})\n")
+            parts.append("\n")
+        return "".join(parts)
+
+
+class CsvRenderer:
+    """Comma-separated values with a header row."""
+
+    def empty(self, kind):
+        return self.header(kind)
+
+    def header(self, kind):
+        return self._write([BOOK_COLUMNS if kind == "books" else MEMBER_COLUMNS])
+
+    def books(self, rows):
+        return self._write([isbn, book['title'], book['author'], book['genre'],
+                            book['total_copies'], book['available_copies']]
+                           for isbn, book in rows)
+
+    def members(self, rows, titles):
+        # Borrowed ISBNs share one column, separated by semicolons
+        return self._write([member['member_id'], member['name'], member['email'],
+                            ";".join(member['borrowed_books'])]
+                           for member in rows)
+
+    def _write(self, rows):
+        # csv and json are imported on first use, keeping operations quick to import
+        import csv
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue()
+
+
+class JsonRenderer:
+    """JSON Lines: one JSON object per record."""
+
+    def empty(self, kind):
+        return ""
+
+    def header(self, kind):
+        return ""
+
+    def books(self, rows):
+        import json
+        return "".join(json.dumps({'isbn': isbn, 'title': book['title'], 'author': book['author'],
+                                   'genre': book['genre'], 'total_copies': book['total_copies'],
+                                   'available_copies': book['available_copies']}) + "\n"
+                       for isbn, book in rows)
+
+    def members(self, rows, titles):
+        import json
+        return "".join(json.dumps({'member_id': member['member_id'], 'name': member['name'],
+                                   'email': member['email'],
+                                   'borrowed_books': [{'isbn': isbn, 'title': titles.get(isbn)}
+                                                      for isbn in member['borrowed_books']]}) + "\n"
+                       for member in rows)
+
+
+# Renderers available by name
+RENDERERS = {
+    "text": TextRenderer,
+    "csv": CsvRenderer,
+    "json": JsonRenderer,
+}
+
+
+def get_renderer(renderer):
+    """
+    Resolve a renderer name, or pass through a renderer object.
+
+    Args:
+        renderer (str or object): "text", "csv", "json", or an object with
+            the same methods as TextRenderer
+
+    Returns:
+        object: The renderer
+
+    Raises:
+        ValueError: If the name is not a known renderer
+    """
+    if not isinstance(renderer, str):
+        return renderer
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{renderer}'. Valid renderers are: " + ", ".join(RENDERERS))
+    return RENDERERS[renderer]()
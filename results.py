@@ -0,0 +1,112 @@
+"""
+Operation results for the Mini Library Management System.
+Operations return a Status code instead of printing messages. The
+messages the system used to print are produced by an optional reporter.
+"""
+
+from enum import Enum
+
+from records import GENRES, MAX_BORROWED
+
+
+class Status(Enum):
+    """
+    Outcome of a library operation.
+
+    Status.OK is truthy and every other status is falsy, and statuses
+    compare equal to the True/False values operations used to return,
+    so existing checks such as add_book(...) == True keep working.
+    """
+
+    OK = "ok"
+    DUPLICATE_ISBN = "duplicate_isbn"
+    DUPLICATE_MEMBER = "duplicate_member"
+    INVALID_GENRE = "invalid_genre"
+    INVALID_COPIES = "invalid_copies"
+    INVALID_EMAIL = "invalid_email"
+    INVALID_SEARCH_FIELD = "invalid_search_field"
+    MALFORMED_ROW = "malformed_row"
+    BOOK_NOT_FOUND = "book_not_found"
+    MEMBER_NOT_FOUND = "member_not_found"
+    BORROW_LIMIT = "borrow_limit"
+    NO_COPIES = "no_copies"
+    ALREADY_BORROWED = "already_borrowed"
+    NOT_BORROWED = "not_borrowed"
+    BOOK_HAS_LOANS = "book_has_loans"
+    MEMBER_HAS_LOANS = "member_has_loans"
+    BATCH_ABORTED = "batch_aborted"
+    COPIES_AVAILABLE = "copies_available"
+    ALREADY_HELD = "already_held"
+    NOT_HELD = "not_held"
+    RESERVED = "reserved"
+
+    def __bool__(self):
+        return self is Status.OK
+
+    def __eq__(self, other):
+        if isinstance(other, bool):
+            return (self is Status.OK) == other
+        return self is other
+
+    __hash__ = Enum.__hash__
+
+
+# Message templates keyed by (operation, Status.OK) for successes and by
+# status for errors. Templates are filled from the details of each result.
+MESSAGES = {
+    ("add_book", Status.OK): "Book '{title}' by {author} added successfully.",
+    ("add_member", Status.OK): "Member '{name}' added successfully.",
+    ("update_book", Status.OK): "Book with ISBN {isbn} updated successfully.",
+    ("update_member", Status.OK): "Member with ID {member_id} updated successfully.",
+    ("delete_book", Status.OK): "Book '{title}' deleted successfully.",
+    ("delete_member", Status.OK): "Member '{name}' deleted successfully.",
+    ("borrow_book", Status.OK): "Member '{name}' successfully borrowed '{title}'.",
+    ("return_book", Status.OK): "Member '{name}' successfully returned '{title}'.",
+    ("place_hold", Status.OK): "Member '{name}' is number {position} in the queue for '{title}'.",
+    ("cancel_hold", Status.OK): "Member '{name}' cancelled the hold on '{title}'.",
+    Status.DUPLICATE_ISBN: "Error: Book with ISBN {isbn} already exists.",
+    Status.DUPLICATE_MEMBER: "Error: Member with ID {member_id} already exists.",
+    Status.INVALID_GENRE: "Error: Invalid genre '{genre}'. Valid genres are: " + ", ".join(GENRES),
+    Status.INVALID_COPIES: "Error: Total copies must be greater than 0.",
+    Status.INVALID_EMAIL: "Error: Invalid email format.",
+    Status.INVALID_SEARCH_FIELD: "Error: search_by must be 'title' or 'author'.",
+    Status.MALFORMED_ROW: "Error: Row is missing fields or has malformed values.",
+    Status.BOOK_NOT_FOUND: "Error: Book with ISBN {isbn} not found.",
+    Status.MEMBER_NOT_FOUND: "Error: Member with ID {member_id} not found.",
+    Status.BORROW_LIMIT: f"Error: Member '{{name}}' has already borrowed the maximum of {MAX_BORROWED} books.",
+    Status.NO_COPIES: "Error: No copies of '{title}' are available.",
+    Status.ALREADY_BORROWED: "Error: Member '{name}' has already borrowed '{title}'.",
+    Status.NOT_BORROWED: "Error: Member '{name}' has not borrowed '{title}'.",
+    Status.BOOK_HAS_LOANS: "Error: Cannot delete book '{title}' - it has borrowed copies.",
+    Status.MEMBER_HAS_LOANS: "Error: Cannot delete member '{name}' - they have borrowed books.",
+    Status.BATCH_ABORTED: "Error: '{title}' was not processed because another book in the batch failed.",
+    Status.COPIES_AVAILABLE: "Error: '{title}' has copies available to borrow.",
+    Status.ALREADY_HELD: "Error: Member '{name}' is already in the queue for '{title}'.",
+    Status.NOT_HELD: "Error: Member '{name}' is not in the queue for '{title}'.",
+    Status.RESERVED: "Error: The available copies of '{title}' are held for members in the queue.",
+}
+
+
+def format_message(operation, status, details):
+    """
+    Build the human readable message for an operation result.
+
+    Args:
+        operation (str): Name of the operation, e.g. "borrow_book"
+        status (Status): Outcome of the operation
+        details (dict): Values used to fill in the message template
+
+    Returns:
+        str: The formatted message
+    """
+    template = MESSAGES.get((operation, status)) or MESSAGES.get(status)
+    if template is None:
+        return f"{operation}: {status.value}"
+    return template.format(**details)
+
+
+class PrintReporter:
+    """Reporter that prints a message for every operation result."""
+
+    def __call__(self, operation, status, details):
+        print(format_message(operation, status, details))
@@ -0,0 +1,123 @@
+"""
+Search result cache for the Mini Library Management System.
+Popular queries are answered from a bounded LRU cache. When a book is
+added, changed or deleted, only the cached queries its title or author
+could match are evicted.
+"""
+
+import time
+from collections import OrderedDict
+
+from search_index import tokenize
+
+# Default number of cached queries
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class SearchCache:
+    """
+    LRU cache of search results with an optional time to live.
+
+    Entries are keyed by (lowercased search term, search_by, whole_words)
+    and hold the matching ISBNs, so cached results always show the
+    current state of each book.
+
+    Args:
+        max_entries (int): Maximum number of cached queries; 0 disables caching
+        ttl (float): Seconds an entry stays valid, or None to keep entries
+            until they are evicted
+        clock (callable): Function returning the current time in seconds
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def clear(self):
+        """Remove every cached query."""
+        self._entries.clear()
+
+    def get(self, key):
+        """
+        Look up a cached query.
+
+        Args:
+            key (tuple): (search term, search_by, whole_words)
+
+        Returns:
+            list: Matching ISBNs, or None if the query is not cached
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, isbns = entry
+            if expires is None or expires > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return isbns
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, isbns):
+        """
+        Cache the result of a query, evicting the least recently used
+        query if the cache is full.
+
+        Args:
+            key (tuple): (search term, search_by, whole_words)
+            isbns (list): Matching ISBNs
+        """
+        if self.max_entries <= 0:
+            return
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        self._entries[key] = (expires, isbns)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, book):
+        """
+        Evict every cached query whose results could include a book.
+
+        Call this with the book as it was before a change or deletion,
+        and as it is after an addition or change.
+
+        Args:
+            book (dict): Book details containing 'title' and 'author'
+        """
+        if not self._entries:
+            return
+        texts = {'title': book['title'].lower(), 'author': book['author'].lower()}
+        words = {}
+        stale = []
+        for key in self._entries:
+            term, search_by, whole_words = key
+            text = texts[search_by]
+            if whole_words:
+                if search_by not in words:
+                    words[search_by] = set(tokenize(text))
+                matches = set(tokenize(term)) <= words[search_by]
+            else:
+                matches = term in text
+            if matches:
+                stale.append(key)
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, invalidations and current size
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'invalidations': self.invalidations, 'size': len(self._entries)}
@@ -0,0 +1,215 @@
+"""
+Search index for the Mini Library Management System.
+Keeps a token index and a trigram index over book titles and authors so
+searches only look at books that can possibly match instead of
+scanning the whole catalog.
+"""
+
+import re
+
+# Fields that can be searched
+SEARCH_FIELDS = ("title", "author")
+
+# Pattern used to split text into word tokens
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split lowercased text into word tokens."""
+    return TOKEN_PATTERN.findall(text)
+
+
+def trigrams(text):
+    """Return the set of 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    Token and trigram index over book titles and authors.
+
+    For each searchable field the index keeps:
+        - the lowercased text of every book
+        - a posting set of ISBNs for every word token
+        - a posting set of ISBNs for every trigram
+
+    Results are returned in the order books were added to the catalog,
+    which is the same order a scan of the books dictionary produces.
+
+    Books added with add_deferred are queued and only indexed when the
+    index is next used, which keeps bulk imports fast.
+    """
+
+    def __init__(self):
+        self._text = {field: {} for field in SEARCH_FIELDS}
+        self._tokens = {field: {} for field in SEARCH_FIELDS}
+        self._trigrams = {field: {} for field in SEARCH_FIELDS}
+        self._order = {}
+        self._next_order = 0
+        self._pending = []
+
+    def clear(self):
+        """Remove every book from the index."""
+        for field in SEARCH_FIELDS:
+            self._text[field].clear()
+            self._tokens[field].clear()
+            self._trigrams[field].clear()
+        self._order.clear()
+        self._next_order = 0
+        self._pending.clear()
+
+    def add_deferred(self, isbn, book):
+        """
+        Queue a newly added book to be indexed on the next index access.
+
+        Args:
+            isbn (str): ISBN of the book
+            book (dict): Book details containing 'title' and 'author'
+        """
+        self._pending.append((isbn, book))
+
+    def add(self, isbn, book):
+        """
+        Index a newly added book.
+
+        Args:
+            isbn (str): ISBN of the book
+            book (dict): Book details containing 'title' and 'author'
+        """
+        if self._pending:
+            self._flush()
+        self._add(isbn, book)
+
+    def update(self, isbn, book):
+        """
+        Re-index a book whose title or author changed.
+
+        The book keeps its position in the result order, just like an
+        updated entry keeps its position in the books dictionary.
+
+        Args:
+            isbn (str): ISBN of the book
+            book (dict): Updated book details
+        """
+        if self._pending:
+            self._flush()
+        for field in SEARCH_FIELDS:
+            if self._text[field][isbn] != book[field].lower():
+                self._unindex_field(field, isbn)
+                self._index_field(field, isbn, book[field])
+
+    def remove(self, isbn):
+        """
+        Remove a book from the index.
+
+        Args:
+            isbn (str): ISBN of the book
+        """
+        if self._pending:
+            self._flush()
+        for field in SEARCH_FIELDS:
+            self._unindex_field(field, isbn)
+            del self._text[field][isbn]
+        del self._order[isbn]
+
+    def search(self, search_term, search_by="title"):
+        """
+        Find books whose field contains search_term, ignoring case.
+
+        Args:
+            search_term (str): Substring to search for
+            search_by (str): Field to search - "title" or "author"
+
+        Returns:
+            list: Matching ISBNs in catalog order
+        """
+        if self._pending:
+            self._flush()
+        term = search_term.lower()
+        texts = self._text[search_by]
+
+        # Terms shorter than a trigram match most of the catalog anyway,
+        # so scan the prelowered text in catalog order
+        if len(term) < 3:
+            return [isbn for isbn, text in texts.items() if term in text]
+
+        candidates = self._intersect(self._trigrams[search_by], trigrams(term))
+        matches = [isbn for isbn in candidates if term in texts[isbn]]
+        return self._in_order(matches)
+
+    def search_words(self, search_term, search_by="title"):
+        """
+        Find books whose field contains every word of search_term.
+
+        Args:
+            search_term (str): One or more words to search for
+            search_by (str): Field to search - "title" or "author"
+
+        Returns:
+            list: Matching ISBNs in catalog order
+        """
+        if self._pending:
+            self._flush()
+        words = set(tokenize(search_term.lower()))
+        if not words:
+            return []
+        return self._in_order(self._intersect(self._tokens[search_by], words))
+
+    def _add(self, isbn, book):
+        self._order[isbn] = self._next_order
+        self._next_order += 1
+        for field in SEARCH_FIELDS:
+            self._index_field(field, isbn, book[field])
+
+    def _flush(self):
+        # Index queued books in the order they were added. Books leave the
+        # queue once indexed, so if one raises, it is dropped and the books
+        # behind it stay queued for the next flush
+        pending = self._pending
+        done = 0
+        try:
+            for isbn, book in pending:
+                done += 1
+                self._add(isbn, book)
+        finally:
+            del pending[:done]
+
+    def _index_field(self, field, isbn, value):
+        text = value.lower()
+        self._text[field][isbn] = text
+        postings = self._tokens[field]
+        for token in set(tokenize(text)):
+            postings.setdefault(token, set()).add(isbn)
+        postings = self._trigrams[field]
+        for gram in trigrams(text):
+            postings.setdefault(gram, set()).add(isbn)
+
+    def _unindex_field(self, field, isbn):
+        text = self._text[field][isbn]
+        for postings, keys in ((self._tokens[field], set(tokenize(text))),
+                               (self._trigrams[field], trigrams(text))):
+            for key in keys:
+                isbns = postings[key]
+                isbns.discard(isbn)
+                if not isbns:
+                    del postings[key]
+
+    def _intersect(self, postings, keys):
+        # Start from the rarest key so the working set stays small
+        sets = []
+        for key in keys:
+            isbns = postings.get(key)
+            if not isbns:
+                return set()
+            sets.append(isbns)
+        sets.sort(key=len)
+        result = set(sets[0])
+        for isbns in sets[1:]:
+            result &= isbns
+            if not result:
+                break
+        return result
+
+    def _in_order(self, isbns):
+        order = self._order
+        return sorted(isbns, key=order.__getitem__)
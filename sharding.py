@@ -0,0 +1,386 @@
+"""
+Multi-process sharded engine for the Mini Library Management System.
+Books are partitioned by ISBN and members by member ID across worker
+processes, each running the ordinary operations module on its own part
+of the library. A router in the calling process sends every call to the
+shard that owns its data, runs a two-phase commit when a member and a
+book live on different shards, and merges searches from every shard.
+
+Usage:
+    with ShardedLibrary(workers=4) as library:
+        library.add_book("978-1234567890", "Dune", "Frank Herbert", "Sci-Fi", 2)
+        library.borrow_book("M001", "978-1234567890")
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import threading
+import zlib
+
+import operations
+from bulk_import import DEFAULT_BATCH_SIZE, BulkReport, batched, read_rows
+from records import MAX_BORROWED
+from results import Status
+
+# Order in which borrow_book reports failures, so a sharded borrow returns
+# the same status as a single-process one
+_BORROW_CHECKS = (Status.MEMBER_NOT_FOUND, Status.BOOK_NOT_FOUND, Status.BORROW_LIMIT,
+                  Status.NO_COPIES, Status.ALREADY_BORROWED)
+_RETURN_CHECKS = (Status.MEMBER_NOT_FOUND, Status.BOOK_NOT_FOUND, Status.NOT_BORROWED)
+
+
+def shard_for(key, shards):
+    """
+    Return the shard that owns a member ID or ISBN.
+
+    str hashes differ between processes, so a CRC of the key is used.
+    Integer member IDs are hashed as their decimal string.
+
+    Args:
+        key (str or int): Member ID or ISBN
+        shards (int): Number of shards
+
+    Returns:
+        int: Shard number
+    """
+    return zlib.crc32(str(key).encode("utf-8")) % shards
+
+
+# Worker side. Each worker process owns the operations module state of its
+# shard, plus the catalog position of its books so searches merge in order.
+
+_sequence = {}
+
+# Loans prepared by the first phase of a cross-shard borrow or return,
+# keyed by transaction ID
+_prepared = {}
+
+
+def _add_book(sequence, isbn, title, author, genre, total_copies):
+    status = operations.add_book(isbn, title, author, genre, total_copies)
+    if status:
+        _sequence[isbn] = sequence
+    return status
+
+
+def _add_books_bulk(rows):
+    # rows holds (sequence, row) pairs; report errors by their position
+    report = operations.add_books_bulk(row for _, row in rows)
+    for sequence, row in rows:
+        isbn = row['isbn']
+        if isbn not in _sequence and isbn in operations.books:
+            _sequence[isbn] = sequence
+    return report
+
+
+def _delete_book(isbn):
+    status = operations.delete_book(isbn)
+    if status:
+        del _sequence[isbn]
+    return status
+
+
+def _search_books(search_term, search_by, whole_words):
+    return [(_sequence[isbn], isbn, book)
+            for isbn, book in operations.search_books(search_term, search_by, whole_words)]
+
+
+def _prepare_member(transaction, operation, member_id, isbn):
+    # Check the member's side of a loan and apply it tentatively
+    member = operations.members.get(member_id)
+    if not member:
+        return Status.MEMBER_NOT_FOUND
+    if operation == "borrow_book":
+        if len(member['borrowed_books']) >= MAX_BORROWED:
+            return Status.BORROW_LIMIT
+        if isbn in member['borrowed_books']:
+            return Status.ALREADY_BORROWED
+        member.add_borrowed(isbn)
+    else:
+        if isbn not in member['borrowed_books']:
+            return Status.NOT_BORROWED
+        member.remove_borrowed(isbn)
+    _prepared[transaction] = ("member", operation, member_id, isbn)
+    return Status.OK
+
+
+def _prepare_book(transaction, operation, member_id, isbn):
+    # Check the book's side of a loan and apply it tentatively
+    book = operations.books.get(isbn)
+    if book is None:
+        return Status.BOOK_NOT_FOUND
+    if operation == "borrow_book":
+        if book['available_copies'] <= 0:
+            return Status.NO_COPIES
+        book['available_copies'] -= 1
+    else:
+        book['available_copies'] += 1
+    operations._catalog_index.update_availability(isbn, book)
+    _prepared[transaction] = ("book", operation, member_id, isbn)
+    return Status.OK
+
+
+def _commit(transaction):
+    side, operation, member_id, isbn = _prepared.pop(transaction)
+    # The member's shard records the loan times, and its observers (such as
+    # a LibraryStore) log the loan once
+    if side == "member":
+        if operation == "borrow_book":
+            operations._loans.checkout(member_id, isbn)
+        else:
+            operations._loans.checkin(member_id, isbn)
+        operations._stats.loans_changed(member_id, len(operations.members.get(member_id)['borrowed_books']))
+        operations._notify(operation, member_id, isbn)
+    # The book's shard counts the copy and the borrow
+    elif operation == "borrow_book":
+        operations._stats.borrowed(isbn)
+    else:
+        operations._stats.returned(isbn)
+    return Status.OK
+
+
+def _abort(transaction):
+    side, operation, member_id, isbn = _prepared.pop(transaction)
+    if side == "member":
+        member = operations.members.get(member_id)
+        if operation == "borrow_book":
+            member.remove_borrowed(isbn)
+        else:
+            member.add_borrowed(isbn)
+    else:
+        book = operations.books[isbn]
+        book['available_copies'] += 1 if operation == "borrow_book" else -1
+        operations._catalog_index.update_availability(isbn, book)
+    return Status.OK
+
+
+_HANDLERS = {
+    'add_book': _add_book,
+    'add_books_bulk': _add_books_bulk,
+    'add_member': operations.add_member,
+    'add_members_bulk': operations.add_members_bulk,
+    'update_book': operations.update_book,
+    'update_member': operations.update_member,
+    'delete_book': _delete_book,
+    'delete_member': operations.delete_member,
+    'borrow_book': operations.borrow_book,
+    'return_book': operations.return_book,
+    'search_books': _search_books,
+    'prepare_member': _prepare_member,
+    'prepare_book': _prepare_book,
+    'commit': _commit,
+    'abort': _abort,
+}
+
+
+def _serve(connection):
+    """Run requests from the router until it sends None."""
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        name, args, kwargs = request
+        try:
+            connection.send((True, _HANDLERS[name](*args, **kwargs)))
+        except Exception as error:
+            connection.send((False, error))
+    connection.close()
+
+
+# Router side
+
+class ShardedLibrary:
+    """
+    Router over a pool of shard worker processes.
+
+    Provides the same operations as operations.py. Calls for one member
+    or one book go to the shard that owns it; a borrow or return whose
+    member and book live on different shards runs as a two-phase commit
+    (prepare on both shards, then commit on both or abort on both).
+    Tentatively applied loans are visible to other calls on those shards
+    until the transaction finishes.
+
+    The router can be shared by several threads; calls to different
+    shards then run in parallel in the worker processes.
+
+    Args:
+        workers (int): Number of shard processes
+    """
+
+    def __init__(self, workers=4):
+        self.workers = workers
+        self._connections = []
+        self._processes = []
+        self._shard_locks = [threading.Lock() for _ in range(workers)]
+        self._transactions = itertools.count(1)
+        self._sequence = itertools.count()
+        # Spawned workers start with an empty library and none of the
+        # caller's observers, reporter or locks
+        context = multiprocessing.get_context("spawn")
+        for _ in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def close(self):
+        """Stop every shard process."""
+        for shard, connection in enumerate(self._connections):
+            with self._shard_locks[shard]:
+                if not connection.closed:
+                    connection.send(None)
+                    connection.close()
+        for process in self._processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Messaging
+
+    def _call(self, shard, name, *args, **kwargs):
+        return self._call_many([(shard, name, args, kwargs)])[0]
+
+    def _call_many(self, requests):
+        # Send every request before waiting for any reply, so the shards
+        # work in parallel. Shard locks are taken in order to avoid deadlock.
+        shards = sorted({request[0] for request in requests})
+        for shard in shards:
+            self._shard_locks[shard].acquire()
+        try:
+            for shard, name, args, kwargs in requests:
+                self._connections[shard].send((name, args, kwargs))
+            replies = [self._connections[shard].recv() for shard, _, _, _ in requests]
+        finally:
+            for shard in reversed(shards):
+                self._shard_locks[shard].release()
+        for succeeded, value in replies:
+            if not succeeded:
+                raise value
+        return [value for _, value in replies]
+
+    def _book_shard(self, isbn):
+        return shard_for(isbn, self.workers)
+
+    def _member_shard(self, member_id):
+        return shard_for(member_id, self.workers)
+
+    # Operations
+
+    def add_book(self, isbn, title, author, genre, total_copies):
+        """Add a book to the shard that owns its ISBN. See operations.add_book."""
+        return self._call(self._book_shard(isbn), 'add_book', next(self._sequence),
+                          isbn, title, author, genre, total_copies)
+
+    def add_member(self, member_id, name, email):
+        """Add a member to the shard that owns its ID. See operations.add_member."""
+        return self._call(self._member_shard(member_id), 'add_member', member_id, name, email)
+
+    def update_book(self, isbn, **kwargs):
+        """See operations.update_book."""
+        return self._call(self._book_shard(isbn), 'update_book', isbn, **kwargs)
+
+    def update_member(self, member_id, **kwargs):
+        """See operations.update_member."""
+        return self._call(self._member_shard(member_id), 'update_member', member_id, **kwargs)
+
+    def delete_book(self, isbn):
+        """See operations.delete_book."""
+        return self._call(self._book_shard(isbn), 'delete_book', isbn)
+
+    def delete_member(self, member_id):
+        """See operations.delete_member."""
+        return self._call(self._member_shard(member_id), 'delete_member', member_id)
+
+    def borrow_book(self, member_id, isbn):
+        """See operations.borrow_book."""
+        return self._circulate('borrow_book', member_id, isbn, _BORROW_CHECKS)
+
+    def return_book(self, member_id, isbn):
+        """See operations.return_book."""
+        return self._circulate('return_book', member_id, isbn, _RETURN_CHECKS)
+
+    def _circulate(self, operation, member_id, isbn, checks):
+        member_shard = self._member_shard(member_id)
+        book_shard = self._book_shard(isbn)
+        if member_shard == book_shard:
+            return self._call(member_shard, operation, member_id, isbn)
+
+        # Phase one: both shards check and tentatively apply their side
+        transaction = next(self._transactions)
+        member_status, book_status = self._call_many([
+            (member_shard, 'prepare_member', (transaction, operation, member_id, isbn), {}),
+            (book_shard, 'prepare_book', (transaction, operation, member_id, isbn), {}),
+        ])
+
+        # Phase two: commit on both shards, or undo whichever side was applied
+        if member_status and book_status:
+            self._call_many([(member_shard, 'commit', (transaction,), {}),
+                             (book_shard, 'commit', (transaction,), {})])
+            return Status.OK
+        undo = [(shard, 'abort', (transaction,), {})
+                for shard, status in ((member_shard, member_status), (book_shard, book_status)) if status]
+        if undo:
+            self._call_many(undo)
+        return min((member_status, book_status), key=lambda status: checks.index(status)
+                   if status in checks else len(checks))
+
+    def search_books(self, search_term, search_by="title", whole_words=False):
+        """
+        Search every shard and merge the results in catalog order.
+
+        See operations.search_books.
+        """
+        if search_by not in ["title", "author"]:
+            return []
+        requests = [(shard, 'search_books', (search_term, search_by, whole_words), {})
+                    for shard in range(self.workers)]
+        merged = heapq.merge(*self._call_many(requests))
+        return [(isbn, book) for _, isbn, book in merged]
+
+    def add_books_bulk(self, source, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Add many books, importing each batch on every shard in parallel.
+
+        See operations.add_books_bulk.
+        """
+        return self._bulk('add_books_bulk', 'isbn', self._book_shard, source, file_format, batch_size,
+                          sequenced=True)
+
+    def add_members_bulk(self, source, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Add many members, importing each batch on every shard in parallel.
+
+        See operations.add_members_bulk.
+        """
+        return self._bulk('add_members_bulk', 'member_id', self._member_shard, source, file_format, batch_size)
+
+    def _bulk(self, name, key, shard_of, source, file_format, batch_size, sequenced=False):
+        report = BulkReport()
+        for batch in batched(read_rows(source, file_format), batch_size):
+            # Route each row by its key; rows without one cannot be routed
+            row_numbers = [[] for _ in range(self.workers)]
+            rows = [[] for _ in range(self.workers)]
+            for row_number, row in batch:
+                if not isinstance(row, dict) or not isinstance(row.get(key), str):
+                    report.reject(row_number, row.get(key) if isinstance(row, dict) else None,
+                                  Status.MALFORMED_ROW)
+                    continue
+                shard = shard_of(row[key])
+                row_numbers[shard].append(row_number)
+                rows[shard].append((next(self._sequence), row) if sequenced else row)
+
+            shards = [shard for shard in range(self.workers) if rows[shard]]
+            reports = self._call_many([(shard, name, (rows[shard],), {}) for shard in shards])
+            for shard, shard_report in zip(shards, reports):
+                report.added += shard_report.added
+                for position, row_key, reason in shard_report.errors:
+                    report.reject(row_numbers[shard][position - 1], row_key, reason)
+        report.errors.sort(key=lambda error: error[0])
+        return report
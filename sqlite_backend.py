@@ -0,0 +1,504 @@
+"""
+SQLite storage backend for the Mini Library Management System.
+Keeps books, members and loans in an SQLite database file, so the library
+is no longer limited by memory. The database runs in WAL mode: one writer
+connection applies every change in its own transaction while a pool of
+reader connections answers searches and listings concurrently.
+
+Usage:
+    backend = SqliteBackend("library.db")
+    operations.set_backend(backend)
+    add_book(...)                          # stored in library.db
+    operations.set_backend(None)
+    backend.close()
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import operations
+from backends import StorageBackend
+from bulk_import import DEFAULT_BATCH_SIZE, BulkReport, batched, read_rows
+from records import GENRES, MAX_BORROWED, Book, Member
+from results import Status
+from search_index import tokenize
+
+# Default number of pooled reader connections
+DEFAULT_READERS = 4
+
+# Rows fetched at a time by iter_books and iter_members
+PAGE_SIZE = 1000
+
+# Keys looked up together when checking a bulk import for duplicates
+LOOKUP_CHUNK = 500
+
+# Books are numbered by an integer primary key so the full-text index can
+# refer to them and results come back in the order books were added.
+# The UNIQUE and PRIMARY KEY constraints index ISBNs and member IDs.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    isbn TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    total_copies INTEGER NOT NULL,
+    available_copies INTEGER NOT NULL CHECK (available_copies >= 0)
+);
+CREATE INDEX IF NOT EXISTS books_genre ON books (genre);
+
+CREATE TABLE IF NOT EXISTS members (
+    member_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS loans (
+    member_id TEXT NOT NULL,
+    isbn TEXT NOT NULL,
+    PRIMARY KEY (member_id, isbn)
+);
+CREATE INDEX IF NOT EXISTS loans_isbn ON loans (isbn);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+    title, author, content='books', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+    INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+    INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+END;
+CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+    INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+    INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+END;
+"""
+
+BOOK_COLUMNS = "isbn, title, author, genre, total_copies, available_copies"
+
+
+def _book(row):
+    """Turn a books row, starting at the isbn column, into an (isbn, Book) pair."""
+    return row[0], Book(row[1], row[2], row[3], row[4], row[5])
+
+
+def _phrase(text):
+    """Quote text as an FTS5 phrase."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Library stored in an SQLite database.
+
+    Every statement is written as a constant SQL string, so each connection
+    prepares it once and reuses it from its statement cache. Changes go
+    through the single writer connection, one BEGIN IMMEDIATE transaction
+    per operation; a borrow checks the member's loans and the book's copies
+    and records the loan in the same transaction, so the MAX_BORROWED
+    limit holds even with several processes sharing the database.
+
+    Title and author searches of three or more characters are answered by
+    an FTS5 trigram index; shorter terms scan the books table.
+
+    Args:
+        path (str): Database file, created if it does not exist
+        readers (int): Maximum number of pooled reader connections
+        timeout (float): Seconds to wait for another process's write lock
+    """
+
+    def __init__(self, path, readers=DEFAULT_READERS, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.executescript(SCHEMA)
+        self._readers = queue.LifoQueue()
+        self._reader_slots = threading.Semaphore(readers)
+        self._all_readers = []
+
+    def _connect(self):
+        # Autocommit mode, so transactions are begun explicitly
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                     check_same_thread=False, cached_statements=256)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def _reader(self):
+        # Borrow a pooled reader connection, opening one if the pool has room
+        with self._reader_slots:
+            try:
+                connection = self._readers.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+                self._all_readers.append(connection)
+            try:
+                yield connection
+            finally:
+                self._readers.put(connection)
+
+    @contextmanager
+    def _transaction(self):
+        # Run statements on the writer connection as one transaction
+        with self._write_lock:
+            connection = self._writer
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def close(self):
+        """Close every connection."""
+        with self._write_lock:
+            self._writer.close()
+        for connection in self._all_readers:
+            connection.close()
+        self._all_readers = []
+
+    def get_book(self, isbn):
+        with self._reader() as connection:
+            row = connection.execute(f"SELECT {BOOK_COLUMNS} FROM books WHERE isbn = ?", (isbn,)).fetchone()
+        return None if row is None else _book(row)[1]
+
+    def get_member(self, member_id):
+        with self._reader() as connection:
+            row = connection.execute("SELECT member_id, name, email FROM members WHERE member_id = ?",
+                                     (member_id,)).fetchone()
+            if row is None:
+                return None
+            borrowed = connection.execute("SELECT isbn FROM loans WHERE member_id = ? ORDER BY rowid",
+                                          (member_id,)).fetchall()
+        return Member(*row, [isbn for isbn, in borrowed])
+
+    def counts(self):
+        with self._reader() as connection:
+            books, members, loans = connection.execute(
+                "SELECT (SELECT COUNT(*) FROM books), (SELECT COUNT(*) FROM members), "
+                "(SELECT COUNT(*) FROM loans)").fetchone()
+        return {'books': books, 'members': members, 'loans': loans}
+
+    def add_book(self, isbn, title, author, genre, total_copies):
+        with self._transaction() as connection:
+            # Validate ISBN uniqueness
+            if connection.execute("SELECT 1 FROM books WHERE isbn = ?", (isbn,)).fetchone():
+                return operations._report("add_book", Status.DUPLICATE_ISBN, isbn=isbn)
+
+            # Validate genre
+            if genre not in GENRES:
+                return operations._report("add_book", Status.INVALID_GENRE, genre=genre)
+
+            # Validate total_copies
+            if total_copies <= 0:
+                return operations._report("add_book", Status.INVALID_COPIES)
+
+            connection.execute("INSERT INTO books (isbn, title, author, genre, total_copies, available_copies) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", (isbn, title, author, genre, total_copies, total_copies))
+        return operations._report("add_book", Status.OK, isbn=isbn, title=title, author=author)
+
+    def add_member(self, member_id, name, email):
+        with self._transaction() as connection:
+            # Validate member ID uniqueness
+            if connection.execute("SELECT 1 FROM members WHERE member_id = ?", (member_id,)).fetchone():
+                return operations._report("add_member", Status.DUPLICATE_MEMBER, member_id=member_id)
+
+            # Validate email format (basic validation)
+            if not operations._is_valid_email(email):
+                return operations._report("add_member", Status.INVALID_EMAIL, email=email)
+
+            connection.execute("INSERT INTO members (member_id, name, email) VALUES (?, ?, ?)",
+                               (member_id, name, email))
+        return operations._report("add_member", Status.OK, member_id=member_id, name=name)
+
+    def add_books_bulk(self, source, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+        report = BulkReport()
+        valid_genres = set(GENRES)
+
+        for batch in batched(read_rows(source, file_format), batch_size):
+            rows = operations._parse_book_rows(batch, report)
+
+            # Validate the batch, then insert it with a single executemany
+            with self._transaction() as connection:
+                existing = self._existing(connection, "books", "isbn", [row[1] for row in rows])
+                accepted = []
+                for row_number, isbn, title, author, genre, total_copies in rows:
+                    if isbn in existing:
+                        report.reject(row_number, isbn, Status.DUPLICATE_ISBN)
+                    elif genre not in valid_genres:
+                        report.reject(row_number, isbn, Status.INVALID_GENRE)
+                    elif total_copies <= 0:
+                        report.reject(row_number, isbn, Status.INVALID_COPIES)
+                    else:
+                        accepted.append((isbn, title, author, genre, total_copies, total_copies))
+                        # Later rows in the same batch with this ISBN are duplicates
+                        existing.add(isbn)
+                connection.executemany("INSERT INTO books (isbn, title, author, genre, total_copies, "
+                                       "available_copies) VALUES (?, ?, ?, ?, ?, ?)", accepted)
+            report.added += len(accepted)
+
+        return report
+
+    def add_members_bulk(self, source, file_format=None, batch_size=DEFAULT_BATCH_SIZE):
+        report = BulkReport()
+
+        for batch in batched(read_rows(source, file_format), batch_size):
+            rows = operations._parse_member_rows(batch, report)
+
+            with self._transaction() as connection:
+                existing = self._existing(connection, "members", "member_id", [row[1] for row in rows])
+                accepted = []
+                for row_number, member_id, name, email in rows:
+                    if member_id in existing:
+                        report.reject(row_number, member_id, Status.DUPLICATE_MEMBER)
+                    elif not operations._is_valid_email(email):
+                        report.reject(row_number, member_id, Status.INVALID_EMAIL)
+                    else:
+                        accepted.append((member_id, name, email))
+                        existing.add(member_id)
+                connection.executemany("INSERT INTO members (member_id, name, email) VALUES (?, ?, ?)", accepted)
+            report.added += len(accepted)
+
+        return report
+
+    def _existing(self, connection, table, column, keys):
+        # Keys already stored, looked up a fixed-size chunk at a time so the
+        # same few statements are reused from the cache
+        existing = set()
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start:start + LOOKUP_CHUNK]
+            sql = f"SELECT {column} FROM {table} WHERE {column} IN ({', '.join('?' * len(chunk))})"
+            existing.update(key for key, in connection.execute(sql, chunk))
+        return existing
+
+    def search_books(self, search_term, search_by="title", whole_words=False):
+        if search_by not in ["title", "author"]:
+            operations._report("search_books", Status.INVALID_SEARCH_FIELD, search_by=search_by)
+            return []
+        return self._search(search_term, search_by, whole_words)
+
+    def find_books(self, search_term=None, search_by="title", genre=None, available_only=False,
+                   whole_words=False):
+        if search_by not in ["title", "author"]:
+            operations._report("find_books", Status.INVALID_SEARCH_FIELD, search_by=search_by)
+            return []
+
+        if genre is not None and genre not in GENRES:
+            operations._report("find_books", Status.INVALID_GENRE, genre=genre)
+            return []
+
+        return self._search(search_term, search_by, whole_words, genre, available_only)
+
+    def _search(self, search_term, search_by, whole_words, genre=None, available_only=False):
+        # Narrow the books with the full-text, genre and availability
+        # indexes in SQL, then check the exact match rule on the candidates
+        conditions = []
+        parameters = []
+        if search_term is None:
+            matches = None
+        else:
+            term = search_term.lower()
+            if whole_words:
+                words = set(tokenize(term))
+                if not words:
+                    return []
+                phrases = [_phrase(word) for word in words if len(word) >= 3]
+                matches = lambda value: words <= set(tokenize(value.lower()))
+            else:
+                phrases = [_phrase(term)] if len(term) >= 3 else []
+                matches = lambda value: term in value.lower()
+            if phrases:
+                conditions.append("id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)")
+                parameters.append(f"{search_by} : ({' AND '.join(phrases)})")
+        if genre is not None:
+            conditions.append("genre = ?")
+            parameters.append(genre)
+        if available_only:
+            conditions.append("available_copies > 0")
+
+        sql = f"SELECT {BOOK_COLUMNS} FROM books"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+        field = 1 if search_by == "title" else 2
+        with self._reader() as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+        return [_book(row) for row in rows if matches is None or matches(row[field])]
+
+    def update_book(self, isbn, **kwargs):
+        with self._transaction() as connection:
+            row = connection.execute("SELECT total_copies, available_copies FROM books WHERE isbn = ?",
+                                     (isbn,)).fetchone()
+            if row is None:
+                return operations._report("update_book", Status.BOOK_NOT_FOUND, isbn=isbn)
+
+            # Validate genre if provided
+            if 'genre' in kwargs and kwargs['genre'] not in GENRES:
+                return operations._report("update_book", Status.INVALID_GENRE, genre=kwargs['genre'])
+
+            # Validate total_copies if provided
+            if 'total_copies' in kwargs and kwargs['total_copies'] <= 0:
+                return operations._report("update_book", Status.INVALID_COPIES)
+
+            # Update fields, keeping borrowed copies on loan
+            changes = {field: value for field, value in kwargs.items() if field in ['title', 'author', 'genre']}
+            if 'total_copies' in kwargs:
+                total_copies, available_copies = row
+                borrowed_count = total_copies - available_copies
+                changes['total_copies'] = kwargs['total_copies']
+                changes['available_copies'] = max(0, kwargs['total_copies'] - borrowed_count)
+            if changes:
+                assignments = ", ".join(f"{field} = ?" for field in changes)
+                connection.execute(f"UPDATE books SET {assignments} WHERE isbn = ?", [*changes.values(), isbn])
+        return operations._report("update_book", Status.OK, isbn=isbn)
+
+    def update_member(self, member_id, **kwargs):
+        with self._transaction() as connection:
+            if not connection.execute("SELECT 1 FROM members WHERE member_id = ?", (member_id,)).fetchone():
+                return operations._report("update_member", Status.MEMBER_NOT_FOUND, member_id=member_id)
+
+            # Validate email if provided
+            if 'email' in kwargs:
+                if not operations._is_valid_email(kwargs['email']):
+                    return operations._report("update_member", Status.INVALID_EMAIL, email=kwargs['email'])
+
+            changes = {field: value for field, value in kwargs.items() if field in ['name', 'email']}
+            if changes:
+                assignments = ", ".join(f"{field} = ?" for field in changes)
+                connection.execute(f"UPDATE members SET {assignments} WHERE member_id = ?",
+                                   [*changes.values(), member_id])
+        return operations._report("update_member", Status.OK, member_id=member_id)
+
+    def delete_book(self, isbn):
+        with self._transaction() as connection:
+            row = connection.execute("SELECT title, total_copies, available_copies FROM books WHERE isbn = ?",
+                                     (isbn,)).fetchone()
+            if row is None:
+                return operations._report("delete_book", Status.BOOK_NOT_FOUND, isbn=isbn)
+
+            # Check if book is currently borrowed
+            title, total_copies, available_copies = row
+            if available_copies < total_copies:
+                return operations._report("delete_book", Status.BOOK_HAS_LOANS, isbn=isbn, title=title)
+
+            connection.execute("DELETE FROM books WHERE isbn = ?", (isbn,))
+        return operations._report("delete_book", Status.OK, isbn=isbn, title=title)
+
+    def delete_member(self, member_id):
+        with self._transaction() as connection:
+            row = connection.execute("SELECT name FROM members WHERE member_id = ?", (member_id,)).fetchone()
+            if row is None:
+                return operations._report("delete_member", Status.MEMBER_NOT_FOUND, member_id=member_id)
+
+            # Check if member has borrowed books
+            name, = row
+            if connection.execute("SELECT 1 FROM loans WHERE member_id = ?", (member_id,)).fetchone():
+                return operations._report("delete_member", Status.MEMBER_HAS_LOANS, member_id=member_id, name=name)
+
+            connection.execute("DELETE FROM members WHERE member_id = ?", (member_id,))
+        return operations._report("delete_member", Status.OK, member_id=member_id, name=name)
+
+    def borrow_book(self, member_id, isbn):
+        with self._transaction() as connection:
+            # Find member
+            row = connection.execute("SELECT name FROM members WHERE member_id = ?", (member_id,)).fetchone()
+            if row is None:
+                return operations._report("borrow_book", Status.MEMBER_NOT_FOUND, member_id=member_id, isbn=isbn)
+            name, = row
+
+            # Check if book exists
+            row = connection.execute("SELECT title, available_copies FROM books WHERE isbn = ?", (isbn,)).fetchone()
+            if row is None:
+                return operations._report("borrow_book", Status.BOOK_NOT_FOUND, member_id=member_id, isbn=isbn)
+            title, available_copies = row
+
+            # Check if member already has 3 books borrowed
+            borrowed = [loan for loan, in connection.execute("SELECT isbn FROM loans WHERE member_id = ?",
+                                                             (member_id,))]
+            if len(borrowed) >= MAX_BORROWED:
+                return operations._report("borrow_book", Status.BORROW_LIMIT, member_id=member_id, isbn=isbn,
+                                          name=name, title=title)
+
+            # Check if book is available
+            if available_copies <= 0:
+                return operations._report("borrow_book", Status.NO_COPIES, member_id=member_id, isbn=isbn,
+                                          name=name, title=title)
+
+            # Check if member already borrowed this book
+            if isbn in borrowed:
+                return operations._report("borrow_book", Status.ALREADY_BORROWED, member_id=member_id, isbn=isbn,
+                                          name=name, title=title)
+
+            # Borrow the book
+            connection.execute("INSERT INTO loans (member_id, isbn) VALUES (?, ?)", (member_id, isbn))
+            connection.execute("UPDATE books SET available_copies = available_copies - 1 WHERE isbn = ?", (isbn,))
+        return operations._report("borrow_book", Status.OK, member_id=member_id, isbn=isbn, name=name, title=title)
+
+    def return_book(self, member_id, isbn):
+        with self._transaction() as connection:
+            # Find member
+            row = connection.execute("SELECT name FROM members WHERE member_id = ?", (member_id,)).fetchone()
+            if row is None:
+                return operations._report("return_book", Status.MEMBER_NOT_FOUND, member_id=member_id, isbn=isbn)
+            name, = row
+
+            # Check if book exists
+            row = connection.execute("SELECT title FROM books WHERE isbn = ?", (isbn,)).fetchone()
+            if row is None:
+                return operations._report("return_book", Status.BOOK_NOT_FOUND, member_id=member_id, isbn=isbn)
+            title, = row
+
+            # Check if member has borrowed this book
+            if not connection.execute("DELETE FROM loans WHERE member_id = ? AND isbn = ?",
+                                      (member_id, isbn)).rowcount:
+                return operations._report("return_book", Status.NOT_BORROWED, member_id=member_id, isbn=isbn,
+                                          name=name, title=title)
+
+            # Return the book
+            connection.execute("UPDATE books SET available_copies = available_copies + 1 WHERE isbn = ?", (isbn,))
+        return operations._report("return_book", Status.OK, member_id=member_id, isbn=isbn, name=name, title=title)
+
+    def iter_books(self, offset=0, limit=None):
+        for rows in self._pages("books", "id", f"id, {BOOK_COLUMNS}", offset, limit):
+            for row in rows:
+                yield _book(row[1:])
+
+    def iter_members(self, offset=0, limit=None):
+        for rows in self._pages("members", "rowid", "rowid, member_id, name, email", offset, limit):
+            # Read the loans of a whole page of members with one query
+            ids = [row[1] for row in rows]
+            borrowed = {}
+            with self._reader() as connection:
+                sql = (f"SELECT member_id, isbn FROM loans WHERE member_id IN ({', '.join('?' * len(ids))}) "
+                       "ORDER BY rowid")
+                for member_id, isbn in connection.execute(sql, ids):
+                    borrowed.setdefault(member_id, []).append(isbn)
+            for _, member_id, name, email in rows:
+                yield Member(member_id, name, email, borrowed.get(member_id, ()))
+
+    def _pages(self, table, key, columns, offset, limit):
+        # Yield rows in key order a page at a time, holding a reader
+        # connection only while each page is fetched
+        remaining = -1 if limit is None else limit
+        last = None
+        while remaining:
+            size = PAGE_SIZE if remaining < 0 else min(PAGE_SIZE, remaining)
+            with self._reader() as connection:
+                if last is None:
+                    rows = connection.execute(f"SELECT {columns} FROM {table} ORDER BY {key} LIMIT ? OFFSET ?",
+                                              (size, offset)).fetchall()
+                else:
+                    rows = connection.execute(f"SELECT {columns} FROM {table} WHERE {key} > ? ORDER BY {key} "
+                                              "LIMIT ?", (last, size)).fetchall()
+            if not rows:
+                return
+            yield rows
+            last = rows[-1][0]
+            if remaining > 0:
+                remaining -= len(rows)
@@ -0,0 +1,422 @@
+"""
+Persistent storage for the Mini Library Management System.
+Every successful mutation is appended to a binary write-ahead log, and
+compact snapshots of the whole library bound how much log has to be
+replayed when the process starts again.
+
+Usage:
+    store = LibraryStore("library_data")   # recovers saved state
+    add_book(...)                          # logged automatically
+    store.close()
+"""
+
+import itertools
+import os
+import struct
+import threading
+import time
+import zlib
+
+import operations
+
+# Frame header: payload length and CRC32 of the payload
+FRAME_HEADER = struct.Struct("<II")
+
+# Value tags used by the record codec
+_STR = b"s"
+_INT = b"i"
+_FLOAT = b"f"
+_NONE = b"n"
+
+_LENGTH = struct.Struct("<I")
+_INT64 = struct.Struct("<q")
+_FLOAT64 = struct.Struct("<d")
+
+# Loan times are stored in snapshots as whole microseconds since the epoch
+MICROSECONDS = 1_000_000
+
+# File names inside a store directory
+WAL_FILE = "library.wal"
+SNAPSHOT_FILE = "library.snapshot"
+
+
+def encode_values(values):
+    """
+    Encode a sequence of str, int, float and None values into compact bytes.
+
+    Args:
+        values (iterable): Values to encode
+
+    Returns:
+        bytes: The encoded values
+
+    Raises:
+        TypeError: If a value has any other type
+    """
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append(_NONE)
+        elif isinstance(value, int):
+            parts.append(_INT + _INT64.pack(value))
+        elif isinstance(value, float):
+            parts.append(_FLOAT + _FLOAT64.pack(value))
+        elif isinstance(value, str):
+            data = value.encode("utf-8")
+            parts.append(_STR + _LENGTH.pack(len(data)) + data)
+        else:
+            raise TypeError(f"Cannot encode {value!r} of type {type(value).__name__}")
+    return b"".join(parts)
+
+
+def decode_values(data):
+    """
+    Decode bytes produced by encode_values.
+
+    Args:
+        data (bytes): Encoded values
+
+    Returns:
+        list: The decoded values
+    """
+    values = []
+    pos = 0
+    while pos < len(data):
+        tag = data[pos:pos + 1]
+        pos += 1
+        if tag == _NONE:
+            values.append(None)
+        elif tag == _INT:
+            values.append(_INT64.unpack_from(data, pos)[0])
+            pos += _INT64.size
+        elif tag == _FLOAT:
+            values.append(_FLOAT64.unpack_from(data, pos)[0])
+            pos += _FLOAT64.size
+        elif tag == _STR:
+            length = _LENGTH.unpack_from(data, pos)[0]
+            pos += _LENGTH.size
+            values.append(data[pos:pos + length].decode("utf-8"))
+            pos += length
+        else:
+            raise ValueError(f"Unknown value tag {tag!r}")
+    return values
+
+
+def frame(payload):
+    """Prefix a payload with its length and checksum."""
+    return FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_frames(f):
+    """
+    Read framed payloads from a binary file until the end or a torn frame.
+
+    Args:
+        f (file): Binary file positioned at the first frame
+
+    Yields:
+        tuple: (payload, end_offset) for every complete, valid frame
+    """
+    while True:
+        header = f.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        length, checksum = FRAME_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        yield payload, f.tell()
+
+
+def encode_mutation(lsn, operation, args, kwargs):
+    """Encode one logged mutation as a record payload."""
+    values = [lsn, operation, len(args), *args]
+    for key, value in kwargs.items():
+        values.append(key)
+        values.append(value)
+    return encode_values(values)
+
+
+def decode_mutation(payload):
+    """
+    Decode a record payload produced by encode_mutation.
+
+    Returns:
+        tuple: (lsn, operation, args, kwargs)
+    """
+    values = decode_values(payload)
+    lsn, operation, arg_count = values[0], values[1], values[2]
+    args = values[3:3 + arg_count]
+    rest = values[3 + arg_count:]
+    kwargs = dict(zip(rest[::2], rest[1::2]))
+    return lsn, operation, args, kwargs
+
+
+class WriteAheadLog:
+    """
+    Append-only log of framed records with batched fsync.
+
+    Records are written to a buffered file and made durable with fsync
+    once sync_every records have been appended or sync_interval seconds
+    have passed since the last sync, whichever comes first.
+    """
+
+    def __init__(self, path, sync_every=100, sync_interval=1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._file = open(path, "ab")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, payload):
+        """
+        Append one record payload to the log.
+
+        Args:
+            payload (bytes): Record payload
+        """
+        self._file.write(frame(payload))
+        self._unsynced += 1
+        if (self._unsynced >= self.sync_every
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+
+    def sync(self):
+        """Flush buffered records and fsync them to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def truncate(self, size=0):
+        """
+        Cut the log down to size bytes, discarding later records.
+
+        Args:
+            size (int): Number of bytes to keep
+        """
+        self._file.flush()
+        self._file.truncate(size)
+        self.sync()
+
+    @property
+    def closed(self):
+        """True once the log has been closed."""
+        return self._file.closed
+
+    def close(self):
+        """Sync and close the log."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class LibraryStore:
+    """
+    Durable storage for the operations module state.
+
+    Opening a store recovers the library from the latest snapshot plus
+    the log records written after it, then logs every later mutation.
+    A snapshot is taken automatically, on a background thread, every
+    snapshot_every mutations.
+
+    Args:
+        directory (str): Directory holding the log and snapshot files
+        sync_every (int): Records appended between fsyncs
+        sync_interval (float): Maximum seconds between fsyncs
+        snapshot_every (int): Mutations between automatic snapshots, or None
+    """
+
+    def __init__(self, directory, sync_every=100, sync_interval=1.0, snapshot_every=100000):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        self._wal_path = os.path.join(directory, WAL_FILE)
+        self._snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self._lsn = 0
+        self._since_snapshot = 0
+        # Mutations on different members and books can be logged concurrently
+        self._lock = threading.Lock()
+        self._snapshot_thread = None
+
+        valid_size = self.recover()
+        self.wal = WriteAheadLog(self._wal_path, sync_every, sync_interval)
+        # Drop any torn record left at the end of the log by a crash
+        if os.path.getsize(self._wal_path) > valid_size:
+            self.wal.truncate(valid_size)
+        operations.add_observer(self._log_mutation)
+
+    def recover(self):
+        """
+        Rebuild the library from the snapshot and the log.
+
+        Returns:
+            int: Size in bytes of the valid part of the log
+        """
+        operations.books.clear()
+        operations.members.clear()
+        previous_reporter = operations.set_reporter(None)
+        try:
+            snapshot_lsn = self._load_snapshot()
+            self._lsn = snapshot_lsn
+            valid_size = 0
+            if os.path.exists(self._wal_path):
+                with open(self._wal_path, "rb") as f:
+                    for payload, valid_size in read_frames(f):
+                        lsn, operation, args, kwargs = decode_mutation(payload)
+                        # Records already covered by the snapshot are skipped
+                        if lsn <= snapshot_lsn:
+                            continue
+                        if operation == "borrow_book":
+                            self._replay_borrow(args, kwargs)
+                        else:
+                            getattr(operations, operation)(*args, **kwargs)
+                        self._lsn = lsn
+                        self._since_snapshot += 1
+        finally:
+            operations.set_reporter(previous_reporter)
+        return valid_size
+
+    def snapshot(self):
+        """
+        Write a snapshot of the whole library and truncate the log.
+
+        The snapshot is written to a temporary file and renamed into
+        place, so a crash never leaves a partial snapshot behind. All
+        operations wait while the snapshot is written.
+        """
+        with operations.exclusive(), self._lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        self.wal.sync()
+        tmp_path = self._snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(frame(encode_values(("snapshot", self._lsn))))
+            for isbn, book in operations.books.items():
+                f.write(frame(encode_values((
+                    "book", isbn, book['title'], book['author'], book['genre'],
+                    book['total_copies'], book['available_copies']))))
+            for member in operations.members:
+                f.write(frame(encode_values((
+                    "member", member['member_id'], member['name'], member['email'],
+                    *member['borrowed_books']))))
+                # Checkout and due times of the member's loans, in microseconds
+                for isbn in member['borrowed_books']:
+                    loan = operations._loans.get(member['member_id'], isbn)
+                    if loan is not None:
+                        f.write(frame(encode_values((
+                            "loan", loan.member_id, loan.isbn,
+                            round(loan.checked_out * MICROSECONDS), round(loan.due * MICROSECONDS)))))
+            # Hold queues, each in queue order
+            for isbn, holders in operations._holds.queues():
+                for member_id in holders:
+                    f.write(frame(encode_values(("hold", member_id, isbn))))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+        # Log records up to the snapshot LSN are no longer needed
+        self.wal.truncate()
+        self._since_snapshot = 0
+
+    def sync(self):
+        """Make every logged mutation durable now."""
+        self.wal.sync()
+
+    def close(self):
+        """Stop logging mutations and close the log."""
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        if not self.wal.closed:
+            operations.remove_observer(self._log_mutation)
+            self.wal.close()
+
+    def _replay_borrow(self, args, kwargs):
+        # Borrow records carry the loan's checkout and due times; the copy
+        # may already be on loan, handed over by a replayed return_book
+        checked_out, due = kwargs.get('checked_out'), kwargs.get('due')
+        operations.borrow_book(*args)
+        member = operations.members.get(args[0])
+        if checked_out is not None and member is not None and args[1] in member['borrowed_books']:
+            operations._loans.checkout(*args, checked_out / MICROSECONDS, due / MICROSECONDS)
+
+    def _log_mutation(self, operation, args, kwargs):
+        if operation == "borrow_book":
+            # Log when the loan was checked out and is due, in microseconds
+            loan = operations._loans.get(*args)
+            if loan is not None:
+                kwargs = {'checked_out': round(loan.checked_out * MICROSECONDS),
+                          'due': round(loan.due * MICROSECONDS)}
+        with self._lock:
+            self._lsn += 1
+            self.wal.append(encode_mutation(self._lsn, operation, args, kwargs))
+            self._since_snapshot += 1
+            if (self.snapshot_every and self._since_snapshot >= self.snapshot_every
+                    and (self._snapshot_thread is None or not self._snapshot_thread.is_alive())):
+                # The caller holds operation locks, so snapshot once they are released
+                self._since_snapshot = 0
+                self._snapshot_thread = threading.Thread(target=self.snapshot, daemon=True)
+                self._snapshot_thread.start()
+
+    def _load_snapshot(self):
+        # Returns the LSN the snapshot was taken at, or 0 without a snapshot
+        if not os.path.exists(self._snapshot_path):
+            return 0
+
+        # Circulation state the add functions reset, restored afterwards.
+        # Only books with loans and members with borrowed books are kept.
+        on_loan = []
+        borrowers = []
+        loan_times = {}
+        holds = []
+
+        with open(self._snapshot_path, "rb") as f:
+            records = (decode_values(payload) for payload, _ in read_frames(f))
+            header = next(records, None)
+            if header is None:
+                return 0
+            snapshot_lsn = header[1]
+            first_member = []
+
+            def book_rows():
+                # Books are written before members, so stop at the first member
+                for values in records:
+                    if values[0] != "book":
+                        first_member.append(values)
+                        return
+                    _, isbn, title, author, genre, total_copies, available_copies = values
+                    if available_copies != total_copies:
+                        on_loan.append((isbn, available_copies))
+                    yield {'isbn': isbn, 'title': title, 'author': author,
+                           'genre': genre, 'total_copies': total_copies}
+
+            def member_rows():
+                for values in itertools.chain(first_member, records):
+                    if values[0] == "loan":
+                        loan_times[values[1], values[2]] = (values[3] / MICROSECONDS, values[4] / MICROSECONDS)
+                        continue
+                    if values[0] == "hold":
+                        holds.append((values[1], values[2]))
+                        continue
+                    if len(values) > 4:
+                        borrowers.append((values[1], tuple(values[4:])))
+                    yield {'member_id': values[1], 'name': values[2], 'email': values[3]}
+
+            operations.add_books_bulk(book_rows())
+            operations.add_members_bulk(member_rows())
+
+        for isbn, available_copies in on_loan:
+            book = operations.books[isbn]
+            operations._stats.copies_changed(0, available_copies - book['available_copies'])
+            book['available_copies'] = available_copies
+            operations._catalog_index.update_availability(isbn, book)
+        for member_id, borrowed_books in borrowers:
+            operations.members.get(member_id)['borrowed_books'] = borrowed_books
+            operations._stats.loans_changed(member_id, len(borrowed_books))
+            # Snapshots without loan times restore the loans as checked out now
+            for isbn in borrowed_books:
+                operations._loans.checkout(member_id, isbn, *loan_times.get((member_id, isbn), ()))
+        for member_id, isbn in holds:
+            operations._holds.place(member_id, isbn)
+        return snapshot_lsn
@@ -4,6 +4,7 @@ Tests the core functionality using assert statements.
 """
 
 from operations import *
+from results import format_message
 
 def test_add_book():
     """Test adding a book successfully."""
@@ -160,6 +161,1359 @@ def test_return_book():
     
     print("✓ Test 7 passed: Return book functionality")
 
+def test_member_registry():
+    """Test member lookups and deletes through the member registry."""
+    # Clear existing data for clean test
+    global members
+    members.clear()
+    
+    # Add members and check they are indexed by ID
+    add_member("M001", "John Doe", "john@example.com")
+    add_member("M002", "Jane Roe", "jane@example.com")
+    add_member("M003", "Jim Poe", "jim@example.com")
+    assert members.get("M002")["name"] == "Jane Roe", "Member should be found by ID"
+    assert "M003" in members, "Member ID should be in the registry"
+    assert 404 not in members, "Any member ID can be looked up"
+    assert add_member(404, "Non String", "ns@example.com") == True, "Non-string IDs should still be accepted"
+    assert delete_member(404) == True
+    
+    # Delete a member from the middle and check order is preserved
+    assert delete_member("M002") == True, "Delete should succeed"
+    assert members.get("M002") is None, "Deleted member should not be found"
+    assert [m["member_id"] for m in members] == ["M001", "M003"], "Iteration order should be preserved"
+    
+    # Deleted IDs can be reused
+    assert add_member("M002", "Jane Roe", "jane@example.com") == True, "Deleted ID should be reusable"
+    assert add_member("M001", "John Doe", "john@example.com") == False, "Duplicate ID should not be allowed"
+    
+    print("✓ Test 8 passed: Member registry lookups and deletes")
+
+def test_search_index_matches_scan():
+    """Test that indexed search returns the same results as a full scan."""
+    # Clear existing books for clean test
+    global books
+    books.clear()
+    
+    # Add, update and delete books so the index is maintained incrementally
+    add_book("978-1", "The Great Gatsby", "F. Scott Fitzgerald", "Fiction", 1)
+    add_book("978-2", "To Kill a Mockingbird", "Harper Lee", "Fiction", 1)
+    add_book("978-3", "1984", "George Orwell", "Sci-Fi", 1)
+    add_book("978-4", "Animal Farm", "George Orwell", "Fiction", 1)
+    add_book("978-5", "The Old Man and the Sea", "Ernest Hemingway", "Fiction", 1)
+    update_book("978-2", title="Go Set a Watchman")
+    delete_book("978-3")
+    add_book("978-3", "Homage to Catalonia", "George Orwell", "History", 1)
+    
+    def scan(term, field):
+        return [isbn for isbn, book in books.items() if term.lower() in book[field].lower()]
+    
+    for term in ["", "a", "th", "the", "THE", "orwell", "ge or", "mockingbird", "watch", "zzz"]:
+        for field in ["title", "author"]:
+            results = [isbn for isbn, _ in search_books(term, field)]
+            assert results == scan(term, field), f"Search for {term!r} by {field} should match a scan"
+    
+    # Whole word search matches complete words only
+    results = search_books("george", "author", whole_words=True)
+    assert [isbn for isbn, _ in results] == ["978-4", "978-3"], "Should find books by George in catalog order"
+    assert search_books("geo", "author", whole_words=True) == [], "Partial words should not match"
+    
+    # A queued book that cannot be indexed does not drop the books behind it
+    from search_index import SearchIndex
+    index = SearchIndex()
+    index.add_deferred("978-8", {'title': None, 'author': "Nobody"})
+    index.add_deferred("978-9", {'title': "Queued Book", 'author': "Somebody"})
+    try:
+        index.search("queued")
+        assert False, "Indexing a bad record should raise"
+    except AttributeError:
+        pass
+    assert index.search("queued") == ["978-9"], "Books queued behind a bad record should stay queued"
+    
+    print("✓ Test 9 passed: Indexed search matches a full scan")
+
+def test_compact_records():
+    """Test that book and member records behave like the old dictionaries."""
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 2)
+    add_member("M001", "John Doe", "john@example.com")
+    borrow_book("M001", "978-1")
+    
+    # Dictionary-style access still works
+    book = books["978-1"]
+    assert book["genre"] == "Sci-Fi", "Genre should read back as its name"
+    assert book.genre_code == GENRES.index("Sci-Fi"), "Genre should be stored as a code"
+    assert dict(book) == {"title": "Dune", "author": "Frank Herbert", "genre": "Sci-Fi",
+                          "total_copies": 2, "available_copies": 1}, "Book should convert to a dictionary"
+    update_book("978-1", genre="Fiction")
+    assert book["genre"] == "Fiction", "Genre should be updatable"
+    
+    # Records have no per-instance dictionary
+    member = members.get("M001")
+    assert not hasattr(book, "__dict__") and not hasattr(member, "__dict__"), "Records should use __slots__"
+    assert member["borrowed_books"] == ("978-1",), "Borrowed books should be kept in a tuple"
+    
+    print("✓ Test 10 passed: Compact book and member records")
+
+def test_bulk_import():
+    """Test bulk importing books and members with an error report."""
+    import os
+    import tempfile
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "The Great Gatsby", "F. Scott Fitzgerald", "Fiction", 1)
+    
+    # Write a CSV feed containing good and bad rows
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feed.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("isbn,title,author,genre,total_copies\n")
+            f.write("978-2,Dune,Frank Herbert,Sci-Fi,2\n")
+            f.write("978-1,Duplicate,Someone,Fiction,1\n")
+            f.write("978-3,Bad Genre,Someone,Poetry,1\n")
+            f.write("978-4,No Copies,Someone,Fiction,0\n")
+            f.write("978-5,Bad Copies,Someone,Fiction,many\n")
+            f.write("978-2,Dune Again,Frank Herbert,Sci-Fi,1\n")
+            f.write("978-6,Emma,Jane Austen,Romance,3\n")
+            f.write("978-7,Short Row\n")
+            f.write("978-8,Half Copies,Someone,Fiction,2.5\n")
+        report = add_books_bulk(path, batch_size=3)
+    
+    assert report.added == 2, "Two valid books should be added"
+    assert sorted((row, reason) for row, _, reason in report.errors) == [
+        (3, Status.DUPLICATE_ISBN), (4, Status.INVALID_GENRE), (5, Status.INVALID_COPIES),
+        (6, Status.MALFORMED_ROW), (7, Status.DUPLICATE_ISBN), (9, Status.MALFORMED_ROW),
+        (10, Status.MALFORMED_ROW)], "Rejected rows should be reported"
+    assert books["978-6"]["available_copies"] == 3, "Copies should be parsed as numbers"
+    assert [isbn for isbn, _ in search_books("dune")] == ["978-2"], "Imported books should be searchable"
+    report = add_books_bulk([
+        {"isbn": "978-9", "title": None, "author": "Someone", "genre": "Fiction", "total_copies": 1},
+        {"isbn": "978-10", "title": "Whole", "author": "Someone", "genre": "Fiction", "total_copies": 2.0},
+        {"isbn": "978-11", "title": "Half", "author": "Someone", "genre": "Fiction", "total_copies": 1.5},
+    ])
+    assert report.added == 1 and [reason for _, _, reason in report.errors] == [Status.MALFORMED_ROW] * 2
+    assert [isbn for isbn, _ in search_books("whole")] == ["978-10"], "Null titles should not break searches"
+    
+    # Members can be imported from any iterable of rows
+    report = add_members_bulk([
+        {"member_id": "M001", "name": "John Doe", "email": "john@example.com"},
+        {"member_id": "M001", "name": "John Again", "email": "john@example.com"},
+        {"member_id": "M002", "name": "Bad Email", "email": "nope"},
+        {"member_id": "M003", "name": "Jane Roe"},
+        {"member_id": "M004", "name": "Jim Poe", "email": None},
+    ])
+    assert report.added == 1, "One valid member should be added"
+    assert [reason for _, _, reason in sorted(report.errors)] == [
+        Status.DUPLICATE_MEMBER, Status.INVALID_EMAIL, Status.MALFORMED_ROW, Status.MALFORMED_ROW], \
+        "Rejected members should be reported"
+    
+    print("✓ Test 11 passed: Bulk import with error report")
+
+def test_status_results_and_reporter():
+    """Test that operations return status codes and only report when asked."""
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 1)
+    add_member("M001", "John Doe", "john@example.com")
+    add_member("M002", "Jane Roe", "jane@example.com")
+    
+    # Operations return typed statuses that still compare like booleans
+    assert borrow_book("M001", "978-1") is Status.OK, "Borrow should succeed"
+    result = borrow_book("M002", "978-1")
+    assert result is Status.NO_COPIES, "Borrow should fail with no copies"
+    assert result == False and not result, "Failures should compare equal to False"
+    assert borrow_book("M009", "978-1") is Status.MEMBER_NOT_FOUND, "Unknown member should be reported"
+    
+    # A reporter receives every result and formats the old messages
+    reported = []
+    previous = set_reporter(lambda operation, status, details: reported.append(
+        format_message(operation, status, details)))
+    try:
+        return_book("M002", "978-1")
+        return_book("M001", "978-1")
+    finally:
+        set_reporter(previous)
+    assert reported == ["Error: Member 'Jane Roe' has not borrowed 'Dune'.",
+                        "Member 'John Doe' successfully returned 'Dune'."], "Reporter should format messages"
+    
+    print("✓ Test 12 passed: Status results and optional reporter")
+
+def test_persistence_recovery():
+    """Test recovering state from a snapshot and the write-ahead log."""
+    import os
+    import tempfile
+    from storage import LibraryStore, WAL_FILE
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Log some mutations, with a snapshot taken part way through
+        store = LibraryStore(tmp, snapshot_every=4)
+        add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 2)
+        add_book("978-2", "Emma", "Jane Austen", "Romance", 1)
+        add_member("M001", "John Doe", "john@example.com")
+        borrow_book("M001", "978-1")
+        update_book("978-2", title="Persuasion")
+        borrow_book("M001", "978-2")
+        store.close()
+        expected_books = {isbn: dict(book) for isbn, book in books.items()}
+        expected_members = [dict(member) for member in members]
+        
+        # Simulate a crash that left a torn record at the end of the log
+        with open(os.path.join(tmp, WAL_FILE), "ab") as f:
+            f.write(b"\x10\x00\x00")
+        
+        # Reopening the store recovers the same state
+        store = LibraryStore(tmp)
+        assert {isbn: dict(book) for isbn, book in books.items()} == expected_books, "Books should be recovered"
+        assert [dict(member) for member in members] == expected_members, "Members should be recovered"
+        assert [isbn for isbn, _ in search_books("persuasion")] == ["978-2"], "Recovered books should be searchable"
+        
+        # New mutations after recovery are logged too
+        return_book("M001", "978-1")
+        
+        # Whole float copy counts are stored as ints, and other types are refused before anything changes
+        assert add_book("978-3", "Ulysses", "James Joyce", "Fiction", 2.0) == Status.OK
+        assert update_book("978-3", total_copies=3.0) == Status.OK
+        assert add_book("978-4", "Bad", "Nobody", "Fiction", 2.5) == Status.INVALID_COPIES
+        assert update_book("978-3", total_copies="many") == Status.INVALID_COPIES
+        try:
+            add_book("978-4", ["Bad"], "Nobody", "Fiction", 1)
+            assert False, "A non-string title should be refused"
+        except TypeError:
+            assert "978-4" not in books, "A refused book should not be added"
+        store.close()
+        store = LibraryStore(tmp)
+        assert books["978-1"]["available_copies"] == 2, "Mutations after recovery should be recovered"
+        assert books["978-3"]["total_copies"] == 3 and isinstance(books["978-3"]["total_copies"], int)
+        store.close()
+    
+    print("✓ Test 13 passed: Persistence and recovery")
+
+def test_mapped_catalog():
+    """Test reading and changing books through a memory-mapped catalog snapshot."""
+    import os
+    import tempfile
+    import operations
+    from mmap_catalog import export_catalog, open_catalog
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "The Great Gatsby", "F. Scott Fitzgerald", "Fiction", 1)
+    add_book("978-2", "To Kill a Mockingbird", "Harper Lee", "Fiction", 2)
+    add_book("978-3", "Animal Farm", "George Orwell", "Fiction", 1)
+    add_member("M001", "John Doe", "john@example.com")
+    expected = {isbn: dict(book) for isbn, book in books.items()}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.bin")
+        export_catalog(path)
+        catalog = open_catalog(path)
+        try:
+            # Reads and searches come from the mapped file
+            assert {isbn: dict(book) for isbn, book in operations.books.items()} == expected, "Books should match"
+            assert [isbn for isbn, _ in operations.search_books("the", "title")] == ["978-1"], "Title search should work"
+            assert [isbn for isbn, _ in operations.search_books("r", "author")] == ["978-1", "978-2", "978-3"], "Short searches should work"
+            
+            # Changes land in the overlay
+            assert borrow_book("M001", "978-2") == True, "Borrowing a mapped book should succeed"
+            assert operations.books["978-2"]["available_copies"] == 1, "Borrow should be visible"
+            update_book("978-3", title="Nineteen Eighty-Four")
+            add_book("978-4", "Homage to Catalonia", "George Orwell", "History", 1)
+            delete_book("978-1")
+            assert list(operations.books) == ["978-2", "978-3", "978-4"], "Overlay changes should keep catalog order"
+            assert [isbn for isbn, _ in operations.search_books("orwell", "author")] == ["978-3", "978-4"], "Overlay books should be searchable"
+            assert operations.search_books("farm") == [], "Old titles should not match"
+        finally:
+            operations.use_catalog(books)
+            catalog.close()
+    
+    print("✓ Test 14 passed: Memory-mapped catalog with overlay")
+
+def test_concurrent_borrowing():
+    """Test that concurrent borrowers cannot take more copies than exist."""
+    import sys
+    import threading
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 3)
+    for n in range(40):
+        add_member(f"M{n:03d}", f"Member {n}", f"m{n}@example.com")
+    
+    # Switch threads as often as possible to provoke races
+    results = []
+    barrier = threading.Barrier(40)
+    def borrower(member_id):
+        barrier.wait()
+        results.append(borrow_book(member_id, "978-1"))
+    
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=borrower, args=(f"M{n:03d}",)) for n in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    
+    assert results.count(Status.OK) == 3, "Exactly three borrows should succeed"
+    assert results.count(Status.NO_COPIES) == 37, "Every other borrow should find no copies"
+    assert books["978-1"]["available_copies"] == 0, "No copies should be left"
+    assert sum(len(m["borrowed_books"]) for m in members) == 3, "Three members should hold the book"
+    
+    print("✓ Test 15 passed: Concurrent borrowing respects availability")
+
+def test_async_operations():
+    """Test the asyncio front end and search coalescing."""
+    import asyncio
+    import operations
+    import async_operations as library
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 1)
+    for n in range(10):
+        add_member(f"M{n:03d}", f"Member {n}", f"m{n}@example.com")
+    
+    # Count how many searches actually run
+    calls = []
+    original_search = operations.search_books
+    def counting_search(*args):
+        calls.append(args)
+        return original_search(*args)
+    
+    async def scenario():
+        searches = [library.search_books("DUNE") for _ in range(50)]
+        borrows = [library.borrow_book(f"M{n:03d}", "978-1") for n in range(10)]
+        return await asyncio.gather(asyncio.gather(*searches), asyncio.gather(*borrows))
+    
+    operations.search_books = counting_search
+    try:
+        search_results, borrow_results = asyncio.run(scenario())
+    finally:
+        operations.search_books = original_search
+    
+    assert len(calls) == 1, "Identical concurrent searches should run once"
+    assert all(result == [("978-1", books["978-1"])] for result in search_results), "Every caller should get the results"
+    assert borrow_results.count(Status.OK) == 1, "Only one patron should get the single copy"
+    
+    print("✓ Test 16 passed: Async operations and search coalescing")
+
+def test_batch_circulation():
+    """Test that batched borrows and returns apply all items or none."""
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 2)
+    add_book("978-2", "Emma", "Jane Austen", "Fiction", 1)
+    add_book("978-3", "Ulysses", "James Joyce", "Fiction", 1)
+    add_book("978-4", "Walden", "Henry Thoreau", "Non-Fiction", 1)
+    add_member("M001", "Alice", "alice@example.com")
+    add_member("M002", "Bob", "bob@example.com")
+    
+    # One unknown ISBN aborts the whole batch
+    results = borrow_many("M001", ["978-1", "978-9", "978-2"])
+    assert results == [("978-1", Status.BATCH_ABORTED), ("978-9", Status.BOOK_NOT_FOUND),
+                       ("978-2", Status.BATCH_ABORTED)], "Valid items should be aborted with the batch"
+    assert members.get("M001")["borrowed_books"] == (), "Nothing should be borrowed"
+    assert books["978-1"]["available_copies"] == 2, "Availability should be unchanged"
+    
+    # The limit counts the whole batch, and duplicates are rejected
+    results = borrow_many("M001", ["978-1", "978-2", "978-3", "978-4"])
+    assert results[3] == ("978-4", Status.BORROW_LIMIT), "Fourth book should exceed the limit"
+    results = borrow_many("M001", ["978-1", "978-1"])
+    assert results[1] == ("978-1", Status.ALREADY_BORROWED), "Duplicate ISBN should be rejected"
+    
+    results = borrow_many("M001", ["978-1", "978-2", "978-3"])
+    assert all(status == Status.OK for _, status in results), "Whole batch should be borrowed"
+    assert members.get("M001")["borrowed_books"] == ("978-1", "978-2", "978-3"), "Member should hold all three"
+    assert books["978-2"]["available_copies"] == 0, "Availability should be updated"
+    assert borrow_many("M002", ["978-1", "978-2"])[1] == ("978-2", Status.NO_COPIES), "No copies should be left"
+    
+    # Returns are also all or nothing
+    results = return_many("M001", ["978-1", "978-4"])
+    assert results == [("978-1", Status.BATCH_ABORTED), ("978-4", Status.NOT_BORROWED)], "Batch should be aborted"
+    assert len(members.get("M001")["borrowed_books"]) == 3, "Nothing should be returned"
+    assert return_many("M001", ["978-3", "978-1"]) == [("978-3", Status.OK), ("978-1", Status.OK)], \
+        "Both books should be returned"
+    assert members.get("M001")["borrowed_books"] == ("978-2",), "Only one book should remain"
+    assert books["978-1"]["available_copies"] == 2, "Returned copies should be available"
+    assert return_many("M999", ["978-2"]) == [("978-2", Status.MEMBER_NOT_FOUND)], "Unknown member should fail"
+    
+    print("✓ Test 17 passed: Batched borrowing and returning")
+
+def test_find_books():
+    """Test genre and availability queries against a full scan."""
+    import random
+    import operations
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    rng = random.Random(11)
+    words = ["dune", "emma", "night", "river", "stone", "glass"]
+    for n in range(200):
+        add_book(f"978-{n}", f"{rng.choice(words)} {rng.choice(words)}", f"Author {n % 7}",
+                 rng.choice(GENRES), rng.randint(1, 2))
+    add_member("M001", "Alice", "alice@example.com")
+    
+    # Change genres, copies and availability through the public operations
+    for n in range(0, 200, 9):
+        update_book(f"978-{n}", genre=rng.choice(GENRES))
+    for n in range(0, 200, 13):
+        update_book(f"978-{n}", total_copies=3)
+    for n in range(0, 200, 17):
+        delete_book(f"978-{n}")
+    single = [isbn for isbn, book in books.items() if book["total_copies"] == 1][:3]
+    borrow_many("M001", single)
+    return_book("M001", single[0])
+    
+    def scan(term, genre, available_only):
+        return [(isbn, book) for isbn, book in books.items()
+                if (term is None or term in book["title"].lower())
+                and (genre is None or book["genre"] == genre)
+                and (not available_only or book["available_copies"] > 0)]
+    
+    for term in (None, "river", "st"):
+        for genre in (None,) + GENRES:
+            for available_only in (False, True):
+                assert find_books(term, genre=genre, available_only=available_only) == \
+                    scan(term, genre, available_only), f"find_books({term!r}, {genre!r}) should match a scan"
+    
+    assert all(isbn not in dict(find_books(available_only=True)) for isbn in single[1:]), \
+        "Borrowed-out books should not be available"
+    assert find_books(genre="Poetry") == [], "Unknown genre should match nothing"
+    
+    # A replaced catalog is indexed on the first query
+    previous = operations.use_catalog(BookCatalog({"978-X": Book("Dune", "Frank Herbert", "Sci-Fi", 1)}))
+    try:
+        assert operations.find_books(genre="Sci-Fi", available_only=True)[0][0] == "978-X", \
+            "Replaced catalog should be indexed"
+    finally:
+        operations.use_catalog(previous)
+    
+    print("✓ Test 18 passed: Genre and availability queries")
+
+def test_paginated_display():
+    """Test paginated display output in every format."""
+    import csv
+    import io
+    import json
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    for n in range(25):
+        add_book(f"978-{n:02d}", f"Title {n}", f"Author {n}", "Fiction", 2)
+    add_member("M001", "Alice", "alice@example.com")
+    add_member("M002", "Bob", "bob@example.com")
+    borrow_many("M001", ["978-03", "978-04"])
+    borrow_book("M002", "978-03")
+    
+    # Every page is written with a single call
+    class Recorder(io.StringIO):
+        writes = 0
+        def write(self, text):
+            self.writes += 1
+            return super().write(text)
+    
+    out = Recorder()
+    assert display_books(offset=5, limit=12, renderer="csv", page_size=5, file=out) == 12, "Should show 12 books"
+    assert out.writes == 1 + 3, "Header plus three pages should be written"
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [row["isbn"] for row in rows] == [f"978-{n:02d}" for n in range(5, 17)], "Page should follow catalog order"
+    
+    out = io.StringIO()
+    display_books(offset=3, limit=2, renderer="json", file=out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(r["isbn"], r["available_copies"]) for r in records] == [("978-03", 0), ("978-04", 1)], \
+        "JSON should report availability"
+    
+    out = io.StringIO()
+    display_members(renderer="json", file=out)
+    alice = json.loads(out.getvalue().splitlines()[0])
+    assert alice["borrowed_books"] == [{"isbn": "978-03", "title": "Title 3"}, {"isbn": "978-04", "title": "Title 4"}], \
+        "Borrowed books should include titles"
+    
+    out = io.StringIO()
+    display_members(offset=1, file=out)
+    assert out.getvalue() == ("\n=== ALL MEMBERS ===\nID: M002\n  Name: Bob\n  Email: bob@example.com\n"
+                              "  Borrowed Books: 1\n    Books:\n      - Title 3 (ISBN: 978-03)\n\n"), \
+        "Text output should match the original format"
+    assert [isbn for isbn, _ in iter_books(20)] == [f"978-{n}" for n in range(20, 25)], "Offset should skip books"
+    
+    print("✓ Test 19 passed: Paginated display with text, CSV and JSON output")
+
+def test_search_cache():
+    """Test search result caching, eviction and precise invalidation."""
+    from search_cache import SearchCache
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    configure_search_cache(max_entries=3)
+    
+    add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 1)
+    add_book("978-2", "Emma", "Jane Austen", "Fiction", 1)
+    
+    assert search_books("DUNE")[0][0] == "978-1", "Search should find Dune"
+    search_books("dune")
+    search_books("emma")
+    stats = search_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2), "Same query in any case should hit the cache"
+    
+    # Adding a book evicts only the queries it could match
+    add_book("978-3", "Dune Messiah", "Frank Herbert", "Sci-Fi", 1)
+    assert search_cache_stats()["invalidations"] == 1, "Only the 'dune' query should be evicted"
+    assert [isbn for isbn, _ in search_books("dune")] == ["978-1", "978-3"], "New book should be found"
+    search_books("emma")
+    assert search_cache_stats()["hits"] == 2, "'emma' should still be cached"
+    
+    # Renames and deletes evict queries matching the old or new text
+    update_book("978-2", title="Persuasion")
+    assert search_books("emma") == [], "Renamed book should no longer match"
+    assert search_books("persuasion")[0][0] == "978-2", "Renamed book should match its new title"
+    delete_book("978-3")
+    assert [isbn for isbn, _ in search_books("dune")] == ["978-1"], "Deleted book should not be returned"
+    
+    # Borrowing changes the cached book in place
+    add_member("M001", "Alice", "alice@example.com")
+    borrow_book("M001", "978-1")
+    assert search_books("dune")[0][1]["available_copies"] == 0, "Cached results should show current availability"
+    
+    # Least recently used queries are evicted first, and entries expire
+    now = [0.0]
+    cache = SearchCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.put(("a", "title", False), ["1"])
+    cache.put(("b", "title", False), ["2"])
+    cache.get(("a", "title", False))
+    cache.put(("c", "title", False), ["3"])
+    assert cache.get(("b", "title", False)) is None, "Least recently used entry should be evicted"
+    assert cache.evictions == 1, "Eviction should be counted"
+    now[0] = 11.0
+    assert cache.get(("a", "title", False)) is None, "Expired entry should miss"
+    
+    configure_search_cache()
+    print("✓ Test 20 passed: Search result cache")
+
+def test_metrics():
+    """Test operation metrics, gauges and Prometheus output."""
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 1)
+    assert metrics_snapshot() is None, "Metrics should be disabled by default"
+    
+    enable_metrics()
+    try:
+        add_member("M001", "Alice", "alice@example.com")
+        add_member("M002", "Bob", "bob@example.com")
+        borrow_book("M001", "978-1")
+        borrow_book("M002", "978-1")
+        borrow_book("M002", "978-9")
+        search_books("dune")
+        
+        snapshot = metrics_snapshot()
+        borrow = snapshot["operations"]["borrow_book"]
+        assert borrow["calls"] == 3, "Every borrow should be counted"
+        assert borrow["errors"] == {"no_copies": 1, "book_not_found": 1}, "Errors should be counted by reason"
+        assert list(borrow["latency_buckets"].values())[-1] == 3, "Every call should land in a latency bucket"
+        assert snapshot["gauges"] == {"books": 1, "members": 2, "loans": 1}, "Gauges should reflect the library"
+        assert "add_book" not in snapshot["operations"], "Calls before enabling should not be counted"
+        
+        text = metrics_prometheus()
+        assert 'library_operation_calls_total{operation="borrow_book"} 3' in text, "Calls should be exported"
+        assert 'library_operation_errors_total{operation="borrow_book",reason="no_copies"} 1' in text, \
+            "Errors should be exported"
+        assert 'library_operation_latency_seconds_bucket{operation="search_books",le="+Inf"} 1' in text, \
+            "Histograms should be exported"
+        assert "library_loans 1" in text, "Gauges should be exported"
+    finally:
+        disable_metrics()
+    
+    assert metrics_prometheus() == "", "Disabled metrics should export nothing"
+    print("✓ Test 21 passed: Operation metrics and Prometheus export")
+
+def test_sharded_library():
+    """Test that a sharded library behaves like the single-process one."""
+    from sharding import ShardedLibrary, shard_for
+    
+    with ShardedLibrary(workers=3) as library:
+        for n in range(12):
+            assert library.add_book(f"978-{n}", f"Dune {n}", "Frank Herbert", "Sci-Fi", 1) == True, \
+                "Books should be added"
+        assert library.add_book("978-0", "Dune", "Frank Herbert", "Sci-Fi", 1) == Status.DUPLICATE_ISBN, \
+            "Duplicate ISBN should be rejected by its shard"
+        report = library.add_members_bulk({"member_id": f"M{n}", "name": f"Member {n}", "email": f"m{n}@example.com"}
+                                          for n in range(6))
+        assert report.added == 6, "Members should be imported across shards"
+        
+        # Pick a member and books that live on different shards
+        member_id = "M0"
+        remote = [f"978-{n}" for n in range(12) if shard_for(f"978-{n}", 3) != shard_for(member_id, 3)]
+        local = [f"978-{n}" for n in range(12) if shard_for(f"978-{n}", 3) == shard_for(member_id, 3)]
+        assert [library.borrow_book(member_id, isbn) for isbn in remote[:2] + local[:1]] == [Status.OK] * 3, \
+            "Cross-shard and local borrows should succeed"
+        assert library.borrow_book(member_id, remote[2]) == Status.BORROW_LIMIT, "Limit should hold across shards"
+        assert library.borrow_book("M1", remote[0]) == Status.NO_COPIES, "Copy should be taken"
+        assert library.borrow_book("M9", "978-99") == Status.MEMBER_NOT_FOUND, "Status precedence should match"
+        
+        # An aborted transaction leaves both shards unchanged
+        assert library.return_book("M1", remote[0]) == Status.NOT_BORROWED, "M1 has not borrowed the book"
+        assert library.borrow_book("M1", remote[0]) == Status.NO_COPIES, "Aborted return should not free a copy"
+        assert library.return_book(member_id, remote[0]) == Status.OK, "Cross-shard return should succeed"
+        assert library.borrow_book("M1", remote[0]) == Status.OK, "Returned copy should be available"
+        
+        # Integer member IDs are routed like their string form and stay distinct from it
+        assert shard_for(404, 3) == shard_for("404", 3)
+        assert library.add_member(404, "Integer", "int@example.com") == Status.OK
+        assert library.add_member("404", "String", "str@example.com") == Status.OK
+        other = [f"978-{n}" for n in range(12) if shard_for(f"978-{n}", 3) != shard_for(404, 3)]
+        free = [isbn for isbn in other if isbn not in remote[:2] + local[:1]]
+        assert library.borrow_book(404, free[0]) == Status.OK, "Integer member IDs should borrow across shards"
+        assert library.return_book("404", free[0]) == Status.NOT_BORROWED, "The string ID is another member"
+        assert library.return_book(404, free[0]) == Status.OK
+        
+        # Searches gather every shard and keep catalog order
+        assert [isbn for isbn, _ in library.search_books("dune 1")] == ["978-1", "978-10", "978-11"], \
+            "Search results should be merged in catalog order"
+        assert dict(library.search_books("dune"))[remote[0]]["available_copies"] == 0, \
+            "Books should come back with their state"
+    
+    print("✓ Test 22 passed: Sharded library with cross-shard two-phase commit")
+
+def test_parallel_search():
+    """Test that parallel scans return the same results as sequential ones."""
+    import random
+    import operations
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    rng = random.Random(17)
+    letters = "abcdefg "
+    for n in range(300):
+        add_book(f"978-{n}", "".join(rng.choice(letters) for _ in range(12)), f"Author {n}", "Fiction", 1)
+    sequential = {term: search_books(term) for term in ("a", "fg", "x", "")}
+    
+    configure_search_cache(max_entries=0)
+    configure_parallel_search(threshold=100, workers=2)
+    try:
+        # Searches scan in-process until the snapshot is ready
+        assert search_books("a") == sequential["a"], "Search should fall back to the in-process scan"
+        assert operations._parallel_search.wait(), "Snapshot should be built in the background"
+        for term, expected in sequential.items():
+            assert search_books(term) == expected, f"Parallel search for {term!r} should match the sequential scan"
+        
+        # Changes are applied on top of the snapshot without rebuilding it
+        snapshot = operations._parallel_search._isbns
+        add_book("978-X", "xx marks the spot", "Author X", "Fiction", 1)
+        update_book("978-0", title="Another xylophone")
+        update_book("978-1", title="Xenon")
+        assert [isbn for isbn, _ in search_books("x")] == ["978-0", "978-1", "978-X"], "Changes should be visible"
+        delete_book("978-X")
+        delete_book("978-1")
+        add_book("978-1", "Xenon again", "Author 1", "Fiction", 1)
+        assert [isbn for isbn, _ in search_books("x")] == ["978-0", "978-1"], "Deleted book should not be found"
+        assert operations._parallel_search._isbns is snapshot, "Small changes should not rebuild the snapshot"
+    finally:
+        configure_parallel_search(threshold=None)
+        configure_search_cache()
+    
+    print("✓ Test 23 passed: Parallel search matches the sequential scan")
+
+def test_columnar_catalog():
+    """Test that the columnar store follows the catalog and matches the dict reports."""
+    import columnar
+    
+    if columnar.np is None:
+        print("- Test 24 skipped: NumPy is not installed")
+        return
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    for n in range(20):
+        add_book(f"978-{n}", f"Title {n}", f"Author {n}", GENRES[n % 3], 1 + n % 2)
+    add_member("M001", "Alice", "alice@example.com")
+    
+    store = columnar.ColumnarCatalog()
+    try:
+        # Changes after the store was built are applied through the observer
+        add_books_bulk([{"isbn": "978-B", "title": "Bulk", "author": "A", "genre": "History", "total_copies": 2}])
+        borrow_many("M001", ["978-0", "978-1", "978-B"])
+        return_book("M001", "978-1")
+        update_book("978-2", genre="Science", total_copies=5)
+        for n in range(3, 15):
+            delete_book(f"978-{n}")
+        
+        assert len(store) == len(books), "Store should hold every book"
+        assert store.copies_by_genre() == columnar.copies_by_genre(), "Copies by genre should match the dict path"
+        assert store.filter(max_available=0) == columnar.unavailable_books() == ["978-0"], \
+            "Books with no copies left should match the dict path"
+        assert store.filter(genre="History", min_utilization=0.5) == ["978-B"], "Filters should combine"
+        borrowed = sum(b["total_copies"] - b["available_copies"] for b in books.values())
+        assert abs(store.utilization() - borrowed / sum(b["total_copies"] for b in books.values())) < 1e-9, \
+            "Utilization should match the catalog"
+        
+        # Writers growing and compacting the arrays do not disturb concurrent queries
+        import threading
+        def churn(worker):
+            for n in range(300):
+                isbn = f"978-T{worker}-{n}"
+                add_book(isbn, "Churn", "C", GENRES[n % 3], 1)
+                if n % 3:
+                    delete_book(isbn)
+        writers = [threading.Thread(target=churn, args=(worker,)) for worker in range(3)]
+        for thread in writers:
+            thread.start()
+        while any(thread.is_alive() for thread in writers):
+            store.copies_by_genre()
+            store.filter(max_available=0)
+        for thread in writers:
+            thread.join()
+        assert len(store) == len(books) and store.copies_by_genre() == columnar.copies_by_genre(), \
+            "Store should match the catalog after concurrent changes"
+        
+        # Clearing the catalog resets the store
+        books.clear()
+        add_book("978-Z", "Zed", "Z", "Fiction", 1)
+        assert len(store) == 1 and store.copies_by_genre()["Fiction"] == (1, 1), "Store should follow a cleared catalog"
+        
+        # Recovering a snapshot with books on loan is seen by an existing store
+        import tempfile
+        from storage import LibraryStore
+        with tempfile.TemporaryDirectory() as tmp:
+            library_store = LibraryStore(tmp)
+            add_book("978-L", "Loaned", "L", "History", 2)
+            add_member("M010", "Lender", "lender@example.com")
+            borrow_book("M010", "978-L")
+            library_store.snapshot()
+            library_store.close()
+            assert store.copies_by_genre()["History"] == (2, 1)
+            library_store = LibraryStore(tmp)
+            library_store.close()
+        assert books["978-L"]["available_copies"] == 1
+        assert store.copies_by_genre() == columnar.copies_by_genre(), "Recovered loans should be in the store"
+        assert store.filter(genre="History", max_available=1) == ["978-L"]
+    finally:
+        store.close()
+    
+    print("✓ Test 24 passed: Columnar catalog store")
+
+def test_ranked_search():
+    """Test typo-tolerant ranked search over titles and authors."""
+    import ranked_search
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "The Great Gatsby", "F. Scott Fitzgerald", "Fiction", 2)
+    add_book("978-2", "Tender Is the Night", "F. Scott Fitzgerald", "Fiction", 1)
+    add_book("978-3", "The Great Railway Bazaar", "Paul Theroux", "Non-Fiction", 1)
+    add_book("978-4", "Dune", "Frank Herbert", "Sci-Fi", 1)
+    
+    # Misspellings still find the author, and title and author are searched together
+    assert {isbn for isbn, _ in search_ranked("Fitzgerlad")} == {"978-1", "978-2"}, "Typos should be tolerated"
+    assert search_ranked("gatsbyy fitzgerald")[0][0] == "978-1", "Matching both fields should rank first"
+    assert search_ranked("great", limit=1)[0][0] in ("978-1", "978-3"), "Limit should cap the results"
+    assert len(search_ranked("great", limit=1)) == 1, "Limit should cap the results"
+    assert search_ranked("xyzzy") == [], "Unknown words should match nothing"
+    assert search_ranked("dun") == [], "Short words must match exactly"
+    
+    # The index follows changes made after it was built
+    add_book("978-5", "This Side of Paradise", "F. Scott Fitzgerald", "Fiction", 1)
+    update_book("978-4", title="Children of Dune")
+    delete_book("978-2")
+    assert {isbn for isbn, _ in search_ranked("fitzgerald")} == {"978-1", "978-5"}, "Adds and deletes should be indexed"
+    assert search_ranked("children")[0][0] == "978-4", "Title updates should be indexed"
+    
+    # An exact match outranks a one-letter typo
+    index = ranked_search.RankedIndex()
+    index.add("A", {"title": "Night", "author": "Elie Wiesel"})
+    index.add("B", {"title": "Knight", "author": "Someone Else"})
+    assert [isbn for isbn, _ in index.search("night")] == ["A", "B"], "Exact matches should score higher"
+    assert ranked_search.edit_distance("fitzgerlad", "fitzgerald", 2) == 2
+    
+    # Clearing the catalog clears the index
+    books.clear()
+    assert search_ranked("gatsby") == [], "Cleared books should not be found"
+    
+    print("✓ Test 25 passed: Ranked search")
+
+def test_loan_ledger():
+    """Test loan due dates, overdue queries and the loan reverse indexes."""
+    import tempfile
+    import time
+    from loans import SECONDS_PER_DAY
+    from storage import LibraryStore
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    now = [1_000_000.0]
+    configure_loans(loan_days=14, clock=lambda: now[0])
+    try:
+        for n in range(1, 5):
+            add_book(f"978-{n}", f"Title {n}", f"Author {n}", "Fiction", 2)
+        add_member("M001", "Alice", "alice@example.com")
+        add_member("M002", "Bob", "bob@example.com")
+        
+        borrow_book("M001", "978-1")
+        now[0] += SECONDS_PER_DAY
+        borrow_many("M002", ["978-1", "978-2"])
+        now[0] += SECONDS_PER_DAY
+        borrow_book("M001", "978-3")
+        
+        loan = member_loans("M001")[0]
+        assert (loan.isbn, loan.checked_out, loan.due) == ("978-1", 1_000_000.0, 1_000_000.0 + 14 * SECONDS_PER_DAY), \
+            "Loans should record checkout and due times"
+        assert [loan.isbn for loan in member_loans("M001")] == ["978-1", "978-3"], "Loans should be indexed by member"
+        assert book_borrowers("978-1") == ["M001", "M002"], "Loans should be indexed by ISBN"
+        assert [(loan.member_id, loan.isbn) for loan in next_due_loans(2)] == [("M001", "978-1"), ("M002", "978-1")], \
+            "Earliest due loans should come first"
+        
+        # Overdue loans as of a time, most overdue first
+        as_of = 1_000_000.0 + 15.5 * SECONDS_PER_DAY
+        assert [(loan.member_id, loan.isbn) for loan in overdue_loans(as_of)] == \
+            [("M001", "978-1"), ("M002", "978-1"), ("M002", "978-2")], "Loans due before as_of should be overdue"
+        assert len(overdue_loans(as_of, limit=1)) == 1, "Limit should cap the overdue loans"
+        assert overdue_loans() == [], "Nothing should be overdue yet"
+        
+        # Returned loans leave every index
+        return_book("M002", "978-1")
+        return_many("M001", ["978-1"])
+        assert book_borrowers("978-1") == [], "Returned books should have no borrowers"
+        assert [(loan.member_id, loan.isbn) for loan in overdue_loans(as_of)] == [("M002", "978-2")], \
+            "Returned loans should not be overdue"
+        
+        # Snapshots and the log keep the loan times, including copies handed to holders
+        with tempfile.TemporaryDirectory() as tmp:
+            # Opening a store recovers its (empty) library, so the loans are made afterwards
+            store = LibraryStore(tmp)
+            add_book("978-1", "Title 1", "Author 1", "Fiction", 1)
+            add_book("978-2", "Title 2", "Author 2", "Fiction", 2)
+            add_member("M001", "Alice", "alice@example.com")
+            add_member("M002", "Bob", "bob@example.com")
+            borrow_book("M001", "978-1")
+            store.snapshot()
+            now[0] += SECONDS_PER_DAY
+            borrow_many("M002", ["978-2"])
+            place_hold("M002", "978-1")
+            now[0] += SECONDS_PER_DAY
+            return_book("M001", "978-1")
+            now[0] += SECONDS_PER_DAY
+            borrow_book("M001", "978-2")
+            store.close()
+            expected = [(loan.member_id, loan.isbn, loan.checked_out, loan.due) for loan in next_due_loans(10)]
+            assert len(expected) == 3
+            now[0] += 30 * SECONDS_PER_DAY
+            store = LibraryStore(tmp)
+            store.close()
+            assert [(loan.member_id, loan.isbn, loan.checked_out, loan.due) for loan in next_due_loans(10)] == expected, \
+                "Loan times should survive a restart"
+            assert len(overdue_loans()) == 3, "Recovered loans should still be overdue"
+        
+        # Clearing the members clears the ledger
+        members.clear()
+        assert next_due_loans(10) == [] and member_loans("M002") == [], "Cleared members should have no loans"
+    finally:
+        configure_loans(clock=time.time)
+    
+    print("✓ Test 26 passed: Loan ledger")
+
+def test_sqlite_backend():
+    """Test running the operations against the SQLite storage backend."""
+    import os
+    import tempfile
+    import threading
+    from sqlite_backend import SqliteBackend
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "library.db")
+        backend = SqliteBackend(path, readers=2)
+        previous = set_backend(backend)
+        try:
+            assert previous is None, "The in-memory library should be the default"
+            assert add_book("978-1", "The Great Gatsby", "F. Scott Fitzgerald", "Fiction", 1) == Status.OK
+            assert add_book("978-1", "Duplicate", "Someone", "Fiction", 1) == Status.DUPLICATE_ISBN
+            assert add_book("978-9", "Bad", "Someone", "Poetry", 1) == Status.INVALID_GENRE
+            report = add_books_bulk([
+                {'isbn': "978-2", 'title': "Tender Is the Night", 'author': "F. Scott Fitzgerald",
+                 'genre': "Fiction", 'total_copies': 2},
+                {'isbn': "978-3", 'title': "Dune", 'author': "Frank Herbert", 'genre': "Sci-Fi", 'total_copies': 3},
+                {'isbn': "978-4", 'title': "Emma", 'author': "Jane Austen", 'genre': "Romance", 'total_copies': 1},
+                {'isbn': "978-2", 'title': "Again", 'author': "Nobody", 'genre': "Fiction", 'total_copies': 1},
+            ])
+            assert report.added == 3 and report.errors == [(4, "978-2", Status.DUPLICATE_ISBN)]
+            assert add_members_bulk([{'member_id': f"M00{n}", 'name': f"Member {n}",
+                                      'email': f"m{n}@example.com"} for n in range(1, 4)]).added == 3
+            assert len(books) == 0 and len(members) == 0, "The in-memory library should be untouched"
+            
+            # Searches use the full-text index for longer terms and scan for short ones
+            assert [isbn for isbn, _ in search_books("great gat")] == ["978-1"]
+            assert [isbn for isbn, _ in search_books("fitzgerald", search_by="author")] == ["978-1", "978-2"]
+            assert [isbn for isbn, _ in search_books("e", search_by="title")] == ["978-1", "978-2", "978-3", "978-4"]
+            assert [isbn for isbn, _ in search_books("night the", whole_words=True)] == ["978-2"]
+            assert [isbn for isbn, _ in find_books(genre="Fiction")] == ["978-1", "978-2"]
+            
+            # Borrowing runs in one transaction with the same checks as in memory
+            assert borrow_book("M001", "978-1") == Status.OK
+            assert borrow_book("M002", "978-1") == Status.NO_COPIES
+            assert borrow_book("M001", "978-1") == Status.NO_COPIES
+            assert borrow_book("M001", "978-2") == Status.OK
+            assert borrow_book("M001", "978-2") == Status.ALREADY_BORROWED
+            assert borrow_book("M001", "978-3") == Status.OK
+            assert borrow_book("M001", "978-4") == Status.BORROW_LIMIT
+            assert borrow_book("M999", "978-4") == Status.MEMBER_NOT_FOUND
+            assert [isbn for isbn, _ in find_books(available_only=True)] == ["978-2", "978-3", "978-4"]
+            assert backend.get_member("M001")['borrowed_books'] == ("978-1", "978-2", "978-3")
+            assert delete_book("978-1") == Status.BOOK_HAS_LOANS
+            assert delete_member("M001") == Status.MEMBER_HAS_LOANS
+            assert return_book("M002", "978-1") == Status.NOT_BORROWED
+            assert return_book("M001", "978-1") == Status.OK
+            assert backend.get_book("978-1")['available_copies'] == 1
+            
+            # Updates keep borrowed copies on loan and are seen by searches
+            assert update_book("978-2", title="Night Falls", total_copies=4) == Status.OK
+            assert dict(backend.get_book("978-2")) == {'title': "Night Falls", 'author': "F. Scott Fitzgerald",
+                                                      'genre': "Fiction", 'total_copies': 4, 'available_copies': 3}
+            assert [isbn for isbn, _ in search_books("tender")] == []
+            assert update_member("M002", email="invalid") == Status.INVALID_EMAIL
+            assert update_member("M002", name="Renamed") == Status.OK
+            assert [member['name'] for member in iter_members(offset=1)] == ["Renamed", "Member 3"]
+            assert [isbn for isbn, _ in iter_books(offset=1, limit=2)] == ["978-2", "978-3"]
+            
+            # Concurrent borrowers never take more copies than exist
+            add_members_bulk([{'member_id': f"T{n}", 'name': f"T {n}", 'email': f"t{n}@example.com"}
+                              for n in range(8)])
+            threads = [threading.Thread(target=borrow_book, args=(f"T{n}", "978-3")) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert backend.get_book("978-3")['available_copies'] == 0, "Every copy should be borrowed once"
+            
+            # Listings come from the database
+            import io
+            out = io.StringIO()
+            assert display_books(renderer="csv", file=out) == 4 and "Night Falls" in out.getvalue()
+            out = io.StringIO()
+            assert display_members(file=out) == 11 and "Night Falls" in out.getvalue(), \
+                "Borrowed titles should be looked up in the database"
+            
+            # Operations that only follow the in-memory library refuse to run
+            for operation, args in ((borrow_many, ("M002", ["978-4"])), (return_many, ("M001", ["978-2"])),
+                                    (circulation_stats, ()), (place_hold, ("M002", "978-3")),
+                                    (cancel_hold, ("M002", "978-3")), (overdue_loans, ())):
+                try:
+                    operation(*args)
+                    assert False, f"{operation.__name__} should refuse to run against a backend"
+                except NotImplementedError:
+                    pass
+            assert backend.get_book("978-4")['available_copies'] == 1, "Refused operations should change nothing"
+            
+            # Metrics gauges count the database, not the empty in-memory library
+            enable_metrics()
+            try:
+                assert metrics_snapshot()['gauges'] == {'books': 4, 'members': 11, 'loans': 4}
+                assert "library_books 4" in metrics_prometheus()
+            finally:
+                disable_metrics()
+        finally:
+            set_backend(None)
+            backend.close()
+        
+        # The library is still there when the database is opened again
+        backend = SqliteBackend(path)
+        assert backend.get_member("M001")['borrowed_books'] == ("978-2", "978-3")
+        backend.close()
+    
+    print("✓ Test 27 passed: SQLite storage backend")
+
+def test_circulation_stats():
+    """Test incremental circulation totals, borrow counts and the popular titles sketch."""
+    from circulation_stats import SpaceSaving
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    def walked():
+        # The same totals found by walking every book and member
+        total = sum(book['total_copies'] for book in books.values())
+        available = sum(book['available_copies'] for book in books.values())
+        at_limit = {member['member_id'] for member in members if len(member['borrowed_books']) >= 3}
+        return {'titles': len(books), 'total_copies': total, 'available_copies': available,
+                'copies_out': total - available, 'at_limit': at_limit}
+    
+    def counted():
+        stats = circulation_stats()
+        return {'titles': stats['titles'], 'total_copies': stats['total_copies'],
+                'available_copies': stats['available_copies'], 'copies_out': stats['copies_out'],
+                'at_limit': members_at_limit()}
+    
+    for n in range(1, 6):
+        add_book(f"978-{n}", f"Book {n}", "Author", "Fiction", n)
+    add_member("M001", "Alice", "alice@example.com")
+    add_member("M002", "Bob", "bob@example.com")
+    
+    borrow_many("M001", ["978-1", "978-2", "978-3"])
+    borrow_book("M002", "978-3")
+    borrow_book("M002", "978-4")
+    assert counted() == walked(), "Totals should follow borrows"
+    assert members_at_limit() == {"M001"}, "M001 should be at the limit"
+    
+    return_book("M002", "978-3")
+    borrow_book("M002", "978-3")
+    return_many("M001", ["978-1", "978-2"])
+    borrow_book("M001", "978-2")
+    assert counted() == walked(), "Totals should follow returns"
+    assert circulation_stats()['total_borrows'] == 7
+    assert borrow_count("978-3") == 3 and borrow_count("978-5") == 0
+    assert most_borrowed(2) == [("978-3", 3), ("978-2", 2)], "Most borrowed books should come first"
+    
+    # Changing the copies keeps borrowed copies on loan
+    update_book("978-4", total_copies=10)
+    assert books["978-4"]['available_copies'] == 9, "One copy of 978-4 is still borrowed"
+    update_book("978-3", total_copies=1)
+    assert books["978-3"]['available_copies'] == 0, "Both copies of 978-3 are still borrowed"
+    delete_book("978-5")
+    return_many("M002", ["978-4", "978-3"])
+    delete_member("M002")
+    assert counted() == walked(), "Totals should follow updates and deletes"
+    
+    # The sketch keeps every item seen more than total / capacity times
+    sketch = SpaceSaving(capacity=4)
+    stream = ["a"] * 30 + ["b"] * 20 + [f"x{n}" for n in range(40)] + ["a"] * 10
+    for item in stream:
+        sketch.add(item)
+    assert "a" in sketch and "b" in sketch and len(sketch) == 4, "Frequent items should be kept"
+    assert dict(sketch.items())["a"] >= 40, "Counts should never be underestimated"
+    
+    # Clearing the library resets the totals
+    books.clear()
+    members.clear()
+    assert circulation_stats()['titles'] == 0 and most_borrowed() == [] and members_at_limit() == set()
+    
+    print("✓ Test 28 passed: Circulation statistics")
+
+def test_fast_import():
+    """Test lazy imports, deferred indexes and the import time budget."""
+    import operations
+    from benchmarks.import_time import DEFAULT_BUDGET_MS, DEFERRED_MODULES, median_import_ms
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    # Importing operations stays within budget and leaves optional modules unloaded
+    median, profile = median_import_ms("operations", runs=5)
+    assert median <= DEFAULT_BUDGET_MS, f"import operations took {median:.1f} ms"
+    assert not [name for name in DEFERRED_MODULES if name in profile], "Optional modules should load lazily"
+    
+    # Optional components are imported on first access
+    from storage import LibraryStore
+    assert operations.LibraryStore is LibraryStore
+    assert "SqliteBackend" in dir(operations)
+    try:
+        operations.no_such_component
+        assert False, "Unknown attributes should raise AttributeError"
+    except AttributeError:
+        pass
+    
+    # Bulk loading an empty catalog defers the genre and availability indexes
+    add_books_bulk({'isbn': f"978-{n}", 'title': f"Book {n}", 'author': "Author",
+                    'genre': "Fiction" if n % 2 else "History", 'total_copies': 1} for n in range(10))
+    assert operations._catalog_index.stale, "The indexes should be built on the first filtered query"
+    add_member("M001", "Alice", "alice@example.com")
+    borrow_book("M001", "978-1")
+    assert [isbn for isbn, _ in find_books(genre="Fiction", available_only=True)] == \
+        ["978-3", "978-5", "978-7", "978-9"], "Deferred indexes should reflect every change"
+    assert not operations._catalog_index.stale
+    
+    print("✓ Test 29 passed: Fast import and deferred indexes")
+
+def test_event_feed():
+    """Test the change feed: typed events, cursors, backpressure and the file sink."""
+    import os
+    import tempfile
+    import threading
+    import time
+    from events import EventFeed, EventType, read_events
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    feed = EventFeed(capacity=4, publish_timeout=0.2)
+    try:
+        first = feed.subscribe()
+        lossy = feed.subscribe(lossy=True)
+        add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 2)
+        add_member("M001", "Alice", "alice@example.com")
+        borrow_book("M001", "978-1")
+        borrow_book("M001", "978-9")  # fails, so nothing is published
+        update_book("978-1", title="Dune Messiah")
+        
+        events = first.poll()
+        assert [event.type for event in events] == [EventType.BOOK_ADDED, EventType.MEMBER_ADDED,
+                                                    EventType.BOOK_BORROWED, EventType.BOOK_UPDATED]
+        assert [event.sequence for event in events] == [0, 1, 2, 3], "Events should be numbered in order"
+        assert events[2].args == ("M001", "978-1") and events[3].kwargs == {'title': "Dune Messiah"}
+        assert first.poll() == [] and first.lag == 0, "Every event should have been read"
+        
+        # Events behind a full ring are queued until a slow subscriber reads
+        # (the lossy subscriber is not waited for)
+        def read_later():
+            time.sleep(0.05)
+            first.poll(max_events=1)
+        reader = threading.Thread(target=read_later)
+        reader.start()
+        for n in range(5):
+            return_book("M001", "978-1") if n % 2 == 0 else borrow_book("M001", "978-1")
+        reader.join()
+        assert feed.flush(timeout=5), "Queued events should be written once the subscriber reads"
+        assert first.lost == 0 and first.lag == 4, "The slow subscriber should not lose events"
+        assert len(lossy.poll()) == 4 and lossy.lost == 5, "The lossy subscriber should skip overwritten events"
+        
+        # A subscriber that stops reading only holds events back until the timeout
+        for n in range(4):
+            borrow_book("M001", "978-1") if n % 2 == 0 else return_book("M001", "978-1")
+        assert feed.flush(timeout=2), "Queued events should be written after the timeout"
+        assert len(first.poll()) == 4 and first.lost == 4, "The stalled subscriber should skip ahead"
+        first.close()
+        lossy.close()
+        
+        # Operations never wait for a full ring, even from a subscriber's own thread
+        add_book("978-2", "Emma", "Jane Austen", "Romance", 2)
+        add_member("W1", "Worker 1", "w1@example.com")
+        add_member("W2", "Worker 2", "w2@example.com")
+        slow_feed = EventFeed(capacity=2, publish_timeout=5)
+        try:
+            slow = slow_feed.subscribe()
+            start = time.monotonic()
+            def borrow_and_return(member_id):
+                for _ in range(5):
+                    assert borrow_book(member_id, "978-2") == Status.OK
+                    assert return_book(member_id, "978-2") == Status.OK
+            worker = threading.Thread(target=borrow_and_return, args=("W2",))
+            worker.start()
+            borrow_and_return("W1")
+            worker.join()
+            assert [isbn for isbn, _ in search_books("emma")] == ["978-2"]
+            assert time.monotonic() - start < 1, "Operations should not wait for the slow subscriber"
+            assert slow.lag == 20, "Events behind the full ring should be queued"
+            sequences = []
+            while slow.lag:
+                events = slow.poll(timeout=1)
+                assert events, "Queued events should arrive as the subscriber reads"
+                sequences += [event.sequence for event in events]
+            assert sequences == list(range(20)) and slow.lost == 0, "The slow subscriber should see every event"
+        finally:
+            slow_feed.close()
+        
+        # The file sink writes compact, framed events in batches
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "events.bin")
+            sink = feed.add_file_sink(path, batch_size=2, flush_interval=0.01)
+            start = feed.published
+            add_member("M002", "Bob", "bob@example.com")
+            update_member("M002", email="bob@example.org")
+            delete_member("M002")
+            feed.close()
+            written = list(read_events(sink.path))
+            assert [event.sequence for event in written] == [start, start + 1, start + 2]
+            assert [event.type for event in written] == [EventType.MEMBER_ADDED, EventType.MEMBER_UPDATED,
+                                                         EventType.MEMBER_DELETED]
+            assert written[1].args == ("M002",) and written[1].kwargs == {'email': "bob@example.org"}
+            assert abs(written[0].timestamp - time.time()) < 60, "Timestamps should survive encoding"
+            assert os.path.getsize(path) < 3 * 64, "Events should be encoded compactly"
+        
+        # A sink that cannot encode an event stops and no longer holds events back
+        with tempfile.TemporaryDirectory() as tmp:
+            broken_feed = EventFeed(capacity=2)
+            sink = broken_feed.add_file_sink(os.path.join(tmp, "events.bin"), flush_interval=0.01)
+            broken_feed.publish(EventType.BOOK_ADDED, (object(),))
+            sink._thread.join(timeout=5)
+            assert isinstance(sink.error, TypeError), "The sink should keep the error that stopped it"
+            for n in range(4):
+                broken_feed.publish(EventType.BOOK_DELETED, (f"978-{n}",))
+            assert broken_feed.flush(timeout=0.5), "The stopped sink should not hold events back"
+            try:
+                broken_feed.close()
+                assert False, "Closing the feed should report the sink's error"
+            except TypeError:
+                pass
+        
+        # A closed feed publishes nothing
+        add_member("M003", "Carol", "carol@example.com")
+        assert feed.published == start + 3
+    finally:
+        feed.close()
+    
+    print("✓ Test 30 passed: Event feed")
+
+def test_hold_queues():
+    """Test hold queues: positions, allocation on return and recovery."""
+    import tempfile
+    from storage import LibraryStore
+    
+    # Clear existing data for clean test
+    global books, members
+    books.clear()
+    members.clear()
+    
+    add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 1)
+    for n in range(2, 6):
+        add_book(f"978-{n}", f"Book {n}", "Author", "Fiction", 1)
+    for member_id in ("M001", "M002", "M003", "M004"):
+        add_member(member_id, member_id, f"{member_id.lower()}@example.com")
+    
+    assert place_hold("M002", "978-1") == Status.COPIES_AVAILABLE, "Available books should be borrowed instead"
+    borrow_book("M001", "978-1")
+    assert place_hold("M001", "978-1") == Status.ALREADY_BORROWED
+    for member_id in ("M002", "M003", "M004"):
+        assert place_hold(member_id, "978-1") == Status.OK
+    assert place_hold("M002", "978-1") == Status.ALREADY_HELD
+    assert [hold_position(member_id, "978-1") for member_id in ("M002", "M003", "M004")] == [1, 2, 3]
+    
+    # Cancelling a hold moves the members behind it up
+    assert cancel_hold("M003", "978-1") == Status.OK
+    assert cancel_hold("M003", "978-1") == Status.NOT_HELD
+    assert hold_position("M003", "978-1") is None and hold_position("M004", "978-1") == 2
+    assert holds_waiting("978-1") == 2 and member_holds("M004") == ["978-1"]
+    
+    # A holder at the borrowing limit is passed over but keeps their place
+    borrow_many("M002", ["978-2", "978-3", "978-4"])
+    assert return_book("M001", "978-1") == Status.OK
+    assert "978-1" in members.get("M004")["borrowed_books"], "The copy should be lent to the next eligible holder"
+    assert books["978-1"]["available_copies"] == 0, "The copy should not go back on the shelf"
+    assert [loan.member_id for loan in member_loans("M004")] == ["M004"]
+    assert hold_position("M002", "978-1") == 1 and member_holds("M004") == []
+    assert circulation_stats()['copies_out'] == 4, "Handing a copy over should keep the totals right"
+    
+    # Without an eligible holder the copy goes back on the shelf
+    return_book("M004", "978-1")
+    assert books["978-1"]["available_copies"] == 1 and holds_waiting("978-1") == 1
+    
+    # Returning a batch lends every held book
+    borrow_book("M004", "978-1")
+    borrow_book("M001", "978-5")
+    place_hold("M003", "978-5")
+    return_many("M002", ["978-2"])
+    assert hold_position("M002", "978-1") == 1, "A holder should not lose their hold while waiting"
+    assert return_many("M004", ["978-1"]) == [("978-1", Status.OK)]
+    assert "978-1" in members.get("M002")["borrowed_books"] and holds_waiting("978-1") == 0
+    
+    # Deleting a member or a book cancels their holds
+    place_hold("M004", "978-5")
+    delete_member("M004")
+    assert member_holds("M004") == [] and hold_position("M003", "978-5") == 1
+    add_book("978-6", "Book 6", "Author", "Fiction", 1)
+    borrow_book("M003", "978-6")
+    place_hold("M002", "978-6")
+    return_book("M003", "978-6")
+    assert delete_book("978-6") == Status.OK and member_holds("M002") == []
+    
+    # Copies added to a held book are lent to the holders
+    add_book("978-7", "Book 7", "Author", "Fiction", 1)
+    add_member("M005", "M005", "m005@example.com")
+    borrow_book("M001", "978-7")
+    place_hold("M003", "978-7")
+    assert update_book("978-7", total_copies=2) == Status.OK
+    assert "978-7" in members.get("M003")["borrowed_books"] and books["978-7"]["available_copies"] == 0
+    assert circulation_stats()['available_copies'] == sum(b["available_copies"] for b in books.values())
+    
+    # Copies on the shelf are kept for holders who can borrow them
+    place_hold("M002", "978-7")
+    return_book("M003", "978-7")
+    assert books["978-7"]["available_copies"] == 1, "A holder at the limit should be passed over"
+    return_book("M002", "978-3")
+    assert borrow_book("M005", "978-7") == Status.RESERVED, "The copy should be kept for the eligible holder"
+    assert borrow_many("M005", ["978-7"]) == [("978-7", Status.RESERVED)]
+    assert place_hold("M005", "978-7") == Status.OK and hold_position("M005", "978-7") == 2
+    assert borrow_book("M002", "978-7") == Status.OK and hold_position("M005", "978-7") == 1
+
+    # Positions stay right as a long queue is cancelled out of turn and renumbered
+    from holds import HoldQueues
+    queues = HoldQueues()
+    waiting = [f"W{n}" for n in range(20)]
+    for member_id in waiting:
+        queues.place(member_id, "978-8")
+    for member_id in waiting[1::2] + waiting[:1] + waiting[10:11]:
+        queues.cancel(member_id, "978-8")
+        waiting.remove(member_id)
+        assert [queues.position(m, "978-8") for m in waiting] == list(range(1, len(waiting) + 1))
+
+    # Holds survive a snapshot, and handing copies over is replayed from the log
+    books.clear()
+    members.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LibraryStore(tmp)
+        add_book("978-1", "Dune", "Frank Herbert", "Sci-Fi", 1)
+        for member_id in ("M001", "M002", "M003"):
+            add_member(member_id, member_id, f"{member_id.lower()}@example.com")
+        borrow_book("M001", "978-1")
+        place_hold("M002", "978-1")
+        place_hold("M003", "978-1")
+        store.snapshot()
+        return_book("M001", "978-1")
+        place_hold("M001", "978-1")
+        store.close()
+        expected = [dict(member) for member in members]
+        store = LibraryStore(tmp)
+        assert [dict(member) for member in members] == expected, "Hand-overs should be recovered"
+        assert [hold_position(member_id, "978-1") for member_id in ("M001", "M002", "M003")] == [2, None, 1]
+        store.close()
+    
+    print("✓ Test 31 passed: Hold queues")
+
 def run_all_tests():
     """Run all unit tests."""
     print("Running Unit Tests for Mini Library Management System")
@@ -173,6 +1527,30 @@ def run_all_tests():
         test_delete_book_with_borrowed_copies()
         test_search_books()
         test_return_book()
+        test_member_registry()
+        test_search_index_matches_scan()
+        test_compact_records()
+        test_bulk_import()
+        test_status_results_and_reporter()
+        test_persistence_recovery()
+        test_mapped_catalog()
+        test_concurrent_borrowing()
+        test_async_operations()
+        test_batch_circulation()
+        test_find_books()
+        test_paginated_display()
+        test_search_cache()
+        test_metrics()
+        test_sharded_library()
+        test_parallel_search()
+        test_columnar_catalog()
+        test_ranked_search()
+        test_loan_ledger()
+        test_sqlite_backend()
+        test_circulation_stats()
+        test_fast_import()
+        test_event_feed()
+        test_hold_queues()
         
         print("=" * 50)
         print("✓ All tests passed successfully!")